@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Compare the columnar `CandleStore` with the previous dict-of-dicts chart history:
+memory held per bar, `du` update throughput (new bars and forming-bar updates),
+and the cost of reading a time range back.
+"""
+
+import argparse
+import time
+import tracemalloc
+from bisect import bisect_left, bisect_right
+
+from pytradingview.candles import CandleStore
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark candle storage.")
+    parser.add_argument("--bars", type=int, default=100000, help="Bars stored")
+    parser.add_argument("--ticks", type=int, default=5, help="Forming-bar updates per bar")
+    parser.add_argument("--lookups", type=int, default=1000, help="Range lookups")
+    return parser.parse_args()
+
+
+def make_updates(bars, ticks):
+    for index in range(bars):
+        for tick in range(ticks):
+            price = 100.0 + index * 0.01 + tick * 0.001
+            yield [index * 60, price, price + 0.5, price - 0.5, price, 1000.0 + tick]
+
+
+class DictHistory:
+    """The previous `ChartSession` storage: one dict per bar, plus a copy for the current bar."""
+
+    def __init__(self):
+        self.periods = {}
+        self.current = {}
+
+    def upsert(self, v):
+        self.periods[v[0]] = {
+            'time': v[0], 'open': v[1], 'close': v[4], 'high': v[2], 'low': v[3],
+            'volume': round(v[5] * 100) / 100,
+        }
+        self.current = {
+            'time': v[0], 'open': v[1], 'close': v[4], 'high': v[2], 'low': v[3],
+            'volume': round(v[5] * 100) / 100,
+        }
+
+    def range(self, start, end):
+        # get_all_periods re-sorted the whole history on every access.
+        ordered = sorted(self.periods.items())
+        times = [t for t, _ in ordered]
+        return [bar['close'] for _, bar in ordered[bisect_left(times, start):bisect_right(times, end)]]
+
+
+class ColumnarHistory:
+    def __init__(self):
+        self.store = CandleStore()
+
+    def upsert(self, v):
+        self.store.upsert(v[0], v[1], v[2], v[3], v[4], v[5])
+
+    def range(self, start, end):
+        return self.store.view('close', start, end)
+
+
+def run(label, history_class, args):
+    updates = list(make_updates(args.bars, args.ticks))
+
+    tracemalloc.start()
+    history = history_class()
+    started = time.perf_counter()
+    for update in updates:
+        history.upsert(update)
+    ingest = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    span = args.bars * 60
+    lookups = max(1, args.lookups if history_class is ColumnarHistory else args.lookups // 100)
+    started = time.perf_counter()
+    for index in range(lookups):
+        start = (index * 7919 * 60) % span
+        history.range(start, start + 600 * 60)
+    lookup = (time.perf_counter() - started) / lookups
+
+    print(
+        f"{label:<9} {len(updates) / ingest:12,.0f} updates/s  "
+        f"{memory / args.bars:8.1f} B/bar  {lookup * 1e6:10.1f} us/range lookup"
+    )
+
+
+def main():
+    args = parse_args()
+    print(f"bars: {args.bars}  updates: {args.bars * args.ticks}")
+    run("dict", DictHistory, args)
+    run("columnar", ColumnarHistory, args)
+
+
+if __name__ == "__main__":
+    main()
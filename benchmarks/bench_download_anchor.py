@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Estimate bars transferred per useful bar for `download_data`, paging back from
+the newest bar versus anchoring the series at the end of the requested range.
+
+The server is simulated: it holds a continuous 1-minute series, answers the
+initial series request with `range` bars ending at the anchor (or the newest
+bar) and each `request_more_data` with the next older bars.
+"""
+
+import argparse
+
+from pytradingview.candles import CandleBatch
+from pytradingview.download import HistoryDownload
+
+MINUTE = 60
+DAY = 24 * 60 * MINUTE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark anchored vs unanchored history downloads.")
+    parser.add_argument("--years-ago", type=float, default=3.0, help="How far back the range ends")
+    parser.add_argument("--days", type=float, default=30.0, help="Length of the requested range")
+    parser.add_argument("--range", type=int, default=100, help="Bars in the initial series request")
+    return parser.parse_args()
+
+
+class SimulatedSeries:
+    def __init__(self, newest, anchor, initial):
+        self.oldest = (anchor if anchor is not None else newest) + MINUTE
+        self.pending = [initial]
+        self.transferred = 0
+
+    def request_more_data(self, count):
+        self.pending.append(count)
+
+    def next_page(self):
+        count = self.pending.pop(0)
+        self.oldest -= count * MINUTE
+        times = range(self.oldest, self.oldest + count * MINUTE, MINUTE)
+        self.transferred += count
+        return CandleBatch.from_periods([{"v": [t, 1.0, 1.0, 1.0, 1.0, 1.0]} for t in times])
+
+
+class NullWriter:
+    def write(self, batch, first, stop):
+        pass
+
+    def close(self):
+        pass
+
+
+def run(label, newest, start, end, anchor, initial):
+    server = SimulatedSeries(newest, end if anchor else None, initial)
+    download = HistoryDownload(start, end, NullWriter(), server.request_more_data, lambda progress: None)
+    while not download.on_page(server.next_page()):
+        pass
+    print(f"{label:<11} pages={download.pages:6d}  transferred={server.transferred:10,d}  "
+          f"useful={download.bars:8,d}  transferred/useful={server.transferred / download.bars:8.2f}")
+
+
+def main():
+    args = parse_args()
+    newest = 1_750_000_000 // MINUTE * MINUTE
+    end = newest - int(args.years_ago * 365 * DAY) // MINUTE * MINUTE
+    start = end - int(args.days * DAY)
+    print(f"range: {args.days:g} days of 1-minute bars ending {args.years_ago:g} years ago")
+    run("from newest", newest, start, end, anchor=False, initial=args.range)
+    run("anchored", newest, start, end, anchor=True, initial=args.range)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compare the regex based `parse_ws_packet` with the incremental `FrameDecoder`
+on large `timescale_update` messages.
+"""
+
+import argparse
+import json
+import time
+
+from pytradingview.protocol import FrameDecoder, parse_ws_packet
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark websocket frame decoding.")
+    parser.add_argument("--bars", type=int, default=5000, help="Bars per timescale_update frame")
+    parser.add_argument("--frames", type=int, default=4, help="Frames per websocket message")
+    parser.add_argument("--repeat", type=int, default=50, help="Messages decoded per implementation")
+    return parser.parse_args()
+
+
+def make_timescale_update(bars):
+    series = [
+        {"i": i, "v": [1700000000 + i * 60, 100.0 + i, 101.5 + i, 99.25 + i, 100.75 + i, 1234.5678]}
+        for i in range(bars)
+    ]
+    return json.dumps({
+        "m": "timescale_update",
+        "p": ["cs_benchmark", {"$prices": {"s": series, "ns": {"d": "", "indexes": []}, "t": "s1"}}],
+    }, separators=(",", ":"))
+
+
+def make_message(bars, frames):
+    payload = make_timescale_update(bars)
+    heartbeat = "~h~1"
+    parts = []
+    for _ in range(frames):
+        parts.append(f"~m~{len(payload)}~m~{payload}")
+        parts.append(f"~m~{len(heartbeat)}~m~{heartbeat}")
+    return "".join(parts)
+
+
+def run(label, decode, message, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        packets = decode(message)
+    elapsed = time.perf_counter() - started
+    mb = len(message) * repeat / 1e6
+    print(f"{label:<16} {elapsed * 1000 / repeat:8.2f} ms/message  {mb / elapsed:8.1f} MB/s  packets={len(packets)}")
+
+
+def main():
+    args = parse_args()
+    message = make_message(args.bars, args.frames)
+    print(f"message size: {len(message) / 1e6:.2f} MB ({args.frames} x {args.bars} bars)")
+
+    decoder = FrameDecoder()
+    run("parse_ws_packet", parse_ws_packet, message, args.repeat)
+    run("FrameDecoder", lambda m: list(decoder.decode(m)), message, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare `QuoteStore` with the per-consumer merged dict it replaces
+(`state.setdefault(symbol, {}).update(v)`): memory held for N symbols with the
+full field set, `qsd` merge throughput, and snapshot reads.
+
+Symbol names and values are decoded from JSON like real packets, so every packet
+carries fresh string objects.
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from pytradingview.quote import get_quote_fields
+from pytradingview.quote_store import QuoteStore
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the merged quote store.")
+    parser.add_argument("--symbols", type=int, default=5000, help="Subscribed symbols")
+    parser.add_argument("--updates", type=int, default=200000, help="Delta packets after the initial quotes")
+    parser.add_argument("--fields", choices=("all", "price"), default="all", help="Field set")
+    return parser.parse_args()
+
+
+def make_packets(symbols, fields, updates, seed=7):
+    rng = random.Random(seed)
+    names = [f"EXCHANGE:SYM{index:05d}" for index in range(symbols)]
+    numeric = [field for field in fields if field in ("lp", "ch", "chp", "volume", "bid", "ask", "rch", "rchp")] or fields
+    packets = [
+        json.dumps({"n": name, "s": "ok", "v": {field: rng.random() for field in fields}})
+        for name in names
+    ]
+    for _ in range(updates):
+        changed = rng.sample(numeric, min(len(numeric), rng.randint(1, 3)))
+        packets.append(json.dumps({"n": rng.choice(names), "v": {field: rng.random() for field in changed}}))
+    return names, packets
+
+
+class DictState:
+    def __init__(self, fields):
+        self.state = {}
+
+    def update(self, symbol, values, status=None):
+        self.state.setdefault(symbol, {}).update(values)
+
+    def snapshot(self, symbol):
+        return dict(self.state[symbol])
+
+
+def run(label, state_class, fields, names, packets, initial):
+    tracemalloc.start()
+    state = state_class(fields)
+    for packet in packets[:initial]:
+        data = json.loads(packet)
+        state.update(data["n"], data["v"], data.get("s"))
+    del data
+    # Only what the state keeps alive of the decoded packets is still allocated.
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    decoded = [json.loads(packet) for packet in packets[initial:]]
+    started = time.perf_counter()
+    for data in decoded:
+        state.update(data["n"], data["v"], data.get("s"))
+    merge = len(decoded) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for name in names:
+        state.snapshot(name)
+    snapshot = (time.perf_counter() - started) / len(names)
+
+    print(
+        f"{label:<11} {memory / 2**20:8.2f} MiB  {memory / len(names):8.0f} B/symbol  "
+        f"{merge:12,.0f} merges/s  {snapshot * 1e6:6.2f} us/snapshot"
+    )
+
+
+def main():
+    args = parse_args()
+    fields = get_quote_fields(args.fields)
+    names, packets = make_packets(args.symbols, fields, args.updates)
+    print(f"symbols: {args.symbols}  fields: {len(fields)}  delta packets: {args.updates}")
+    run("dict", DictState, fields, names, packets, args.symbols)
+    run("QuoteStore", QuoteStore, fields, names, packets, args.symbols)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Measure bytes processed per second on the receive path, comparing the default
+text mode (UTF-8 validation and decode to `str`) with the binary mode that
+hands `memoryview` payload slices to the JSON backend.
+
+Each mode is timed twice: `framing` covers what binary mode skips or changes
+(UTF-8 decode and frame slicing, no JSON), `total` adds the JSON decode. Building
+the Python objects of a large `timescale_update` costs far more than framing it,
+even with `orjson`, so most of the framing gain disappears in the total.
+"""
+
+import argparse
+import time
+
+from bench_frame_decoder import make_message
+
+from pytradingview import protocol
+from pytradingview.protocol import FrameDecoder
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark text vs binary receive paths.")
+    parser.add_argument("--bars", type=int, default=5000, help="Bars per timescale_update frame")
+    parser.add_argument("--frames", type=int, default=4, help="Frames per websocket message")
+    parser.add_argument("--repeat", type=int, default=50, help="Messages processed per mode")
+    parser.add_argument("--backend", default=None, help="JSON backend (default: fastest installed)")
+    return parser.parse_args()
+
+
+def text_framing(raw, decoder):
+    # What websocket-client does before on_message, followed by the str framing.
+    return list(decoder.feed(raw.decode("utf-8")))
+
+
+def binary_framing(raw, decoder):
+    return list(decoder.feed(raw))
+
+
+def text_path(raw, decoder):
+    return list(decoder.decode(raw.decode("utf-8")))
+
+
+def binary_path(raw, decoder):
+    return list(decoder.decode(raw))
+
+
+def run(label, process, raw, decoder, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        packets = process(raw, decoder)
+    elapsed = time.perf_counter() - started
+    mb = len(raw) * repeat / 1e6
+    print(f"{label:<16} {mb / elapsed:9.1f} MB/s  {elapsed * 1000 / repeat:8.2f} ms/message  frames={len(packets)}")
+
+
+def main():
+    args = parse_args()
+    backend = protocol.set_json_backend(args.backend)
+    raw = make_message(args.bars, args.frames).encode()
+    print(f"backend: {backend.name}  message size: {len(raw) / 1e6:.2f} MB")
+
+    run("text framing", text_framing, raw, FrameDecoder(), args.repeat)
+    run("binary framing", binary_framing, raw, FrameDecoder(binary=True), args.repeat)
+    run("text total", text_path, raw, FrameDecoder(), args.repeat)
+    run("binary total", binary_path, raw, FrameDecoder(binary=True), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Measure local resampling of one 1 minute stream into several timeframes: live
+update throughput per `Resampler` (constant per update, independent of the
+timeframe) and the cost of resampling a history page.
+"""
+
+import argparse
+import time
+
+from pytradingview.candles import CandleBatch
+from pytradingview.resample import Resampler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark local timeframe resampling.")
+    parser.add_argument("--bars", type=int, default=100000, help="1 minute base bars")
+    parser.add_argument("--ticks", type=int, default=5, help="Forming-bar updates per base bar")
+    parser.add_argument("--timeframes", default="5,15,60,240,D", help="Comma separated target timeframes")
+    parser.add_argument("--timezone", default="America/New_York")
+    parser.add_argument("--session", default="0930-1600")
+    return parser.parse_args()
+
+
+def make_history(bars):
+    start = 1_704_672_000
+    return CandleBatch.from_rows([
+        {"time": start + i * 60, "open": 100.0 + i * 0.01, "high": 100.5 + i * 0.01,
+         "low": 99.5 + i * 0.01, "close": 100.0 + i * 0.01, "volume": 1000.0}
+        for i in range(bars)
+    ])
+
+
+def main():
+    args = parse_args()
+    timeframes = args.timeframes.split(",")
+    history = make_history(args.bars)
+    times = history.columns["time"]
+    print(f"base bars: {args.bars}  updates: {args.bars * args.ticks}  session: {args.session} {args.timezone}")
+
+    for timeframe in timeframes:
+        resampler = Resampler(timeframe, timezone=args.timezone, session=args.session)
+        started = time.perf_counter()
+        resampler.load(history)
+        load = time.perf_counter() - started
+
+        live = Resampler(timeframe, timezone=args.timezone, session=args.session)
+        started = time.perf_counter()
+        for index in range(args.bars):
+            t = times[index]
+            for tick in range(args.ticks):
+                price = 100.0 + tick * 0.001
+                live.update(t, price, price + 0.5, price - 0.5, price, 1000.0 + tick)
+        updates = args.bars * args.ticks / (time.perf_counter() - started)
+
+        print(
+            f"{timeframe:>4}  {len(resampler.candles):8,} bars  "
+            f"{args.bars / load:12,.0f} history bars/s  {updates:12,.0f} updates/s"
+        )
+
+    print(f"server series: 1 instead of {len(timeframes) + 1}")
+
+
+if __name__ == "__main__":
+    main()
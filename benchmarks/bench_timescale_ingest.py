@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare the per-bar dict loop previously used for `timescale_update` packets
+with the columnar `CandleBatch` ingestion: time per history page, and the
+memory each keeps for the page and needs at peak while building it.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from bench_frame_decoder import make_timescale_update
+
+from pytradingview.candles import CandleBatch, CandleStore
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark timescale_update ingestion.")
+    parser.add_argument("--bars", type=int, default=5000, help="Bars per timescale_update packet")
+    parser.add_argument("--repeat", type=int, default=200, help="Packets ingested per implementation")
+    return parser.parse_args()
+
+
+def dict_loop(periods):
+    candles = []
+    for p in periods:
+        candles.append({
+            'time': p['v'][0],
+            'open': p['v'][1],
+            'close': p['v'][4],
+            'high': p['v'][2],
+            'low': p['v'][3],
+            'volume': round(p['v'][5] * 100) / 100 if len(p['v']) > 5 else None,
+        })
+    return candles
+
+
+def columnar(periods):
+    store = CandleStore()
+    store.extend_batch(CandleBatch.from_periods(periods))
+    return store
+
+
+def memory(ingest, periods):
+    tracemalloc.start()
+    # Both paths return what they keep, so it is still traced below.
+    result = ingest(periods)
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return kept, peak
+
+
+def run(label, ingest, periods, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        ingest(periods)
+    elapsed = (time.perf_counter() - started) / repeat
+    kept, peak = memory(ingest, periods)
+    print(f"{label:<9} {elapsed * 1000:8.2f} ms/page  {len(periods) / elapsed:12,.0f} bars/s  "
+          f"{kept / len(periods):7.1f} B/bar kept  {peak / len(periods):7.1f} B/bar peak")
+
+
+def main():
+    args = parse_args()
+    periods = json.loads(make_timescale_update(args.bars))["p"][1]["$prices"]["s"]
+    print(f"bars per page: {args.bars}")
+    run("dicts", dict_loop, periods, args.repeat)
+    run("columnar", columnar, periods, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
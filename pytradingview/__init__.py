@@ -1,6 +1,15 @@
 from .auth import TradingViewAuthError, get_auth_token
 from .client import Client
+from .aio import AsyncClient
+from .bulk import BulkDownloader
+from .cache import CacheKey, CandleCache
+from .conflate import conflate_quotes, conflate_updates
+from .dispatch import Dispatcher
+from .quote_pool import QuotePool
+from .resample import Resampler
+from .sender import SendQueueFull
+from .sharding import ShardedClient
 
 TVclient = Client
 
-__all__ = ["Client", "TVclient", "TradingViewAuthError", "get_auth_token"]
+__all__ = ["Client", "AsyncClient", "BulkDownloader", "CacheKey", "CandleCache", "Dispatcher", "QuotePool", "Resampler", "TVclient", "TradingViewAuthError", "SendQueueFull", "ShardedClient", "conflate_quotes", "conflate_updates", "get_auth_token"]
@@ -3,6 +3,7 @@ import os
 import sys
 from .utils import parse_datetime
 from .auth import TradingViewAuthError
+from .writers import WRITERS, format_for
 
 
 AUTH_TOKEN_ENV_VARS = ("PYTRADINGVIEW_AUTH_TOKEN", "TV_AUTH_TOKEN")
@@ -27,7 +28,15 @@ def parse_args():
     parser.add_argument('-s', '--start', type=str, help="Start date (absolute or relative, e.g. 'YYYY-MM-DD', 'YYY-MM-DD HH:MM', 'YYYY-MM-DDTHH:MM', 'now', '-7d')")
     parser.add_argument('-e', '--end', type=str, help="End date (absolute or relative, e.g. 'YYYY-MM-DD', 'YYY-MM-DD HH:MM', 'YYYY-MM-DDTHH:MM', 'now', '-7d')")
     parser.add_argument('-u', '--currency', type=str, help="Set unit of currency. Default is 'USD'", default="USD")
-    parser.add_argument('-o', '--output', type=str, help="Output filename.", default="output.csv")
+    parser.add_argument('-o', '--output', type=str, help="Output filename. The extension (.csv, .parquet, .arrow, .npz) selects the format", default="output.csv")
+    parser.add_argument('--format', type=str, choices=sorted(WRITERS), help="Output format, overriding the -o extension (default: csv)")
+    parser.add_argument('--compression', type=str, help="Compression for binary formats, e.g. 'zstd', 'snappy', 'lz4'")
+    parser.add_argument('--symbols', type=str, help="Comma separated symbols to download concurrently, one file per symbol and timeframe")
+    parser.add_argument('--symbols-file', type=str, help="File with symbols to download (one per line or comma separated)")
+    parser.add_argument('--timeframes', type=str, help="Comma separated timeframes for --symbols/--symbols-file. Defaults to --timeframe")
+    parser.add_argument('--output-dir', type=str, default=".", help="Directory for --symbols/--symbols-file downloads (default: current directory)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Downloads running at once for --symbols/--symbols-file (default: 4)")
+    parser.add_argument('--connections', type=int, default=1, help="Websocket connections for --symbols/--symbols-file (default: 1)")
     parser.add_argument('--search', help="Search for symbol using TradingView's symbol search")
     parser.add_argument('--max', type=int, default=50, help="Maximum number of results to return from search (default: 50)")
     parser.add_argument(
@@ -44,6 +53,55 @@ def parse_args():
         sys.exit(1)
     return parser.parse_args()
 
+def check_output(filename, format, compression):
+    """Exits before connecting when the output format cannot take `--compression`."""
+    if compression and format_for(filename, format) == 'csv':
+        print("CSV output does not support compression")
+        sys.exit(2)
+
+def bulk_download(args, auth_token):
+    from pytradingview.bulk import BulkDownloader, read_symbols
+
+    symbols = [s.strip() for s in (args.symbols or '').split(',') if s.strip()]
+    if args.symbols_file:
+        symbols += read_symbols(args.symbols_file)
+    timeframes = [t.strip() for t in (args.timeframes or args.timeframe).split(',') if t.strip()]
+
+    def report(job):
+        if job.error:
+            print(f"❌ {job.symbol} [{job.timeframe}]: {job.error}")
+        else:
+            print(f"✅ {job.symbol} [{job.timeframe}]: {job.bars} candles -> {job.filename} ({job.elapsed:.1f}s)")
+
+    try:
+        downloader = BulkDownloader(
+            symbols, timeframes,
+            start=parse_datetime(args.start),
+            end=parse_datetime(args.end),
+            output_dir=args.output_dir,
+            concurrency=args.concurrency,
+            connections=args.connections,
+            currency=args.currency,
+            format=args.format or 'csv',
+            compression=args.compression,
+            on_job_done=report,
+            auth_token=auth_token,
+            username=args.username,
+            password=args.password,
+        )
+    except TradingViewAuthError as exc:
+        print(f"Authentication failed: {exc}")
+        sys.exit(2)
+
+    summary = downloader.run()
+    print(
+        f"Downloaded {summary['done']}/{summary['jobs']} series, {summary['bars']} candles "
+        f"in {summary['elapsed']:.1f}s ({summary['bars_per_sec']:.0f} candles/s), {summary['failed']} failed"
+    )
+    for symbol, timeframe, error in summary['failures']:
+        print(f"- {symbol} [{timeframe}]: {error}")
+    sys.exit(1 if summary['failed'] else 0)
+
 def main():
 
     from pytradingview import TVclient
@@ -51,6 +109,13 @@ def main():
     args = parse_args()
     auth_token = resolve_auth_token(args.auth_token)
 
+    if args.download and (args.symbols or args.symbols_file):
+        check_output('', args.format, args.compression)
+        bulk_download(args, auth_token)
+
+    if args.download:
+        check_output(args.output, args.format, args.compression)
+
     try:
         client = TVclient(
             auth_token=auth_token,
@@ -69,16 +134,19 @@ def main():
         # Set up the chart
         chart.set_up_chart()
 
-        # Set the market
+        # Set the market, anchored at the end of the range so paging starts there, not at "now"
         chart.set_market(args.symbol, {
             "timeframe": args.timeframe,
             "currency": args.currency,
+            "to": int(end.timestamp()),
         })
 
         # Event: When the symbol data is loaded
         chart.on_symbol_loaded(lambda _: print("✅ Market loaded:", chart.get_infos['description']))
 
-        client.on_connected(lambda _ : chart.download_data(start=start, end=end, filename=args.output))
+        client.on_connected(lambda _ : chart.download_data(
+            start=start, end=end, filename=args.output, format=args.format, compression=args.compression,
+        ))
 
         # Start the WebSocket connection
         client.create_connection()
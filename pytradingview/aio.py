@@ -0,0 +1,268 @@
+"""
+Asyncio client for TradingView WebSocket API
+============================================
+
+`AsyncClient` runs the TradingView connection on the current event loop instead
+of a blocking `run_forever` call. It is a `Client` subclass: packets are decoded
+by the same `Client.parse_packet`, routed to the same quote and chart session
+handlers, and queued in the same prioritised `SendQueue`. Only the transport
+differs, using the optional `websockets` package
+(`pip install "pytradingview[async]"`).
+
+Quote updates and chart bars are exposed as async iterators:
+
+```python
+async with AsyncClient() as client:
+    client.quote.set_up_quote({'fields': 'price'})
+    async for update in client.quote.stream(['FX:EURUSD', 'FX:GBPUSD']):
+        print(update['data'][1])
+```
+"""
+
+import asyncio
+
+from .client import Client, WS_URL, WS_ORIGIN
+from .quote import QuoteSession
+from .chart import ChartSession
+
+
+# How often the writer re-checks a queue held back by its rate limit.
+RATE_LIMIT_POLL = 0.05
+
+
+def _buffer(maxsize):
+    """
+    Returns an `asyncio.Queue` for an async iterator and a `put` callable that
+    listeners may call from any thread (the receive thread, `Dispatcher` workers
+    or a conflator timer). A bounded queue drops its oldest item to make room,
+    so a slow consumer gets the latest updates instead of stopping the reader.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize)
+
+    def append(item):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+    def put(item):
+        loop.call_soon_threadsafe(append, item)
+
+    return queue, put
+
+
+def _connect(url, origin):
+    try:
+        import websockets
+    except ImportError as exc:
+        raise ImportError(
+            'AsyncClient requires the websockets package: pip install "pytradingview[async]"'
+        ) from exc
+    return websockets.connect(url, origin=origin, max_size=None)
+
+
+class _AsyncSocket:
+    """
+    Stands in for `websocket.WebSocketApp` as `Client.wsapp`, so the shared client
+    code can close the connection (`end`, protocol errors) from the event loop.
+    """
+
+    def __init__(self, connection, loop):
+        self.connection = connection
+        self.loop = loop
+
+    def close(self):
+        self.loop.call_soon_threadsafe(lambda: self.loop.create_task(self.connection.close()))
+
+
+class AsyncQuoteSession(QuoteSession):
+    """`QuoteSession` with an async iterator over quote updates."""
+
+    async def stream(self, symbols, fast: bool = True, maxsize: int = 0):
+        """
+        Subscribes `symbols` and yields their quote packets as they arrive.
+
+        `set_up_quote` must have been called first. When the iterator is closed its
+        listeners are removed; symbols left without listeners are unsubscribed on
+        their next update, as with `QuoteSession.on_symbol`, unless they were added
+        with `add_symbols`.
+
+        Args:
+            symbols (str or list): The symbols to stream.
+            fast (bool): Also send `quote_fast_symbols`.
+            maxsize (int): Bound of the internal buffer; 0 means unbounded. A full
+                buffer drops its oldest packet.
+
+        Yields:
+            dict: `{'type': 'qsd' | 'quote_completed', 'data': [...]}` packets.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        symbols = [s.strip() for s in symbols if s and s.strip()]
+
+        queue, put = _buffer(maxsize)
+        for symbol in symbols:
+            self.on_symbol(symbol, put)
+        # Not `add_symbols`: the symbols should go with the stream's listeners.
+        self.subscriptions.add(symbols, fast=fast)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            for symbol in symbols:
+                self.off_symbol(symbol, put)
+
+
+class AsyncChartSession(ChartSession):
+    """`ChartSession` with an async iterator over bar updates."""
+
+    async def bars(self, maxsize: int = 0):
+        """
+        Yields a copy of the current bar on every chart update.
+
+        Set the market with `set_up_chart` / `set_market` before iterating.
+
+        Args:
+            maxsize (int): Bound of the internal buffer; 0 means unbounded. A full
+                buffer drops its oldest bar.
+
+        Yields:
+            dict: `time`, `open`, `high`, `low`, `close` and `volume` of the bar.
+        """
+        queue, put = _buffer(maxsize)
+
+        def on_update(_):
+            period = self.get_periods
+            if period:
+                put(dict(period))
+
+        subscription = self.on_update(on_update)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            subscription.cancel()
+
+
+class AsyncClient(Client):
+    """
+    Asyncio TradingView client.
+
+    Use it as an async context manager, or call `connect` / `close` explicitly.
+    The synchronous `send` stays available (sessions use it); `asend` additionally
+    waits until the packet has been written. Accepts the same arguments as
+    `Client`, except the websocket-client specific `binary` mode.
+    """
+
+    quote_session_class = AsyncQuoteSession
+    chart_session_class = AsyncChartSession
+
+    def __init__(self, *args, url=WS_URL, origin=WS_ORIGIN, **kwargs):
+        if kwargs.get('binary'):
+            raise ValueError("binary mode is not supported by AsyncClient")
+        self.url = url
+        self.origin = origin
+        self._loop = None
+        self._connection = None
+        self._reader = None
+        self._writer = None
+        self._wakeup = None
+        self._closed = None
+        super().__init__(*args, **kwargs)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def connect(self):
+        """Opens the websocket and starts reading from it on the running loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._connection = await _connect(self.url, self.origin)
+        self.wsapp = _AsyncSocket(self._connection, self._loop)
+        self.on_open(self.wsapp)
+        self._reader = self._loop.create_task(self._read_loop())
+
+    async def close(self):
+        """Closes the websocket and waits for the reader and writer to stop."""
+        if self._connection is None:
+            return
+        await self._connection.close()
+        await self.wait_closed()
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+
+    async def wait_closed(self):
+        """Waits until the connection has been closed, by either side."""
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+    async def asend(self, t, p=None):
+        """
+        Queues a packet like `send` and, while connected, waits until everything
+        queued so far has been written.
+        """
+        self.send(t, p)
+        while self._closed is not None and not self._closed.is_set() and not self.outbox.join(0):
+            await asyncio.sleep(RATE_LIMIT_POLL)
+
+    def send_queue(self):
+        """Wakes the writer task once the connection is logged in."""
+        if self._loop is None or not (self.is_open() and self.is_logged()):
+            return
+        self._loop.call_soon_threadsafe(self._kick_writer)
+
+    def _kick_writer(self):
+        if self._writer is None or self._writer.done():
+            self._writer = self._loop.create_task(self._write_loop())
+        self._wakeup.set()
+
+    async def _read_loop(self):
+        try:
+            async for message in self._connection:
+                # Like websocket-client: a failing callback is reported, the connection stays open.
+                try:
+                    self.on_message(self.wsapp, message)
+                except Exception as exc:
+                    self.handle_error(exc)
+        except Exception as exc:
+            self.handle_error(exc)
+        finally:
+            self._closed.set()
+            self.on_close(
+                self.wsapp,
+                getattr(self._connection, 'close_code', None),
+                getattr(self._connection, 'close_reason', None),
+            )
+
+    async def _write_loop(self):
+        queue = self.outbox
+        while True:
+            item = queue.get_item(block=False)
+            if item is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        RATE_LIMIT_POLL if queue.depth else None,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                if self._closed.is_set():
+                    return
+                continue
+
+            packet, priority, session = item
+            try:
+                await self._connection.send(packet)
+            except Exception as exc:
+                queue.requeue(packet, priority, session)
+                self.handle_error('Send error:', exc)
+                return
+            queue.task_done()
@@ -0,0 +1,321 @@
+"""
+Concurrent multi-symbol historical downloads.
+
+`BulkDownloader` downloads a list of symbols for one or more timeframes over a
+small number of websocket connections instead of one connection per symbol.
+Each `(symbol, timeframe)` pair is a `DownloadJob` served by its own chart
+session through `ChartSession.download_data`, and at most `concurrency` jobs run
+at once across all connections. Every job writes its own file; `summary()`
+reports throughput and failures.
+
+Example:
+--------
+```python
+downloader = BulkDownloader(
+    ["FX:EURUSD", "FX:GBPUSD"], ["1", "60"],
+    start=datetime(2024, 1, 1), end=datetime(2024, 2, 1),
+    output_dir="data", concurrency=4,
+)
+print(downloader.run())
+```
+"""
+
+import os
+import threading
+import time
+
+from .client import Client
+from .utils import safe_filename
+from .writers import default_extension, format_for
+
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+FILENAME_TEMPLATE = '{symbol}_{timeframe}.{extension}'
+
+# How often `wait` checks running jobs for the stall timeout.
+WATCHDOG_INTERVAL = 1.0
+
+
+def read_symbols(path):
+    """
+    Reads symbols from a file: one per line, or comma separated. Blank lines and
+    lines starting with `#` are ignored.
+    """
+    symbols = []
+    with open(path) as file:
+        for line in file:
+            line = line.split('#', 1)[0]
+            symbols.extend(symbol.strip() for symbol in line.split(',') if symbol.strip())
+    return symbols
+
+
+class DownloadJob:
+    """One `(symbol, timeframe)` download and its outcome."""
+
+    def __init__(self, symbol, timeframe, filename):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.filename = filename
+        self.status = PENDING
+        self.error = None
+        self.bars = 0
+        self.received = 0
+        self.started = None
+        self.finished = None
+        self.last_progress = None
+        self.client = None
+        self.chart = None
+
+    @property
+    def elapsed(self):
+        """Seconds the job has been running (or ran), or None if it has not started."""
+        if self.started is None:
+            return None
+        return (self.finished or time.monotonic()) - self.started
+
+    def update(self, progress):
+        self.bars = progress['bars']
+        self.received = progress['received']
+        self.last_progress = time.monotonic()
+
+    def __repr__(self):
+        return f'DownloadJob({self.symbol!r}, {self.timeframe!r}, {self.status})'
+
+
+class BulkDownloader:
+    """
+    Downloads many symbols and timeframes over shared connections.
+
+    Args:
+        symbols (list): Symbols to download.
+        timeframes (list): Timeframes to download for every symbol, e.g. `['1', '60']`.
+        start (datetime): Oldest bar time.
+        end (datetime): Newest bar time.
+        output_dir (str): Directory for the output files; created if missing.
+        concurrency (int): Maximum number of downloads running at once.
+        connections (int): Number of websocket connections to spread them over.
+        currency (str, optional): Passed as the `currency` market option.
+        timeout (float, optional): Fail a job that receives no page for this many
+            seconds. No timeout when None.
+        overwrite (bool): Replace existing output files instead of appending to them.
+            Only CSV files can be appended to, so binary formats require True.
+        format (str): Output format: 'csv', 'parquet', 'arrow' or 'npz'.
+        compression (str, optional): Compression codec for binary formats.
+        filename_template (str): Output file name, formatted with `symbol`, `timeframe`
+            (both made file-name safe) and the format's `extension`.
+        on_job_done (callable, optional): Called with each `DownloadJob` when it
+            finishes or fails.
+        client_factory (callable): Builds each connection; defaults to `Client`.
+        **client_kwargs: Forwarded to `client_factory` (auth token, queue options, ...).
+    """
+
+    def __init__(self, symbols, timeframes, start, end, output_dir='.', concurrency=4, connections=1,
+                 currency=None, timeout=120, overwrite=True, format='csv', compression=None,
+                 filename_template=FILENAME_TEMPLATE,
+                 on_job_done=None, client_factory=Client, **client_kwargs):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if connections < 1:
+            raise ValueError("connections must be at least 1")
+        if not overwrite and format_for('', format) != 'csv':
+            raise ValueError(f"overwrite=False appends to existing files, which {format} output does not support")
+
+        self.start = start
+        self.end = end
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.currency = currency
+        self.timeout = timeout
+        self.overwrite = overwrite
+        self.format = format_for('', format)
+        self.compression = compression
+        self.on_job_done = on_job_done
+        self.clients = [client_factory(**client_kwargs) for _ in range(connections)]
+        self.jobs = [
+            DownloadJob(symbol, timeframe, os.path.join(output_dir, filename_template.format(
+                symbol=safe_filename(symbol), timeframe=safe_filename(str(timeframe)),
+                extension=default_extension(format),
+            )))
+            for symbol in dict.fromkeys(symbols)
+            for timeframe in dict.fromkeys(timeframes)
+        ]
+
+        self.started = None
+        self.finished = None
+        self.__lock = threading.RLock()
+        self.__pending = list(reversed(self.jobs))
+        self.__connected = set()
+        self.__threads = []
+        self.__all_done = threading.Event()
+
+        for client in self.clients:
+            client.on_connected(lambda args, client=client: self.__on_connected(client))
+            client.on_disconnected(lambda args, client=client: self.__on_disconnected(client))
+
+    def run(self):
+        """
+        Connects, downloads every job and closes the connections.
+
+        Returns:
+            dict: `summary()` of the run.
+        """
+        self.start_connections()
+        try:
+            self.wait()
+        finally:
+            self.close()
+        return self.summary()
+
+    def start_connections(self):
+        """Connects every client, each on its own thread."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.started = time.monotonic()
+        if not self.jobs:
+            self.__all_done.set()
+        for index, client in enumerate(self.clients):
+            thread = threading.Thread(
+                target=client.create_connection,
+                name=f'pytradingview-bulk-{index}',
+                daemon=True,
+            )
+            self.__threads.append(thread)
+            thread.start()
+
+    def wait(self, timeout=None):
+        """
+        Waits until every job has finished or failed, failing jobs that stall
+        for longer than the downloader's `timeout`.
+
+        Returns:
+            bool: False if `timeout` expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.__all_done.wait(WATCHDOG_INTERVAL if deadline is None
+                                       else max(0, min(WATCHDOG_INTERVAL, deadline - time.monotonic()))):
+            self.check_stalled()
+            if self.__threads and not any(thread.is_alive() for thread in self.__threads):
+                self.__fail_all('connection closed')
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def check_stalled(self):
+        """Fails running jobs that have not received a page within `timeout` seconds."""
+        if self.timeout is None:
+            return
+        now = time.monotonic()
+        with self.__lock:
+            for job in self.jobs:
+                if job.status == RUNNING and now - (job.last_progress or job.started) > self.timeout:
+                    self.__finish(job, f'no data for {self.timeout}s')
+
+    def close(self):
+        """Closes every connection."""
+        self.finished = self.finished or time.monotonic()
+        for client in self.clients:
+            if client.wsapp is not None:
+                client.end()
+        for thread in self.__threads:
+            thread.join(5)
+
+    def summary(self):
+        """
+        Returns:
+            dict: Job counts (`jobs`, `done`, `failed`), total `bars` written,
+            `elapsed` seconds, overall `bars_per_sec`, and `failures` as
+            `(symbol, timeframe, error)` tuples.
+        """
+        end = self.finished or time.monotonic()
+        elapsed = end - self.started if self.started is not None else 0.0
+        bars = sum(job.bars for job in self.jobs)
+        return {
+            'jobs': len(self.jobs),
+            'done': sum(job.status == DONE for job in self.jobs),
+            'failed': sum(job.status == FAILED for job in self.jobs),
+            'bars': bars,
+            'elapsed': elapsed,
+            'bars_per_sec': bars / elapsed if elapsed else 0.0,
+            'failures': [(job.symbol, job.timeframe, job.error) for job in self.jobs if job.status == FAILED],
+        }
+
+    def __on_connected(self, client):
+        with self.__lock:
+            self.__connected.add(client)
+            self.__schedule()
+
+    def __on_disconnected(self, client):
+        with self.__lock:
+            self.__connected.discard(client)
+            for job in self.jobs:
+                if job.status == RUNNING and job.client is client:
+                    self.__finish(job, 'connection closed')
+            if not self.__connected:
+                self.__fail_all('no open connection')
+
+    def __fail_all(self, error):
+        with self.__lock:
+            while self.__pending:
+                self.__finish(self.__pending.pop(), error)
+            for job in self.jobs:
+                if job.status == RUNNING:
+                    self.__finish(job, error)
+
+    def __schedule(self):
+        running = [job for job in self.jobs if job.status == RUNNING]
+        while self.__pending and self.__connected and len(running) < self.concurrency:
+            load = {client: 0 for client in self.__connected}
+            for job in running:
+                if job.client in load:
+                    load[job.client] += 1
+            client = min(load, key=load.get)
+            job = self.__pending.pop()
+            self.__start_job(job, client)
+            running.append(job)
+
+    def __start_job(self, job, client):
+        job.status = RUNNING
+        job.client = client
+        job.started = time.monotonic()
+        if self.overwrite and os.path.exists(job.filename):
+            os.remove(job.filename)
+
+        chart = client.chart_session_class(client.client_bridge)
+        job.chart = chart
+        chart.on_error(lambda args: self.__finish(job, ' '.join(str(part) for part in args[0])))
+        chart.set_up_chart()
+        options = {'timeframe': job.timeframe, 'to': int(self.end.timestamp())}
+        if self.currency:
+            options['currency'] = self.currency
+        chart.set_market(job.symbol, options)
+        chart.download_data(
+            self.start, self.end, job.filename,
+            format=self.format,
+            compression=self.compression,
+            on_progress=job.update,
+            on_complete=lambda progress: self.__finish(job),
+        )
+
+    def __finish(self, job, error=None):
+        with self.__lock:
+            if job.status in (DONE, FAILED):
+                return
+            job.status = FAILED if error else DONE
+            job.error = error
+            job.finished = time.monotonic()
+            if job.chart is not None:
+                job.chart.cancel_download()
+                if job.client in self.__connected:
+                    job.chart.delete()
+                job.chart = None
+
+            if self.on_job_done is not None:
+                self.on_job_done(job)
+
+            self.__schedule()
+            if all(j.status in (DONE, FAILED) for j in self.jobs):
+                self.finished = job.finished
+                self.__all_done.set()
@@ -0,0 +1,368 @@
+"""
+On-disk incremental candle cache.
+
+`CandleCache` keeps downloaded bars per `CacheKey` (symbol, timeframe, currency
+and adjustment) in a directory of immutable segment files plus an `index.json`
+that records:
+
+- `ranges`: the time ranges already fetched (merged, inclusive), including
+  stretches without bars such as weekends;
+- `segments`: the segment files, in write order.
+
+`fetch` asks a `ChartSession` only for the gaps between the cached ranges, adds
+the new pages as segments, and hands the caller the cached and fresh bars merged
+in time order (for duplicate times the newest segment wins).
+
+Writers hold a lock (a thread lock plus `fcntl.flock` where available), write new
+files next to the old ones and swap the index in with `os.replace`. Readers take
+no lock: they load whichever index is current and, if `compact` removed one of
+its segments in the meantime, reload it and retry. `compact` merges a key's
+segments into one file. `stats` reports cache hit rates.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from .candles import CANDLE_COLUMNS, COLUMN_TYPES, CandleBatch, CandleStore
+from .utils import safe_filename
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+
+INDEX_FILE = 'index.json'
+LOCK_FILE = '.lock'
+READ_RETRIES = 3
+
+# Bytes per bar in a segment file: one 8-byte value per column.
+BAR_SIZE = 8 * len(CANDLE_COLUMNS)
+
+
+CacheKey = namedtuple('CacheKey', ('symbol', 'timeframe', 'currency', 'adjustment'), defaults=(None, 'splits'))
+CacheKey.__doc__ = "Identifies one cached series: `CacheKey(symbol, timeframe, currency=None, adjustment='splits')`."
+
+
+def merge_ranges(ranges):
+    """Merges overlapping or adjacent inclusive `(start, end)` ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(ranges, start, end):
+    """Returns the parts of `start..end` not covered by merged `ranges`."""
+    gaps = []
+    cursor = start
+    for low, high in ranges:
+        if high < cursor:
+            continue
+        if low > end:
+            break
+        if low > cursor:
+            gaps.append((cursor, low - 1))
+        cursor = max(cursor, high + 1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if isinstance(value, datetime.datetime) else int(value)
+
+
+class _CacheWriter:
+    """`ChartSession.download_data` writer that stores pages as cache segments."""
+
+    def __init__(self, cache, key, start, end):
+        self.cache = cache
+        self.key = key
+        self.start = start
+        self.end = end
+        self.bars = 0
+        self.newest = None
+        self.spacing = None
+
+    def write(self, batch, first, stop):
+        self.cache.write(self.key, batch, first, stop)
+        self.bars += stop - first
+        times = batch.columns['time']
+        if self.newest is None:
+            self.newest = times[stop - 1]
+            if stop - first > 1:
+                self.spacing = times[stop - 1] - times[stop - 2]
+
+    def close(self):
+        pass
+
+    def commit(self):
+        """Records the gap as fetched, except a bar that may still be forming."""
+        end = min(self.end, int(time.time()))
+        if self.newest is not None and self.spacing and self.newest + self.spacing > time.time():
+            end = min(end, self.newest - 1)
+        if end >= self.start:
+            self.cache.mark(self.key, self.start, end)
+
+
+class CandleCache:
+    """
+    Incremental on-disk cache of downloaded bars.
+
+    Args:
+        root (str): Cache directory; created if missing.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.__lock = threading.RLock()
+        self.__stats = {
+            'requests': 0, 'hits': 0, 'partial': 0, 'misses': 0,
+            'requested_seconds': 0, 'cached_seconds': 0,
+            'bars_read': 0, 'bars_fetched': 0,
+        }
+
+    def key_dir(self, key):
+        """Returns the directory holding one key's index and segments."""
+        key = CacheKey(*key)
+        name = '_'.join(safe_filename(str(part)) for part in (key.timeframe, key.currency or 'default', key.adjustment))
+        return os.path.join(self.root, safe_filename(key.symbol), name)
+
+    def keys(self):
+        """Lists the directories of every cached key."""
+        found = []
+        for directory, _, files in os.walk(self.root):
+            if INDEX_FILE in files:
+                found.append(directory)
+        return found
+
+    def ranges(self, key):
+        """Returns the fetched `[start, end]` time ranges of a key."""
+        return self._load_index(self.key_dir(key))['ranges']
+
+    def missing(self, key, start, end):
+        """Returns the `(start, end)` gaps of `start..end` that are not cached."""
+        return missing_ranges(self.ranges(key), _timestamp(start), _timestamp(end))
+
+    def write(self, key, batch, first=0, stop=None):
+        """Stores bars `first..stop-1` of a `CandleBatch` as a new segment."""
+        stop = len(batch) if stop is None else stop
+        if stop <= first:
+            return
+        directory = self.key_dir(key)
+        with self._locked(directory):
+            index = self._load_index(directory)
+            name = self._write_segment(directory, index, {
+                column: batch.columns[column][first:stop] for column in CANDLE_COLUMNS
+            })
+            times = batch.columns['time']
+            index['segments'].append({'file': name, 'first': times[first], 'last': times[stop - 1], 'bars': stop - first})
+            self._write_index(directory, index)
+
+    def mark(self, key, start, end):
+        """Records `start..end` as fetched."""
+        directory = self.key_dir(key)
+        with self._locked(directory):
+            index = self._load_index(directory)
+            index['ranges'] = merge_ranges(index['ranges'] + [[_timestamp(start), _timestamp(end)]])
+            self._write_index(directory, index)
+
+    def read(self, key, start=None, end=None):
+        """
+        Returns the cached bars between times `start` and `end` as a `CandleBatch`,
+        merged in time order.
+        """
+        start = None if start is None else _timestamp(start)
+        end = None if end is None else _timestamp(end)
+        directory = self.key_dir(key)
+        for attempt in range(READ_RETRIES):
+            index = self._load_index(directory)
+            store = CandleStore()
+            try:
+                for segment in index['segments']:
+                    if (start is None or segment['last'] >= start) and (end is None or segment['first'] <= end):
+                        store.extend_batch(self._read_segment(directory, segment['file']))
+            except FileNotFoundError:
+                # Compacted while we were reading: retry with the new index.
+                if attempt == READ_RETRIES - 1:
+                    raise
+                continue
+            batch = store.batch(start, end)
+            with self.__lock:
+                self.__stats['bars_read'] += len(batch)
+            return batch
+
+    def compact(self, key=None):
+        """
+        Merges the segments of `key` (or of every cached key) into one file.
+
+        Returns:
+            int: Number of segment files removed.
+        """
+        directories = [self.key_dir(key)] if key is not None else self.keys()
+        removed = 0
+        for directory in directories:
+            with self._locked(directory):
+                index = self._load_index(directory)
+                if len(index['segments']) < 2:
+                    continue
+                store = CandleStore()
+                for segment in index['segments']:
+                    store.extend_batch(self._read_segment(directory, segment['file']))
+                old = [segment['file'] for segment in index['segments']]
+                name = self._write_segment(directory, index, {column: store.view(column) for column in CANDLE_COLUMNS})
+                index['segments'] = [{'file': name, 'first': store.first_time, 'last': store.last_time, 'bars': len(store)}]
+                index['ranges'] = merge_ranges(index['ranges'])
+                self._write_index(directory, index)
+                for file in old:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(directory, file))
+                removed += len(old)
+        return removed
+
+    def fetch(self, chart, key, start, end, on_complete, on_progress=None):
+        """
+        Hands `on_complete` the bars between `start` and `end`, fetching only the
+        ranges not cached yet through `chart`.
+
+        The chart session's market is set to the key's symbol and options, then each
+        gap is downloaded with `ChartSession.download_data`, newest first.
+
+        Args:
+            chart (ChartSession): A chart session whose client is connected or connecting.
+            key (CacheKey): The series to fetch.
+            start (datetime or int): Oldest bar time.
+            end (datetime or int): Newest bar time.
+            on_complete (callable): Called with the merged `CandleBatch`.
+            on_progress (callable, optional): Passed to `download_data`.
+        """
+        key = CacheKey(*key)
+        start, end = _timestamp(start), _timestamp(end)
+        gaps = self.missing(key, start, end)
+        self._record_request(start, end, gaps)
+
+        if not gaps:
+            on_complete(self.read(key, start, end))
+            return
+
+        gaps.reverse()
+        options = {'timeframe': key.timeframe, 'adjustment': key.adjustment, 'to': gaps[0][1]}
+        if key.currency:
+            options['currency'] = key.currency
+        chart.set_market(key.symbol, options)
+
+        def next_gap():
+            if not gaps:
+                on_complete(self.read(key, start, end))
+                return
+            gap_start, gap_end = gaps.pop(0)
+            writer = _CacheWriter(self, key, gap_start, gap_end)
+
+            def on_gap_complete(_):
+                writer.commit()
+                with self.__lock:
+                    self.__stats['bars_fetched'] += writer.bars
+                next_gap()
+
+            chart.download_data(
+                datetime.datetime.fromtimestamp(gap_start), datetime.datetime.fromtimestamp(gap_end),
+                writer=writer, on_progress=on_progress, on_complete=on_gap_complete,
+            )
+
+        next_gap()
+
+    def stats(self):
+        """
+        Returns:
+            dict: `requests` passed to `fetch`, split into `hits` (fully cached),
+            `partial` and `misses`; `hit_rate` (hits / requests) and
+            `coverage_rate` (share of requested seconds already cached); and the
+            `bars_read` from and `bars_fetched` into the cache.
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+        stats['hit_rate'] = stats['hits'] / stats['requests'] if stats['requests'] else 0.0
+        stats['coverage_rate'] = (
+            stats['cached_seconds'] / stats['requested_seconds'] if stats['requested_seconds'] else 0.0
+        )
+        return stats
+
+    def _record_request(self, start, end, gaps):
+        requested = end - start + 1
+        missing = sum(high - low + 1 for low, high in gaps)
+        with self.__lock:
+            stats = self.__stats
+            stats['requests'] += 1
+            stats['requested_seconds'] += requested
+            stats['cached_seconds'] += requested - missing
+            if not gaps:
+                stats['hits'] += 1
+            elif missing < requested:
+                stats['partial'] += 1
+            else:
+                stats['misses'] += 1
+
+    @contextlib.contextmanager
+    def _locked(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        with self.__lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(directory, LOCK_FILE), 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _load_index(directory):
+        try:
+            with open(os.path.join(directory, INDEX_FILE)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {'next': 0, 'ranges': [], 'segments': []}
+
+    @staticmethod
+    def _write_index(directory, index):
+        path = os.path.join(directory, INDEX_FILE)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(index, file)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _write_segment(directory, index, columns):
+        name = f"segment-{index['next']:08d}.bin"
+        index['next'] += 1
+        path = os.path.join(directory, name)
+        with open(path + '.tmp', 'wb') as file:
+            for column in CANDLE_COLUMNS:
+                file.write(columns[column])
+        os.replace(path + '.tmp', path)
+        return name
+
+    @staticmethod
+    def _read_segment(directory, name):
+        path = os.path.join(directory, name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        count = len(data) // BAR_SIZE
+        columns = {}
+        for offset, column in enumerate(CANDLE_COLUMNS):
+            values = array(COLUMN_TYPES[column])
+            values.frombytes(data[offset * count * 8:(offset + 1) * count * 8])
+            columns[column] = values
+        return CandleBatch(columns)
@@ -0,0 +1,461 @@
+"""
+Columnar candle storage for chart sessions.
+
+`CandleStore` keeps OHLCV bars in parallel `array` columns (`time` as 64-bit
+integers, prices and volume as doubles) ordered by time:
+
+- Appending a new bar and updating the forming (last) bar are O(1) and write
+  into the existing columns instead of building a dict per update.
+- Range lookups bisect the time column, O(log n).
+- `view` returns `memoryview` slices of the columns, not copies. NumPy can wrap
+  them without copying (`numpy.frombuffer`).
+- With a `capacity`, only the newest `capacity` bars are kept.
+- `CandleBatch` carries one `timescale_update` page as columns, built with a
+  single transpose of the packet's bar arrays, and reads like the list of bar
+  dicts `seriesLoaded` used to deliver.
+- `to_numpy` and `to_dataframe` export columns as NumPy arrays or a pandas
+  DataFrame backed by the same memory. Both libraries are optional and only
+  imported when these methods are called.
+
+Columns are never resized in place: when they fill up, live bars are copied into
+new, larger arrays. Views taken earlier keep the old arrays alive and simply stop
+seeing later updates, so holding a view never blocks ingestion.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+
+CANDLE_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+# Array typecode per column.
+COLUMN_TYPES = {
+    'time': 'q',
+    'open': 'd',
+    'high': 'd',
+    'low': 'd',
+    'close': 'd',
+    'volume': 'd',
+}
+
+MIN_ALLOCATION = 64
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError('to_numpy requires numpy: pip install "pytradingview[numpy]"') from exc
+    return numpy
+
+
+def _import_pandas():
+    try:
+        import pandas
+    except ImportError as exc:
+        raise ImportError('to_dataframe requires pandas: pip install "pytradingview[pandas]"') from exc
+    return pandas
+
+
+def _column(typecode, size):
+    return array(typecode, bytes(size * array(typecode).itemsize))
+
+
+def _as_column(name, values):
+    typecode = COLUMN_TYPES[name]
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    try:
+        return array(typecode, values)
+    except TypeError:
+        # e.g. float times from a non-standard feed
+        return array(typecode, map(int, values) if typecode == 'q' else map(float, values))
+
+
+class CandleBatch(Sequence):
+    """
+    A page of bars stored as columns.
+
+    Indexing or iterating yields bar dicts (`time`, `open`, `close`, `high`, `low`,
+    `volume`), built on access, so existing consumers of `seriesLoaded` lists keep
+    working; columnar consumers use `columns` / `view` and never build them.
+
+    Args:
+        columns (dict): Column name -> `array`, as in `CANDLE_COLUMNS`.
+        missing_volume (frozenset): Indexes of bars sent without a volume; their
+            `volume` reads as None and is stored as 0.
+    """
+
+    __slots__ = ('columns', 'missing_volume')
+
+    def __init__(self, columns, missing_volume=frozenset()):
+        self.columns = columns
+        self.missing_volume = missing_volume
+
+    @classmethod
+    def from_periods(cls, periods):
+        """
+        Builds a batch from the `$prices.s` entries of a `timescale_update` packet,
+        transposing their `v` arrays in one pass.
+        """
+        values = [period['v'] for period in periods]
+        transposed = list(zip(*values))
+        missing_volume = frozenset()
+        if len(transposed) < 6:
+            # zip stops at the shortest bar: at least one bar has no volume.
+            missing_volume = frozenset(index for index, v in enumerate(values) if len(v) < 6)
+            transposed = transposed[:5] + [[v[5] if len(v) > 5 else 0.0 for v in values]]
+        return cls(
+            {name: _as_column(name, column) for name, column in zip(CANDLE_COLUMNS, transposed)},
+            missing_volume,
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds a batch from bar dicts (`time`, `open`, `high`, `low`, `close`, `volume`), in any order."""
+        rows = sorted(rows, key=lambda row: row['time'])
+        missing_volume = frozenset(index for index, row in enumerate(rows) if row.get('volume') is None)
+        return cls(
+            {
+                name: _as_column(name, [
+                    0.0 if name == 'volume' and index in missing_volume else row[name]
+                    for index, row in enumerate(rows)
+                ])
+                for name in CANDLE_COLUMNS
+            },
+            missing_volume,
+        )
+
+    def __len__(self):
+        return len(self.columns['time'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        columns = self.columns
+        if index < 0:
+            index += len(self)
+        volume = None if index in self.missing_volume else round(columns['volume'][index] * 100) / 100
+        return {
+            'time': columns['time'][index],
+            'open': columns['open'][index],
+            'close': columns['close'][index],
+            'high': columns['high'][index],
+            'low': columns['low'][index],
+            'volume': volume,
+        }
+
+    def __eq__(self, other):
+        if isinstance(other, CandleBatch):
+            return self.columns == other.columns and self.missing_volume == other.missing_volume
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f'CandleBatch({len(self)} bars)'
+
+    @property
+    def first_time(self):
+        """Time of the first bar, or None when empty."""
+        times = self.columns['time']
+        return times[0] if times else None
+
+    @property
+    def last_time(self):
+        """Time of the last bar, or None when empty."""
+        times = self.columns['time']
+        return times[-1] if times else None
+
+    def view(self, column):
+        """Returns a read-only `memoryview` of one column."""
+        return memoryview(self.columns[column]).toreadonly()
+
+    def to_numpy(self, columns=CANDLE_COLUMNS):
+        """Returns the batch columns as read-only NumPy arrays, without copying."""
+        numpy = _import_numpy()
+        return {name: numpy.asarray(self.view(name)) for name in columns}
+
+
+class CandleStore:
+    """
+    Time-ordered OHLCV columns with optional ring capacity.
+
+    Args:
+        capacity (int, optional): Maximum number of bars kept; the oldest bars are
+            dropped first. Unbounded when None.
+    """
+
+    def __init__(self, capacity=None):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        """Removes every bar."""
+        self._allocated = MIN_ALLOCATION if self.capacity is None else min(MIN_ALLOCATION, self.capacity)
+        self._columns = {name: _column(COLUMN_TYPES[name], self._allocated) for name in CANDLE_COLUMNS}
+        self._times = self._columns['time']
+        self._head = 0
+        self._tail = 0
+        self._last_updated = None
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def __bool__(self):
+        return self._tail > self._head
+
+    def __getitem__(self, index):
+        """Returns bar `index` (oldest first, negative indexes allowed) as a dict."""
+        size = self._tail - self._head
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("candle index out of range")
+        return self._row(self._head + index)
+
+    def __iter__(self):
+        for position in range(self._head, self._tail):
+            yield self._row(position)
+
+    def _row(self, position):
+        columns = self._columns
+        return {
+            'time': columns['time'][position],
+            'open': columns['open'][position],
+            'close': columns['close'][position],
+            'high': columns['high'][position],
+            'low': columns['low'][position],
+            'volume': round(columns['volume'][position] * 100) / 100,
+        }
+
+    @property
+    def first_time(self):
+        """Time of the oldest bar, or None when empty."""
+        return self._times[self._head] if self._tail > self._head else None
+
+    @property
+    def last_time(self):
+        """Time of the newest bar, or None when empty."""
+        return self._times[self._tail - 1] if self._tail > self._head else None
+
+    def last(self):
+        """
+        Returns the most recently written bar as a dict, or an empty dict.
+
+        This is normally the forming bar.
+        """
+        if self._last_updated is None:
+            return {}
+        position = self._position(self._last_updated)
+        return {} if position is None else self._row(position)
+
+    def upsert(self, time, open, high, low, close, volume=0.0):
+        """
+        Writes one bar. A bar with the time of an existing bar (usually the forming
+        one) is updated in place; a newer bar is appended.
+        """
+        time = int(time)
+        tail = self._tail
+        appended = False
+        if tail > self._head and time <= self._times[tail - 1]:
+            position = tail - 1 if time == self._times[tail - 1] else self._position(time)
+            if position is None:
+                self._merge([(time, open, high, low, close, volume)])
+                self._last_updated = time
+                return
+        else:
+            if tail == self._allocated:
+                self._reallocate(1)
+                tail = self._tail
+            position = tail
+            appended = True
+
+        # Every column is written before the bar is counted, so a value the
+        # columns reject leaves no half-written bar behind.
+        columns = self._columns
+        columns['time'][position] = time
+        columns['open'][position] = open
+        columns['high'][position] = high
+        columns['low'][position] = low
+        columns['close'][position] = close
+        columns['volume'][position] = volume
+        if appended:
+            self._tail = tail + 1
+        self._last_updated = time
+        self._trim()
+
+    def extend(self, bars):
+        """
+        Writes many bars, each a `(time, open, high, low, close, volume)` sequence.
+
+        Bars may arrive in any order, e.g. an older history page; bars whose time
+        is already stored replace the stored values.
+        """
+        bars = sorted(bars, key=lambda bar: bar[0])
+        if not bars:
+            return
+        if self._tail == self._head or bars[0][0] > self._times[self._tail - 1]:
+            self._append_sorted(bars)
+        else:
+            self._merge(bars)
+
+    def extend_columns(self, times, opens, highs, lows, closes, volumes):
+        """
+        Same as `extend`, but takes one sequence per column, in ascending time order.
+        """
+        if not times:
+            return
+        if self._tail > self._head and times[0] <= self._times[self._tail - 1]:
+            self._merge(zip(times, opens, highs, lows, closes, volumes))
+            return
+
+        count = len(times)
+        if self._tail + count > self._allocated:
+            self._reallocate(count)
+        start, end = self._tail, self._tail + count
+        for name, values in zip(CANDLE_COLUMNS, (times, opens, highs, lows, closes, volumes)):
+            self._columns[name][start:end] = _as_column(name, values)
+        self._tail = end
+        self._last_updated = times[-1]
+        self._trim()
+
+    def extend_batch(self, batch):
+        """Writes a `CandleBatch` (bars in ascending time order)."""
+        self.extend_columns(*(batch.columns[name] for name in CANDLE_COLUMNS))
+
+    def _append_sorted(self, bars):
+        self.extend_columns(*(list(column) for column in zip(*bars)))
+
+    def _merge(self, bars):
+        merged = {}
+        columns = self._columns
+        for position in range(self._head, self._tail):
+            merged[columns['time'][position]] = tuple(columns[name][position] for name in CANDLE_COLUMNS)
+        for bar in bars:
+            merged[bar[0]] = tuple(bar)
+
+        ordered = [merged[time] for time in sorted(merged)]
+        last_updated = self._last_updated
+        self._allocated = max(MIN_ALLOCATION, 2 * len(ordered))
+        self._columns = {name: _column(COLUMN_TYPES[name], self._allocated) for name in CANDLE_COLUMNS}
+        self._times = self._columns['time']
+        self._head = self._tail = 0
+        self._append_sorted(ordered)
+        self._last_updated = last_updated
+
+    def _position(self, time):
+        position = bisect_left(self._times, time, self._head, self._tail)
+        if position < self._tail and self._times[position] == time:
+            return position
+        return None
+
+    def _trim(self):
+        if self.capacity is not None and self._tail - self._head > self.capacity:
+            self._head = self._tail - self.capacity
+
+    def _reallocate(self, extra):
+        # Copy the live bars into new arrays; views of the old ones stay valid.
+        size = self._tail - self._head
+        needed = size + extra
+        allocated = max(MIN_ALLOCATION, 2 * needed)
+        if self.capacity is not None:
+            allocated = min(allocated, max(2 * self.capacity, needed))
+
+        columns = {}
+        for name in CANDLE_COLUMNS:
+            column = _column(COLUMN_TYPES[name], allocated)
+            column[:size] = self._columns[name][self._head:self._tail]
+            columns[name] = column
+        self._columns = columns
+        self._times = columns['time']
+        self._allocated = allocated
+        self._head = 0
+        self._tail = size
+
+    def index_range(self, start=None, end=None):
+        """
+        Returns the `(first, stop)` bar indexes covering times `start..end`
+        (inclusive, either bound optional), found by bisection.
+        """
+        lo = self._head if start is None else bisect_left(self._times, start, self._head, self._tail)
+        hi = self._tail if end is None else bisect_right(self._times, end, self._head, self._tail)
+        return lo - self._head, max(lo, hi) - self._head
+
+    def view(self, column, start=None, end=None):
+        """
+        Returns a read-only `memoryview` of one column for times `start..end`.
+
+        The view shares memory with the store: in-place updates of the forming bar
+        show through it until the columns are next reallocated.
+        """
+        if column not in self._columns:
+            raise KeyError(f"unknown candle column {column!r}; expected one of {CANDLE_COLUMNS}")
+        first, stop = self.index_range(start, end)
+        return memoryview(self._columns[column])[self._head + first:self._head + stop].toreadonly()
+
+    def columns(self, names=CANDLE_COLUMNS, start=None, end=None):
+        """Returns a dict of `view`s for the given column names."""
+        return {name: self.view(name, start, end) for name in names}
+
+    def batch(self, start=None, end=None):
+        """Returns a copy of the bars between times `start` and `end` as a `CandleBatch`."""
+        columns = {}
+        for name, view in self.columns(CANDLE_COLUMNS, start, end).items():
+            column = array(COLUMN_TYPES[name])
+            column.frombytes(view.tobytes())
+            columns[name] = column
+        return CandleBatch(columns)
+
+    def rows(self, start=None, end=None):
+        """Returns the bars between times `start` and `end` as dicts, oldest first."""
+        first, stop = self.index_range(start, end)
+        return [self._row(self._head + index) for index in range(first, stop)]
+
+    def nbytes(self):
+        """Bytes allocated by the columns."""
+        return sum(column.itemsize * len(column) for column in self._columns.values())
+
+    def to_numpy(self, columns=CANDLE_COLUMNS, start=None, end=None):
+        """
+        Returns the bars between times `start` and `end` as NumPy arrays.
+
+        The arrays are read-only views over the store's columns (no copy); use
+        `.copy()` to keep values that must not follow forming-bar updates.
+
+        Args:
+            columns (iterable): Column names, a subset of `CANDLE_COLUMNS`.
+            start (int, optional): First bar time, in seconds.
+            end (int, optional): Last bar time (inclusive), in seconds.
+
+        Returns:
+            dict: Column name -> `numpy.ndarray` (`int64` time, `float64` otherwise).
+        """
+        numpy = _import_numpy()
+        return {name: numpy.asarray(view) for name, view in self.columns(columns, start, end).items()}
+
+    def to_dataframe(self, columns=('open', 'high', 'low', 'close', 'volume'), start=None, end=None):
+        """
+        Returns the bars between times `start` and `end` as a pandas DataFrame
+        indexed by UTC bar time.
+
+        Value columns are built on the same read-only arrays as `to_numpy`
+        without copying; only the datetime index is newly allocated.
+
+        Args:
+            columns (iterable): Value columns to include.
+            start (int, optional): First bar time, in seconds.
+            end (int, optional): Last bar time (inclusive), in seconds.
+
+        Returns:
+            pandas.DataFrame
+        """
+        pandas = _import_pandas()
+        columns = [name for name in columns if name != 'time']
+        arrays = self.to_numpy(['time', *columns], start, end)
+        index = pandas.to_datetime(arrays.pop('time'), unit='s', utc=True)
+        index.name = 'time'
+        return pandas.DataFrame(arrays, index=index, columns=columns, copy=False)
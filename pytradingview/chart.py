@@ -2,8 +2,16 @@ import csv
 import datetime
 import json
 import os
+import threading
 import requests
+from .candles import CANDLE_COLUMNS, CandleBatch, CandleStore
+from .conflate import Conflator, merge_changes
+from .download import MIN_PAGE_SIZE, HistoryDownload
+from .events import EventBus
+from .resample import Resampler
+from .series import ChartSeries, symbol_init
 from .utils import genSessionID, strip_html_tags
+from .writers import CSV_FIELDS, format_for, open_writer
 
 
 chart_types = {
@@ -15,6 +23,19 @@ chart_types = {
   'Range': 'BarSetRange@tv-basicstudies-72!',
 }
 
+chart_events = (
+  'seriesLoaded', 'symbolLoaded', 'update',
+  'replayLoaded', 'replayPoint', 'replayResolution', 'replayEnd',
+  'event', 'error',
+)
+
+# Packet types handled by `ChartSession.on_data_r`; the client drops any other
+# type addressed to the replay session before decoding it.
+replay_packet_types = frozenset({
+  'replay_ok', 'replay_instance_id', 'replay_point',
+  'replay_resolutions', 'replay_data_end', 'critical_error',
+})
+
 
 class ChartSession:
     """
@@ -23,11 +44,16 @@ class ChartSession:
     Attributes:
         chart_session (dict): A dictionary containing session ID, study listeners, indexes, and a send function.
         current_series (int): Tracks the current series index.
+        candles (CandleStore): Columnar OHLCV history, optionally capped at `history_capacity` bars.
         series_created (bool): Indicates whether a series has been created.
-        callbacks (dict): A dictionary of event callbacks for handling various events like updates, errors, and replay events.
+        events (EventBus): Per-instance event callbacks for updates, errors, and replay events.
+        conflator (Conflator): Merges 'update' events per series when the session was
+            created with `conflate`, else None.
+        lock (RLock): Held while a packet is handled and while conflated 'update'
+            events are delivered, which happens on the conflator's timer thread.
     Methods:
-        get_periods: Returns the current period data.
-        get_all_periods: Returns all periods sorted in reverse order.
+        get_periods: Returns the current (most recently updated) bar.
+        get_all_periods: Returns all bars as `(time, bar)` tuples, newest first.
         get_infos: Returns information about the current symbol.
         handleEvent(event, *args): Executes all callbacks associated with a specific event.
         handleError(*args): Handles errors by either printing them or invoking error callbacks.
@@ -38,6 +64,11 @@ class ChartSession:
         set_series(timeframe='240', range=100, reference=None): Configures the series for the chart session.
         set_market(symbol, options={}): Sets the market symbol and options for the chart session.
         fetchMore(number=1): Requests more data for the chart session.
+        to_numpy(columns, start, end): Returns the history as NumPy array views.
+        to_dataframe(columns, start, end): Returns the history as a pandas DataFrame.
+        resample(timeframe, ...): Returns a `Resampler` aggregating this series into a higher timeframe.
+        add_series(symbol, options): Adds another series to the session and returns its `ChartSeries`.
+        remove_series(series): Removes a series added with `add_series`.
         on_symbol_loaded(cb): Registers a callback for the 'symbolLoaded' event.
         on_update(cb): Registers a callback for the 'update' event.
         on_replay_loaded(cb): Registers a callback for the 'replayLoaded' event.
@@ -45,17 +76,28 @@ class ChartSession:
         on_replay_end(cb): Registers a callback for the 'replayEnd' event.
         on_replay_point(cb): Registers a callback for the 'replayPoint' event.
         on_error(cb): Registers a callback for the 'error' event.
+            Every on_* method returns a `Subscription` handle whose `cancel()` removes the callback.
+        download_data(start, end, filename, ...): Streams a historical range to a file or writer.
+        cancel_download(): Stops a running download.
         delete(): Deletes the chart and replay sessions and cleans up resources.
     """
 
-    def __init__(self, client_bridge):
+    def __init__(self, client_bridge, history_capacity=None, conflate=None, conflate_max_batch=None):
+        """
+        Args:
+            client_bridge (dict): The client's `sessions`/`send`/`end` bridge.
+            history_capacity (int, optional): Maximum number of bars kept in `candles`.
+            conflate (float, optional): Seconds to merge 'update' events per series
+                (main and extra ones) into one; every `du` packet emits when None.
+                Candles are updated on every packet either way.
+            conflate_max_batch (int, optional): Emit the merged updates early once
+                this many series are pending.
+        """
         self.__chart_session_id = genSessionID('cs')
         self.__replay_session_id = genSessionID('rs')
         self.__replay_mode = False
-        self.__periods = {}
-        self.__current_period = {}
+        self.candles = CandleStore(history_capacity)
         self.__infos = {}
-        self.collected_data = [] # List to store collected data
 
         self.__replaya_OKCB = {}
         self.__client = client_bridge
@@ -73,52 +115,62 @@ class ChartSession:
         self.current_series = 0
         self.series_created = False
 
+        self.events = EventBus(chart_events)
+        self.lock = threading.RLock()
+        self.conflator = (
+            Conflator(self.__deliver, conflate, conflate_max_batch, merge_changes, lock=self.lock) if conflate else None
+        )
+        self.__series = {}
+        # Extra series by series id and by symbol id, for routing packets.
+        self.series = {}
+        self.__series_symbols = {}
+        self.__series_count = 0
+        self.__download = None
+        self.__download_subscription = None
+
     @property
     def get_periods(self):
-        # return sorted(self.__periods.items(), reverse=True)
-        return self.__current_period
+        return self.candles.last()
 
     @property
     def get_all_periods(self):
-        return sorted(self.__periods.items(), reverse=True)
+        return [(row['time'], row) for row in reversed(self.candles.rows())]
 
     @property
     def get_infos(self):
         return self.__infos
 
-    
-    callbacks = {
-        'seriesLoaded': [],
-        'symbolLoaded': [],
-        'update': [],
-
-        'replayLoaded': [],
-        'replayPoint': [],
-        'replayResolution': [],
-        'replayEnd': [],
+    @property
+    def timeframe(self):
+        """The main series' timeframe, or None before `set_series`."""
+        return self.__series.get('timeframe')
 
-        'event': [],
-        'error': [],
-    }
 
     def handleEvent(self,event, *args):
-        for fun in self.callbacks[event]:
-            fun(args)
-        for fun in self.callbacks['event']:
-            fun(event, args)
+        self.events.emit(event, args)
+        self.events.emit('event', event, args)
 
     def handleError(self,*args):
-        if len(self.callbacks['error']) == 0:
+        if not self.events.has_listeners('error'):
             print('\033[31m ERROR:\033[0m', args)
         else:
             self.handleEvent('error', args)
     
     def on_data_c(self, packet):
+        with self.lock:
+            self.__on_data_c(packet)
+
+    def __on_data_c(self, packet):
         if isinstance(packet['data'][1], str) and self.study_listeners.get(packet['data'][1]):
             self.study_listeners[packet['data'][1]](packet)
             return
 
         if packet['type'] == 'symbol_resolved':
+            series = self.__series_symbols.get(packet['data'][1])
+            if series is not None:
+                series.handle_symbol_resolved(packet['data'][2])
+                return
+
             self.__infos = {
             'series_id': packet['data'][1],
             **packet['data'][2]
@@ -128,69 +180,79 @@ class ChartSession:
             return
 
         if packet['type'] == 'timescale_update': # historical data loaded
-            periods = packet['data'][1]['$prices']['s']
+            for key, value in packet['data'][1].items():
+                if key != '$prices':
+                    series = self.series.get(key)
+                    if series is not None:
+                        series.handle_history(value.get('s'))
+                    continue
 
-            if not periods:
-                return
-            
-            candles = []
-            for p in periods:
-                c = {
-                    'time': p['v'][0],
-                    'open': p['v'][1],
-                    'close': p['v'][4],
-                    'high': p['v'][2],
-                    'low': p['v'][3],
-                    'volume': round(p['v'][5] * 100) / 100 if len(p['v']) > 5 else None,
-                }
-                candles.append(c)
-            self.handleEvent('seriesLoaded', candles)
+                periods = value['s']
+
+                if not periods:
+                    continue
+
+                batch = CandleBatch.from_periods(periods)
+                if self.__download is None:
+                    self.candles.extend_batch(batch)
+                self.handleEvent('seriesLoaded', batch)
+            return
 
         if packet['type'] == 'du': # current candle update
             changes = []
 
-            keys = packet['data'][1].keys()
+            for k, value in packet['data'][1].items():
+                series = self.series.get(k)
+                if series is not None:
+                    series.handle_update(value.get('s'))
+                    continue
 
-            for k in keys:
                 changes.append(k)
                 if k == '$prices':
-                    periods = packet['data'][1]['$prices']['s']
+                    periods = value['s']
 
                     if not periods:
                         return
 
                     for p in periods:
-                        self.chart_session['indexes'][p['i']] = p['v']
-                        self.__periods[p['v'][0]] = {
-                            'time': p['v'][0],
-                            'open': p['v'][1],
-                            'close': p['v'][4],
-                            'high': p['v'][2],
-                            'low': p['v'][3],
-                            'volume': round(p['v'][5] * 100) / 100 if len(p['v']) > 5 else 0,
-                        }
-
-                        self.__current_period = {
-                            'time': p['v'][0],
-                            'open': p['v'][1],
-                            'close': p['v'][4],
-                            'high': p['v'][2],
-                            'low': p['v'][3],
-                            'volume': round(p['v'][5] * 100) / 100 if len(p['v']) > 5 else 0,
-                        }
+                        v = p['v']
+                        self.chart_session['indexes'][p['i']] = v
+                        self.candles.upsert(v[0], v[1], v[2], v[3], v[4], v[5] if len(v) > 5 else 0.0)
 
                     continue
-                if (self.study_listeners[k]): self.study_listeners[k](packet)
+                if self.study_listeners.get(k): self.study_listeners[k](packet)
 
-            self.handleEvent('update', changes)
+            if not changes:
+                return
+            if self.conflator is None:
+                self.handleEvent('update', changes)
+            else:
+                self.conflator.push(None, changes)
             return
 
         ## Error handling
+        if packet['type'] in ('symbol_error', 'series_error'):
+            series = self.__series_symbols.get(packet['data'][1]) or self.series.get(packet['data'][1])
+            if series is not None:
+                series.handleError(f"({series.symbol}) {'Symbol' if packet['type'] == 'symbol_error' else 'Series'} error:", *packet['data'][2:])
+                return
+
         if packet['type'] == 'symbol_error':
             self.handleError(f"({packet['data'][1]}) Symbol error:", packet['data'][2])
             return
 
         if packet['type'] == 'series_error':
+            if self.__download is not None and not self.__download.pages and self.__series.get('reference'):
+                # The server refused the anchored range: page back from the newest bar instead.
+                timeframe, range = self.__series['timeframe'], self.__series['range']
+                if self.__series['created']:
+                    # create_series was refused, so there is still no series to modify.
+                    self.series_created = False
+                    self.set_series(timeframe, range)
+                else:
+                    # A bare modify_series ('' range) would keep the refused anchor.
+                    self.__send_series(timeframe, range, None, range)
+                return
             self.handleError('Series error:', packet['data'][3])
             return
 
@@ -198,6 +260,15 @@ class ChartSession:
             _, name, description = packet['data']
             self.handleError('Critical error:', name, description)
 
+    def __deliver(self, series_id, changes):
+        """Emits a conflated 'update' on the main series (None) or an extra series."""
+        if series_id is None:
+            self.handleEvent('update', changes)
+            return
+        series = self.series.get(series_id)
+        if series is not None:
+            series.handleEvent('update', changes)
+
     def on_data_r(self, packet):
         if (packet['type'] == 'replay_ok'):
           if (self.__replaya_OKCB[packet['data'][1]]):
@@ -227,7 +298,11 @@ class ChartSession:
 
     def set_up_chart(self):
         self.__client['sessions'][self.__chart_session_id] = {'type':'chart', 'onData': self.on_data_c}
-        self.__client['sessions'][self.__replay_session_id] = {'type':'replay', 'onData': self.on_data_r}
+        self.__client['sessions'][self.__replay_session_id] = {
+            'type': 'replay',
+            'onData': self.on_data_r,
+            'types': replay_packet_types,
+        }
         self.__client['send']('chart_create_session', [self.__chart_session_id])
     
     def set_timezone(self, timezone:str="Etc/UTC"):
@@ -241,7 +316,11 @@ class ChartSession:
 
         calcRange = range if not reference else ['bar_count', reference, range]
 
+        self.__send_series(timeframe, range, reference, '' if self.series_created and not reference else calcRange)
+
+    def __send_series(self, timeframe, range, reference, series_range):
         self.periods = {}
+        self.__series = {'timeframe': timeframe, 'range': range, 'reference': reference, 'created': not self.series_created}
 
         self.__client['send'](f"{'modify' if self.series_created else 'create'}_series", [ # create_series or modify_series
         self.__chart_session_id,
@@ -249,24 +328,19 @@ class ChartSession:
         's1',
         f'ser_{self.current_series}',
         timeframe,
-        '' if self.series_created else calcRange,
+        series_range,
         ])
         self.series_created = True
 
     def set_market(self, symbol, options:dict = {}):
         self.periods = {}
+        self.candles.clear()
 
         if (self.__replay_mode):
             self.__replay_mode = False
             self.__client['send']('replay_delete_session', [self.__replay_session_id])
 
-        symbolInit = {
-        'symbol': symbol or 'BTCEUR',
-        'adjustment': options.get('adjustment') or 'splits',
-        }
-
-        if options.get('session'): symbolInit['session'] = options.get('session')
-        if options.get('currency'): symbolInit['currency-id'] = options.get('currency')
+        symbolInit = symbol_init(symbol, options)
 
         if options.get('replay'):
             self.__replay_mode = True
@@ -304,61 +378,186 @@ class ChartSession:
 
         self.set_series(options.get('timeframe'), options.get('range') or 100, options.get('to'))
 
-    def fetch_more(self, number = 100):
-        self.__client['send']('request_more_data', [self.__chart_session_id, '$prices', number])
+    def add_series(self, symbol, options:dict = {}, history_capacity=None):
+        """
+        Adds another price series to this chart session, next to the main one.
+        Packets for it are routed to the returned `ChartSeries` by series id.
+        Args:
+            symbol (str): Market symbol, e.g. 'BINANCE:BTCEUR'.
+            options (dict, optional): timeframe, range, to, currency, session and adjustment,
+                as for `set_market`.
+            history_capacity (int, optional): Maximum number of bars kept for the series.
+        Returns:
+            ChartSeries
+        """
+        self.__series_count += 1
+        series = ChartSeries(
+            self.__chart_session_id, self.__client['send'],
+            f'sds_{self.__series_count}', f'sds_sym_{self.__series_count}',
+            symbol, options, history_capacity,
+        )
+        series.conflator = self.conflator
+        self.series[series.id] = series
+        self.__series_symbols[series.symbol_id] = series
+        series.create()
+        return series
+
+    def remove_series(self, series):
+        """Removes a series added with `add_series` from the chart session."""
+        if self.series.pop(series.id, None) is None:
+            return
+        self.__series_symbols.pop(series.symbol_id, None)
+        self.__client['send']('remove_series', [self.__chart_session_id, series.id])
 
-    def save_batch(self, batch:list, filename):
-        try:
-            file_exists = os.path.isfile(filename)
+    def to_numpy(self, columns=CANDLE_COLUMNS, start=None, end=None):
+        """
+        Returns the chart history as NumPy arrays without copying it.
+        Requires numpy; see `CandleStore.to_numpy`.
+        Args:
+            columns (iterable, optional): Columns to return. Defaults to all of them.
+            start (int, optional): First bar time, in seconds since epoch.
+            end (int, optional): Last bar time (inclusive), in seconds since epoch.
+        Returns:
+            dict: Column name -> read-only `numpy.ndarray`.
+        """
+        return self.candles.to_numpy(columns, start, end)
+
+    def to_dataframe(self, columns=('open', 'high', 'low', 'close', 'volume'), start=None, end=None):
+        """
+        Returns the chart history as a pandas DataFrame indexed by UTC bar time.
+        Requires pandas; see `CandleStore.to_dataframe`.
+        Args:
+            columns (iterable, optional): Value columns to include.
+            start (int, optional): First bar time, in seconds since epoch.
+            end (int, optional): Last bar time (inclusive), in seconds since epoch.
+        Returns:
+            pandas.DataFrame
+        """
+        return self.candles.to_dataframe(columns, start, end)
 
-            with open(filename, mode='a', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=["time", "open", "high", "low", "close", "volume"])
+    def resample(self, timeframe, timezone=None, session=None, history_capacity=None):
+        """
+        Returns a `Resampler` that aggregates this series into a higher timeframe
+        locally, without opening another series on the server.
+        Args:
+            timeframe (str): Target timeframe, a multiple of this series' timeframe.
+            timezone (str, optional): Time zone of the bar boundaries. Defaults to the symbol's.
+            session (str, optional): Trading session, e.g. '0930-1600'. Defaults to the symbol's.
+            history_capacity (int, optional): Maximum number of resampled bars kept.
+        Returns:
+            Resampler
+        """
+        return Resampler(timeframe, self, timezone, session, history_capacity)
 
-                if not file_exists:
-                    writer.writeheader()  # Write header only once
+    def fetch_more(self, number = 100):
+        self.__client['send']('request_more_data', [self.__chart_session_id, '$prices', number])
 
-                for row in batch:
-                    writer.writerow(row)
+    def save_batch(self, batch, filename, format=None, compression=None):
+        """
+        Writes bars to `filename` in the format given by `format` or the file extension.
+        CSV files are appended to, one row per bar in the order given, with the values
+        as they are. A binary format ('parquet', 'arrow', 'npz') holds one batch per
+        file, newest bar first, and cannot be appended to: stream many pages into one
+        file with `download_data` or a writer from `pytradingview.writers` instead.
+        Args:
+            batch (list or CandleBatch): Bar dicts or a `CandleBatch`.
+            filename (str): The output file.
+            format (str, optional): Output format name: 'csv', 'parquet', 'arrow' or 'npz'.
+            compression (str, optional): Compression codec for binary formats.
+        Raises:
+            FileExistsError: When `filename` exists and the format is binary.
+        """
+        binary = format_for(filename, format) != 'csv'
+        if binary and os.path.exists(filename):
+            raise FileExistsError(f"{filename} exists and {format_for(filename, format)} files cannot be appended to")
+        try:
+            if binary:
+                if not isinstance(batch, CandleBatch):
+                    batch = CandleBatch.from_rows(batch)
+                writer = open_writer(filename, format, compression)
+                writer.write(batch, 0, len(batch))
+                writer.close()
+            else:
+                if compression:
+                    raise ValueError("CSV output does not support compression")
+                if isinstance(batch, CandleBatch):
+                    columns = batch.columns
+                    batch = [
+                        {
+                            name: None if name == 'volume' and index in batch.missing_volume else columns[name][index]
+                            for name in CSV_FIELDS
+                        }
+                        for index in range(len(batch))
+                    ]
+                file_exists = os.path.isfile(filename)
+                with open(filename, mode='a', newline='') as file:
+                    writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+                    if not file_exists:
+                        writer.writeheader()  # Write header only once
+                    writer.writerows(batch)
 
             print(f"Saved batch of {len(batch)} candles to {filename}")
         except Exception as e:
             print(f"Error saving batch: {e}")
 
-    def download_data(self, start:datetime.datetime, end:datetime.datetime, filename):
+    def download_data(self, start:datetime.datetime, end:datetime.datetime, filename=None, on_progress=None, anchor=True, on_complete=None, writer=None, format=None, compression=None):
         """
-        Downloads historical data for the specified time range and saves it to a CSV file.
+        Downloads historical data for the specified time range and streams it to a file.
+        Pages are requested with growing sizes and written newest first as they arrive, so
+        memory use does not depend on the length of the range. While downloading, history
+        pages are not added to `candles`.
+        With `anchor`, the series is anchored at `end` (the `to` market option / `set_series`
+        reference), so paging starts there instead of at the newest bar. If the market was
+        set without that anchor the series is modified to add it; if the server refuses it,
+        the download falls back to paging back from the newest bar.
         Args:
-            start (int): The start time in milliseconds since epoch.
-            end (int): The end time in milliseconds since epoch.
-            filename (str): The name of the CSV file to save the data.
+            start (datetime): The oldest bar time to download.
+            end (datetime): The newest bar time to download.
+            filename (str): The file to save the data to. The format (CSV, Parquet, Arrow IPC or
+                NPZ) follows the extension unless `format` is given; see `pytradingview.writers`.
+            on_progress (callable, optional): Called with a progress dict (`bars`, `bars_per_sec`,
+                `eta`, ...) after each page. Progress is printed when omitted.
+            anchor (bool, optional): Anchor the series at `end`. Defaults to True.
+            on_complete (callable, optional): Called with the final progress dict when the range
+                is downloaded. When omitted, the client connection is closed instead.
+            writer (optional): Receives the pages instead of a file; an object with
+                `write(batch, first, stop)` and `close()` methods, as `CsvCandleWriter`.
+            format (str, optional): Output format name: 'csv', 'parquet', 'arrow' or 'npz'.
+            compression (str, optional): Compression codec for binary formats.
         """
 
-        batch_size = 100
-
-        self.collected_data = []
-
         # convert to Unix timestamps (seconds)
         start_ts = int(start.timestamp())
         end_ts = int(end.timestamp())
 
+        self.cancel_download()
+        writer = writer if writer is not None else open_writer(filename, format, compression)
+        download = HistoryDownload(start_ts, end_ts, writer, self.fetch_more, on_progress)
+
         def on_batch_loaded(args):
-            # Filter data within range
-            data = args[0]
-            filtered = [c for c in data if start_ts <= c["time"] <= end_ts]
-            self.collected_data.extend(filtered)
-
-            # Check if we've reached or passed the start timestamp
-            oldest_ts = min(c["time"] for c in data)
-            if oldest_ts <= start_ts:
-                sorted_data = sorted(self.collected_data, key=lambda x: x['time'], reverse=True)
-                self.save_batch(sorted_data, filename)
-                self.__client['end'](lambda: None) # close the connection
-                print("✅ Finished downloading requested range.")
+            if not download.on_page(args[0]):
+                return
+            self.cancel_download()
+            if on_complete is not None:
+                on_complete(download.progress())
                 return
-             
-            self.fetch_more(batch_size)
+            self.__client['end'](lambda: None) # close the connection
+            print("✅ Finished downloading requested range.")
+
+        self.__download = download
+        self.__download_subscription = self.on_series_loaded(on_batch_loaded)
+
+        if anchor and self.series_created and self.__series.get('reference') != end_ts:
+            self.set_series(self.__series['timeframe'], MIN_PAGE_SIZE, end_ts)
 
-        self.on_series_loaded(on_batch_loaded)
+    def cancel_download(self):
+        """Stops a running `download_data`, keeping the rows already written."""
+        if self.__download_subscription is not None:
+            self.__download_subscription.cancel()
+            self.__download_subscription = None
+        if self.__download is not None:
+            self.__download.writer.close()
+            self.__download = None
 
     def search_symbols(self, query: str, max_results=200, country="US", lang="en") -> list:
         """
@@ -424,31 +623,36 @@ class ChartSession:
 
 
     def on_series_loaded(self, cb):
-        self.callbacks['seriesLoaded'].append(cb)
+        return self.events.on('seriesLoaded', cb)
 
     def on_symbol_loaded(self, cb):
-        self.callbacks['symbolLoaded'].append(cb)
+        return self.events.on('symbolLoaded', cb)
 
     def on_update(self, cb):
-        self.callbacks['update'].append(cb)
+        return self.events.on('update', cb)
 
     def on_replay_loaded(self, cb):
-        self.callbacks['replayLoaded'].append(cb)
+        return self.events.on('replayLoaded', cb)
 
     def on_replay_resolution(self, cb):
-        self.callbacks['replayResolution'].append(cb)
+        return self.events.on('replayResolution', cb)
 
     def on_replay_end(self, cb):
-        self.callbacks['replayEnd'].append(cb)
+        return self.events.on('replayEnd', cb)
 
     def on_replay_point(self, cb):
-        self.callbacks['replayPoint'].append(cb)
+        return self.events.on('replayPoint', cb)
 
     def on_error(self, cb):
-        self.callbacks['error'].append(cb)
+        return self.events.on('error', cb)
 
     def delete(self):
         if (self.__replay_mode): self.__client['send']('replay_delete_session', [self.__replay_session_id])
         self.__client['send']('chart_delete_session', [self.__chart_session_id])
         del self.__client['sessions'][self.__chart_session_id]
+        self.series.clear()
+        self.__series_symbols.clear()
+        self.__client['sessions'].pop(self.__replay_session_id, None)
         self.__replay_mode = False
+        if self.conflator is not None:
+            self.conflator.close()
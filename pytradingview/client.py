@@ -1,12 +1,20 @@
+import threading
+
 import websocket
 
 from .auth import get_auth_token
 from .quote import QuoteSession
 from .chart import ChartSession
+from .dispatch import CLIENT_KEY
+from .events import EventBus
+from .sender import SendQueue, TokenBucket, BLOCK, CONTROL, DATA, packet_priority
 from . import protocol
 
 
 GUEST_AUTH_TOKEN = "unauthorized_user_token"
+WS_URL = "wss://data.tradingview.com/socket.io/websocket"
+WS_ORIGIN = "https://s.tradingview.com"
+CLIENT_EVENTS = ('connected', 'disconnected', 'logged', 'ping', 'data', 'event', 'error')
 
 
 class Client():
@@ -14,13 +22,46 @@ class Client():
     A WebSocket client for interacting with TradingView's data stream.
     
     This client manages quote and chart sessions, handles WebSocket communication,
-    and provides event-based callbacks for real-time data updates.
+    and provides event-based callbacks for real-time data updates. Callbacks are kept in a
+    per-instance `EventBus` (`self.events`), so clients in the same process do not share them.
+
+    Subclasses can swap the session types created for `quote` and `chart` through the
+    `quote_session_class` and `chart_session_class` attributes.
     """
 
-    def __init__(self, auth_token=None, username=None, password=None):
+    quote_session_class = QuoteSession
+    chart_session_class = ChartSession
+
+    def __init__(self, auth_token=None, username=None, password=None, binary=False,
+                 send_queue_size=0, send_queue_policy=BLOCK, send_timeout=None,
+                 data_rate_limit=None, data_rate_burst=None, dispatcher=None):
         """
         Initializes the Client object, setting up the WebSocket connection parameters,
         session management, and the initial authentication token.
+
+        Args:
+            auth_token (str, optional): TradingView auth token. Defaults to guest access.
+            username (str, optional): TradingView username, exchanged for a token with `password`.
+            password (str, optional): TradingView password.
+            binary (bool): Receive raw bytes from the socket, skipping websocket-client's UTF-8
+                validation and decoding, and hand `memoryview` payload slices to the JSON backend.
+            send_queue_size (int): Maximum number of outbound data packets waiting to be
+                written; 0 means unbounded. Heartbeat replies and control packets are exempt.
+            send_queue_policy (str): What `send` does when the queue is full: 'block',
+                'drop_oldest' (reported as a 'Send queue full' error) or 'raise' (see
+                `pytradingview.sender`).
+            send_timeout (float, optional): Maximum time `send` blocks under the 'block' policy
+                before raising `SendQueueFull`. `send` never blocks while no writer thread is
+                running or on the receive thread, which the writer depends on: it raises
+                `SendQueueFull` instead.
+            data_rate_limit (float, optional): Maximum bulk data requests (`quote_add_symbols`,
+                `resolve_symbol`, `request_more_data`, ...) written per second. Heartbeat replies
+                and session control messages are never throttled and always go first.
+            data_rate_burst (int, optional): How many data requests may be written back to back
+                before `data_rate_limit` applies. Defaults to one second's worth.
+            dispatcher (Dispatcher, optional): Runs session handlers and 'data' callbacks on a
+                thread pool instead of the receive thread, keeping per-session (or per-symbol)
+                order. See `pytradingview.dispatch`.
         """
         if (username and not password) or (password and not username):
             raise ValueError("username and password must both be provided")
@@ -28,8 +69,19 @@ class Client():
         self.wsapp = None
         self.__logged = False
         self.__is_opened = False
-        self.__send_queue = []
+        self.__connections = 0
+        rate_limits = {DATA: TokenBucket(data_rate_limit, data_rate_burst)} if data_rate_limit else None
+        self.__send_queue = SendQueue(
+            send_queue_size, send_queue_policy, send_timeout, rate_limits,
+            on_drop=lambda packet: self.handle_error('Send queue full, dropped packet:', packet),
+        )
+        self.__writer = None
+        self.__receiver = None
+        self.__binary = binary
+        self.__decoder = protocol.FrameDecoder(binary=binary)
         self.sessions = {}
+        self.events = EventBus(CLIENT_EVENTS)
+        self.dispatcher = dispatcher
         self.__auth_token = auth_token or GUEST_AUTH_TOKEN
 
         self.client_bridge = {
@@ -38,8 +90,8 @@ class Client():
             'end': self.end,
         }
 
-        self.quote = QuoteSession(self.client_bridge)
-        self.chart = ChartSession(self.client_bridge)
+        self.quote = self.quote_session_class(self.client_bridge)
+        self.chart = self.chart_session_class(self.client_bridge)
 
         if username and password and not auth_token:
             self.__auth_token = get_auth_token(username=username, password=password)
@@ -66,16 +118,6 @@ class Client():
         """
         return self.sessions
 
-    callbacks = {
-        'connected': [],
-        'disconnected': [],
-        'logged': [],
-        'ping': [],
-        'data': [],
-        'event': [],
-        'error': [],
-    }
-
     def handle_event(self, event, *args):
         """
         Triggers all callbacks registered to a specific event.
@@ -84,10 +126,8 @@ class Client():
             event (str): The name of the event.
             *args: Arguments to pass to the callback functions.
         """
-        for fun in self.callbacks[event]:
-            fun(args)
-        for fun in self.callbacks['event']:
-            fun(event, args)
+        self.events.emit(event, args)
+        self.events.emit('event', event, args)
 
     def handle_error(self, *args):
         """
@@ -96,38 +136,38 @@ class Client():
         Args:
             *args: Error information to log or send to callbacks.
         """
-        if len(self.callbacks['error']) == 0:
+        if not self.events.has_listeners('error'):
             print('\033[31mERROR:\033[0m', args)
         else:
             self.handle_event('error', args)
 
     def on_connected(self, cb):
-        """Registers a callback for the 'connected' event."""
-        self.callbacks['connected'].append(cb)
+        """Registers a callback for the 'connected' event. Returns a `Subscription` handle."""
+        return self.events.on('connected', cb)
 
     def on_disconnected(self, cb):
-        """Registers a callback for the 'disconnected' event."""
-        self.callbacks['disconnected'].append(cb)
+        """Registers a callback for the 'disconnected' event. Returns a `Subscription` handle."""
+        return self.events.on('disconnected', cb)
 
     def on_logged(self, cb):
-        """Registers a callback for the 'logged' event."""
-        self.callbacks['logged'].append(cb)
+        """Registers a callback for the 'logged' event. Returns a `Subscription` handle."""
+        return self.events.on('logged', cb)
 
     def on_ping(self, cb):
-        """Registers a callback for the 'ping' event."""
-        self.callbacks['ping'].append(cb)
+        """Registers a callback for the 'ping' event. Returns a `Subscription` handle."""
+        return self.events.on('ping', cb)
 
     def on_data(self, cb):
-        """Registers a callback for the 'data' event."""
-        self.callbacks['data'].append(cb)
+        """Registers a callback for the 'data' event. Returns a `Subscription` handle."""
+        return self.events.on('data', cb)
 
     def on_error(self, cb):
-        """Registers a callback for the 'error' event."""
-        self.callbacks['error'].append(cb)
+        """Registers a callback for the 'error' event. Returns a `Subscription` handle."""
+        return self.events.on('error', cb)
 
     def on_event(self, cb):
-        """Registers a callback for all events."""
-        self.callbacks['event'].append(cb)
+        """Registers a callback for all events. Returns a `Subscription` handle."""
+        return self.events.on('event', cb)
 
     def on_ws_error(self, ws, error):
         """Handles websocket library errors and dispatches them as client errors."""
@@ -174,42 +214,123 @@ class Client():
         self.set_auth_token(token)
         return token
 
+    @property
+    def outbox(self):
+        """The outbound `SendQueue`, for transports that replace the writer thread."""
+        return self.__send_queue
+
+    @property
+    def send_queue_depth(self):
+        """Number of outbound packets waiting for the writer thread."""
+        return self.__send_queue.depth
+
+    @property
+    def send_stats(self):
+        """
+        Outbound queue counters.
+
+        Returns:
+            dict: `depth`, `sent` and `dropped` packet counts, and per priority class
+            ('heartbeat', 'control', 'data') the queue depth, sent count and average /
+            maximum time spent waiting in the queue.
+        """
+        return self.__send_queue.stats()
+
     def send(self, t, p=None):
         """
-        Sends a packet to the WebSocket, or queues it if the connection is not ready.
+        Queues a packet for the writer thread, which sends it once the connection is ready.
+
+        Packets are classified with `sender.packet_priority`: heartbeat replies go before
+        session control messages, which go before bulk data requests. Packets of one
+        session (the first payload item, when it is a registered session id) still go
+        out in the order they were sent.
 
         Args:
             t (str or dict): The message type or the full packet dictionary.
             p (list, optional): The payload associated with the message type.
+
+        Raises:
+            SendQueueFull: If the queue is bounded, full, and its policy is 'raise'
+                (or a 'block' wait timed out, or could not wait).
         """
         if p is None:
             p = []
+        writer = self.__writer
+        block = writer is not None and writer.is_alive() and threading.current_thread() is not self.__receiver
         if not p:
-            self.__send_queue.append(protocol.format_ws_packet(t))
+            self.__send_queue.put(protocol.format_ws_packet(t), packet_priority(t), block=block)
         else:
-            self.__send_queue.append(protocol.format_ws_packet({'m': t, 'p': p}))
+            session = p[0] if isinstance(p[0], str) and p[0] in self.sessions else None
+            self.__send_queue.put(
+                protocol.format_ws_packet({'m': t, 'p': p}), packet_priority(t), session, block=block,
+            )
         self.send_queue()
 
     def send_queue(self):
         """
-        Sends all packets in the send queue if the client is logged in and the WebSocket is open.
+        Starts the writer thread that drains the send queue, if the client is logged in,
+        the WebSocket is open and no writer is running yet.
+        """
+        if not (self.__is_opened and self.__logged):
+            return
+        if self.__writer is None or not self.__writer.is_alive():
+            self.__writer = threading.Thread(
+                target=self.__write_loop,
+                name='pytradingview-writer',
+                daemon=True,
+            )
+            self.__writer.start()
+
+    def flush(self, timeout=None):
         """
-        while self.__is_opened and self.__logged and len(self.__send_queue) > 0:
-            packet = self.__send_queue.pop(0)
-            self.wsapp.send(packet)
+        Waits until every queued packet has been written to the socket.
+
+        Args:
+            timeout (float, optional): Maximum time to wait, in seconds.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        return self.__send_queue.join(timeout)
+
+    def __write_loop(self):
+        """
+        Writer thread body: the only place that writes to the socket. Exits when the
+        queue is closed on disconnect, or when a write fails (the packet is put back
+        so it is retried on the next connection, unless it belongs to a session:
+        `on_close` drops those, as the server forgets the sessions).
+        """
+        queue = self.__send_queue
+        while True:
+            item = queue.get_item()
+            if item is None:
+                return
+            packet, priority, session = item
+            try:
+                self.wsapp.send(packet)
+            except Exception as exc:
+                queue.requeue(packet, priority, session)
+                self.handle_error('Send error:', exc)
+                return
+            queue.task_done()
 
     def parse_packet(self, string):
         """
         Parses a WebSocket packet string and processes it based on its type.
         Args:
-            string (str): The WebSocket packet string to parse.
+            string (str or bytes): The WebSocket packet string to parse (bytes in binary mode).
         Returns:
             None
         Behavior:
             - If the WebSocket connection is not open (self.is_open is False), the method returns None.
-            - Parses the input string into individual packets using the protocol.parse_ws_packet function.
-            - Iterates through each parsed packet and processes it based on its type:
-                - If the packet is an integer, it is treated as a ping message:
+            - Splits the input string into frame payloads with a protocol.FrameDecoder; a frame
+              split across websocket messages is buffered until the rest arrives.
+            - Once logged in, peeks at each payload's message type and session id and drops it
+              before JSON decoding when nobody would receive it (see `_Client__should_skip`).
+              A session registered with a `received` dict gets the payload counted in its
+              `bytes` and `packets`, skipped or not.
+            - Iterates through each packet and processes it based on its type:
+                - If the payload is a `~h~<n>` heartbeat, it is treated as a ping message:
                     - Sends a formatted ping response using self.send.
                     - Triggers the ping event with the packet value.
                 - If the packet contains a "protocol_error" message (m), it:
@@ -217,29 +338,35 @@ class Client():
                     - Closes the WebSocket connection.
                 - If the packet contains both a message type (m) and payload (p), it:
                     - Constructs a parsed dictionary with type and data.
-                - Checks if the session exists in self.sessions and calls the session's onData handler.
+                - Checks if the session exists in self.sessions and calls the session's onData handler,
+                  through self.dispatcher when one is configured.
                 - If the client is not logged in (self.__logged is False), it triggers the logged event.
                 - For all other cases, it triggers the data event with the packet.
         Notes:
-            - This method relies on external functions and attributes such as protocol.parse_ws_packet, 
+            - This method relies on external functions and attributes such as protocol.FrameDecoder, 
               self.send, self.handle_event, self.handle_error, and self.sessions.
             - Debugging print statements are commented out in the code.
         """
         if not self.is_open():
             return None
 
-        packets = protocol.parse_ws_packet(string)
-        for packet in packets:
-            try:
-                packet = int(packet)
-            except (ValueError, TypeError):
-                pass
-
-            if isinstance(packet, int): # Ping
+        backend = protocol.get_json_backend()
+        loads = backend.loads_buffer if self.__binary else backend.loads
+        for payload in self.__decoder.feed(string):
+            packet = protocol.parse_heartbeat(payload)
+            if packet is not None: # Ping
                 self.send(f'~h~{packet}')
                 self.handle_event('ping', packet)
                 continue
 
+            if self.__logged and self.__should_skip(payload):
+                continue
+
+            try:
+                packet = loads(payload)
+            except ValueError:
+                continue
+
             if packet.get('m') == 'protocol_error': # Error
                 self.handle_error('Client critical error:', packet['p'])
                 self.wsapp.close()
@@ -255,15 +382,50 @@ class Client():
                 bound_session = self.sessions.get(session)
 
                 if session and bound_session:
-                    bound_session['onData'](parsed)
-                    # print('passed ', parsed)
+                    if self.dispatcher is None:
+                        bound_session['onData'](parsed)
+                    else:
+                        key = self.dispatcher.key_for(session, parsed)
+                        self.dispatcher.submit(key, bound_session['onData'], parsed)
                     continue
 
             if not self.__logged:
                 self.handle_event('logged', packet)
                 continue
 
-            self.handle_event('data',packet)
+            if self.dispatcher is None:
+                self.handle_event('data', packet)
+            else:
+                self.dispatcher.submit(CLIENT_KEY, self.handle_event, 'data', packet)
+
+    def __should_skip(self, payload):
+        """
+        Decides from the raw payload header whether a packet can be dropped undecoded.
+
+        A packet is skipped when it targets a registered session that does not list
+        its message type in the session's optional `types` set, or when it targets an
+        unknown session and no 'data' or 'event' callbacks would receive it.
+        Payload sizes are added to the session's `received` counters here, where
+        the session is already looked up; text frames count characters, which is
+        the byte size for TradingView's ASCII JSON.
+        """
+        header = protocol.peek_header(payload)
+        if header is None:
+            return False
+
+        kind, session = header
+        bound_session = self.sessions.get(session)
+        if bound_session is not None:
+            received = bound_session.get('received')
+            if received is not None:
+                received['bytes'] += len(payload)
+                received['packets'] += 1
+            types = bound_session.get('types')
+            return types is not None and kind not in types
+
+        if kind == 'protocol_error':
+            return False
+        return not (self.events.has_listeners('data') or self.events.has_listeners('event'))
 
     def on_message(self, _, message):
         """
@@ -271,7 +433,7 @@ class Client():
 
         Args:
             _ (Any): Placeholder for the WebSocketApp instance.
-            message (str): The message received.
+            message (str or bytes): The message received (bytes in binary mode).
         """
         self.parse_packet(message)
         if not self.__logged and self.__is_opened:
@@ -287,8 +449,14 @@ class Client():
             close_status_code (int): The status code for the close.
             close_msg (str): The reason message for the close.
         """
+        if self.__is_opened:
+            # The server dropped every session with the connection: their queued
+            # packets would only reach unknown sessions on the next one.
+            self.__send_queue.discard_sessions()
         self.__logged = False
         self.__is_opened = False
+        self.__send_queue.close()
+        self.__decoder.reset()
         self.handle_event('disconnected', ws, close_status_code, close_msg)
 
     def on_open(self, ws):
@@ -299,6 +467,15 @@ class Client():
             ws (WebSocketApp): The WebSocketApp instance.
         """
         self.__is_opened = True
+        self.__receiver = threading.current_thread()
+        self.__connections += 1
+        if self.__connections > 1:
+            # A new connection is not authenticated yet: send the token before anything else.
+            self.__send_queue.put(
+                protocol.format_ws_packet({'m': 'set_auth_token', 'p': [self.__auth_token]}),
+                CONTROL, front=True,
+            )
+        self.__send_queue.reopen()
         self.handle_event('connected', ws)
 
     def create_connection(self):
@@ -306,13 +483,16 @@ class Client():
         Establishes the WebSocket connection to TradingView and starts listening for messages.
         """
         self.wsapp = websocket.WebSocketApp(
-            "wss://data.tradingview.com/socket.io/websocket",
+            WS_URL,
             on_message=self.on_message,
             on_close=self.on_close,
             on_open=self.on_open,
             on_error=self.on_ws_error
         )
-        self.wsapp.run_forever(origin='https://s.tradingview.com')
+        self.wsapp.run_forever(
+            origin=WS_ORIGIN,
+            skip_utf8_validation=self.__binary,
+        )
 
     def end(self, callback=None):
         """
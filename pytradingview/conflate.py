@@ -0,0 +1,234 @@
+"""
+Update conflation.
+
+In a fast market one symbol can send dozens of `qsd` or `du` packets a second,
+and by default each one runs every listener. Consumers that only need the latest
+state every 100-250 ms can have the updates conflated instead: pending updates
+are merged per key and delivered once, when the interval timer fires or when
+`max_batch` keys are pending, whichever comes first.
+
+- Per session: `QuoteSession(..., conflate=0.25)` merges `qsd` packets per
+  symbol before its `on_symbol` listeners run, and `ChartSession(..., conflate=0.25)`
+  merges the `update` events of the main series and of each extra series.
+  Quotes (`store`) and candles are still updated on every packet.
+- Per listener: wrap a callback with `conflate_quotes` (for `on_symbol`) or
+  `conflate_updates` (for `on_update`); other listeners keep every update.
+
+Merged `qsd` packets carry the union of the field deltas, newest value last, so
+no field change is lost; a `quote_completed` first delivers the symbol's pending
+update. `Conflator.stats()` counts the updates pushed, delivered and coalesced.
+
+Conflated updates are delivered on the timer thread, or on the thread handling
+the packet when `max_batch` triggers the flush. Sessions hold their `lock` while
+they update `store`/`candles` from a packet, and their conflators hold it while
+delivering, so listeners never read a store half written. Pass `lock=session.lock`
+to `conflate_quotes`/`conflate_updates` for the same guarantee.
+"""
+
+import threading
+
+
+DEFAULT_INTERVAL = 0.25
+
+
+def merge_qsd(old, new):
+    """Merges two `qsd` packets of one symbol into a new packet; `new` wins per field."""
+    old_data, new_data = old['data'][1], new['data'][1]
+    data = {**old_data, **new_data, 'v': {**(old_data.get('v') or {}), **(new_data.get('v') or {})}}
+    return {'type': new['type'], 'data': [new['data'][0], data]}
+
+
+def merge_changes(old, new):
+    """Merges two `update` change lists, keeping first-seen order."""
+    return old + [key for key in new if key not in old]
+
+
+class Conflator:
+    """
+    Merges values pushed under the same key and delivers the latest per key in batches.
+
+    Args:
+        deliver (callable): Called as `deliver(key, value)` for every pending key on flush,
+            in the order the keys first became pending.
+        interval (float): Seconds between the first pending push and its flush.
+        max_batch (int, optional): Flush as soon as this many keys are pending.
+        merge (callable, optional): `merge(old, new)` combining a pending value with a
+            newer one; the newer value replaces the pending one when None.
+        timer (callable): Called as `timer(delay, function)` and returns an object
+            with `start()` and `cancel()`; `threading.Timer` by default.
+        lock (RLock, optional): Held while delivering, e.g. a session's `lock`.
+    """
+
+    def __init__(self, deliver, interval=DEFAULT_INTERVAL, max_batch=None, merge=None, timer=threading.Timer,
+                 lock=None):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if max_batch is not None and max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.deliver = deliver
+        self.interval = interval
+        self.max_batch = max_batch
+        self.merge = merge
+        self.pushed = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.__timer_factory = timer
+        self.__timer = None
+        self.__pending = {}
+        self.__lock = threading.Lock()
+        # Held while delivering, so batches never overlap or run out of order.
+        self.__delivering = lock if lock is not None else threading.RLock()
+
+    def __len__(self):
+        return len(self.__pending)
+
+    def push(self, key, value):
+        """Queues `value` for `key`, merging it into the value already pending for `key`."""
+        with self.__lock:
+            self.pushed += 1
+            pending = self.__pending
+            if key in pending:
+                self.coalesced += 1
+                pending[key] = value if self.merge is None else self.merge(pending[key], value)
+                return
+            pending[key] = value
+            full = self.max_batch is not None and len(pending) >= self.max_batch
+            if not full and self.__timer is None:
+                self.__timer = self.__timer_factory(self.interval, self.flush)
+                if hasattr(self.__timer, 'daemon'):
+                    self.__timer.daemon = True
+                self.__timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Delivers every pending key now.
+
+        Returns:
+            int: Number of keys delivered.
+        """
+        with self.__delivering:
+            with self.__lock:
+                if self.__timer is not None:
+                    self.__timer.cancel()
+                    self.__timer = None
+                batch, self.__pending = self.__pending, {}
+                if batch:
+                    self.flushes += 1
+                    self.delivered += len(batch)
+            for key, value in batch.items():
+                self.deliver(key, value)
+        return len(batch)
+
+    def flush_key(self, key):
+        """Delivers the value pending for `key`, if any, ahead of the next flush."""
+        with self.__delivering:
+            with self.__lock:
+                if key not in self.__pending:
+                    return
+                value = self.__pending.pop(key)
+                self.delivered += 1
+            self.deliver(key, value)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Updates `pushed`, `delivered` and `coalesced` (merged into a pending
+            update instead of delivered), `flushes`, and keys `pending` now.
+        """
+        with self.__lock:
+            return {
+                'pushed': self.pushed,
+                'delivered': self.delivered,
+                'coalesced': self.coalesced,
+                'flushes': self.flushes,
+                'pending': len(self.__pending),
+            }
+
+    def close(self):
+        """Stops the timer and drops the pending values."""
+        with self.__lock:
+            self.__pending.clear()
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+
+
+class ConflatedListener:
+    """
+    Callback wrapper conflating the packets or events it receives; see
+    `conflate_quotes` and `conflate_updates`. Register and unregister the wrapper
+    itself.
+
+    Attributes:
+        callback (callable): The wrapped callback.
+        conflator (Conflator): Pending updates and their counters.
+    """
+
+    def __init__(self, callback, key, merge, interval=DEFAULT_INTERVAL, max_batch=None, timer=threading.Timer,
+                 lock=None):
+        self.callback = callback
+        self.__key = key
+        self.conflator = Conflator(self.__deliver, interval, max_batch, merge, timer, lock)
+
+    def __call__(self, item):
+        key, conflate = self.__key(item)
+        if conflate:
+            self.conflator.push(key, item)
+        else:
+            self.conflator.flush_key(key)
+            self.callback(item)
+
+    def __deliver(self, key, item):
+        self.callback(item)
+
+    def flush(self):
+        """Delivers the pending updates now."""
+        return self.conflator.flush()
+
+    def close(self):
+        """Drops the pending updates and stops the timer."""
+        self.conflator.close()
+
+
+def _quote_key(packet):
+    if packet['type'] == 'qsd':
+        return packet['data'][1]['n'], True
+    return packet['data'][1], False
+
+
+def _update_key(args):
+    return None, True
+
+
+def _merge_update_args(old, new):
+    return (merge_changes(old[0], new[0]),) + new[1:]
+
+
+def conflate_quotes(callback, interval=DEFAULT_INTERVAL, max_batch=None, timer=threading.Timer, lock=None):
+    """
+    Wraps an `on_symbol` callback so it gets at most one merged `qsd` packet per
+    symbol every `interval` seconds. With the session's `lock`, deliveries do not
+    overlap its quote updates.
+
+    Example:
+        listener = conflate_quotes(print, 0.1, lock=quote.lock)
+        quote.on_symbol('BINANCE:BTCUSDT', listener)
+        ...
+        quote.off_symbol('BINANCE:BTCUSDT', listener)
+    """
+    return ConflatedListener(callback, _quote_key, merge_qsd, interval, max_batch, timer, lock)
+
+
+def conflate_updates(callback, interval=DEFAULT_INTERVAL, max_batch=None, timer=threading.Timer, lock=None):
+    """
+    Wraps an `on_update` callback so it runs at most once every `interval` seconds,
+    with the union of the changed keys. With the chart's `lock`, it does not run
+    while the chart's candles are being updated.
+
+    Example:
+        subscription = chart.on_update(conflate_updates(redraw, 0.2, lock=chart.lock))
+    """
+    return ConflatedListener(callback, _update_key, _merge_update_args, interval, max_batch, timer, lock)
@@ -0,0 +1,179 @@
+"""
+Callback dispatcher for the TradingView WebSocket client.
+
+By default every session handler and user callback runs on the websocket
+receive thread, so one slow consumer stalls decoding for the whole connection.
+Passing a `Dispatcher` to `Client` moves that work to a thread pool:
+
+- Work is queued per key, either per session (`key_by='session'`) or, for quote
+  sessions, per symbol (`key_by='symbol'`).
+- A key is served by at most one worker at a time, so callbacks for the same
+  key always run in arrival order, while different keys run in parallel.
+- `stats()` and `lagging()` report queue depth and lag (age of the oldest
+  pending item) per key, to show which consumers are falling behind.
+
+Example:
+--------
+```python
+dispatcher = Dispatcher(workers=8, key_by='symbol')
+client = Client(dispatcher=dispatcher)
+...
+print(dispatcher.lagging(0.5))
+```
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+SESSION = 'session'
+SYMBOL = 'symbol'
+
+# Key used for client-level 'data' events.
+CLIENT_KEY = '__client__'
+
+
+class Dispatcher:
+    """
+    Runs callbacks on a thread pool with per-key ordering.
+
+    Args:
+        workers (int): Number of worker threads.
+        key_by (str): `'session'` to order work per session, or `'symbol'` to order
+            quote updates per symbol (other packets stay ordered per session).
+        batch (int): Maximum items a worker runs for one key before giving other
+            keys a turn.
+        on_error (callable, optional): Called as `on_error(key, exc)` when a callback
+            raises. Errors are printed when omitted.
+    """
+
+    def __init__(self, workers=4, key_by=SESSION, batch=64, on_error=None):
+        if key_by not in (SESSION, SYMBOL):
+            raise ValueError(f"key_by must be '{SESSION}' or '{SYMBOL}', got {key_by!r}")
+
+        self.key_by = key_by
+        self.batch = batch
+        self.on_error = on_error
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pytradingview-dispatch')
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queues = {}
+        self._active = set()
+        self._pending = 0
+        self._processed = {}
+        self._max_lag = {}
+
+    def key_for(self, session, packet):
+        """
+        Returns the ordering key for a session packet.
+
+        Args:
+            session (str): The session id the packet is addressed to.
+            packet (dict): The parsed `{'type': ..., 'data': [...]}` packet.
+        """
+        if self.key_by == SYMBOL:
+            if packet['type'] == 'qsd':
+                return (session, packet['data'][1].get('n'))
+            if packet['type'] == 'quote_completed':
+                return (session, packet['data'][1])
+        return session
+
+    def submit(self, key, fn, *args):
+        """
+        Queues `fn(*args)` behind any pending work for the same key.
+        """
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque()
+            queue.append((fn, args, time.monotonic()))
+            self._pending += 1
+            if key in self._active:
+                return
+            self._active.add(key)
+        self._executor.submit(self._drain, key)
+
+    def _drain(self, key):
+        for _ in range(self.batch):
+            with self._lock:
+                queue = self._queues[key]
+                fn, args, queued_at = queue.popleft()
+
+            lag = time.monotonic() - queued_at
+            try:
+                fn(*args)
+            except Exception as exc:
+                if self.on_error is None:
+                    print('\033[31mERROR:\033[0m', f'callback for {key!r} failed:', exc)
+                else:
+                    self.on_error(key, exc)
+
+            with self._lock:
+                self._pending -= 1
+                self._processed[key] = self._processed.get(key, 0) + 1
+                if lag > self._max_lag.get(key, 0.0):
+                    self._max_lag[key] = lag
+                if not queue:
+                    del self._queues[key]
+                    self._active.discard(key)
+                    if not self._pending:
+                        self._idle.notify_all()
+                    return
+
+        # Batch used up with work left: go to the back of the pool's queue.
+        self._executor.submit(self._drain, key)
+
+    @property
+    def pending(self):
+        """Number of callbacks waiting to run, across all keys."""
+        return self._pending
+
+    def join(self, timeout=None):
+        """
+        Waits until every queued callback has run.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def stats(self):
+        """
+        Returns:
+            dict: `pending` callbacks in total and, per key seen so far, the queue
+            `depth`, current `lag` (seconds the oldest pending item has waited),
+            `max_lag` and `processed` count.
+        """
+        now = time.monotonic()
+        with self._lock:
+            keys = {}
+            for key in set(self._processed) | set(self._queues):
+                queue = self._queues.get(key)
+                keys[key] = {
+                    'depth': len(queue) if queue else 0,
+                    'lag': now - queue[0][2] if queue else 0.0,
+                    'max_lag': self._max_lag.get(key, 0.0),
+                    'processed': self._processed.get(key, 0),
+                }
+            return {'pending': self._pending, 'keys': keys}
+
+    def lagging(self, threshold=0.0):
+        """
+        Lists the keys whose oldest pending callback has waited longer than `threshold`.
+
+        Returns:
+            list: `(key, lag)` tuples, worst first.
+        """
+        now = time.monotonic()
+        with self._lock:
+            lags = [(key, now - queue[0][2]) for key, queue in self._queues.items() if queue]
+        return sorted((item for item in lags if item[1] > threshold), key=lambda item: item[1], reverse=True)
+
+    def close(self, wait=True):
+        """Stops the worker threads, by default after running the queued callbacks."""
+        if wait:
+            self.join()
+        self._executor.shutdown(wait=wait)
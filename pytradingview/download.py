@@ -0,0 +1,140 @@
+"""
+Streaming historical downloads.
+
+`HistoryDownload` drives `ChartSession.download_data`. It pages backward from
+the newest bar with `request_more_data` and:
+
+- asks for the next page as soon as a page arrives, before writing it, so the
+  server round trip overlaps with disk I/O;
+- grows the page size (doubling, up to `MAX_PAGE_SIZE`) but never asks for many
+  more bars than the time left to `start` can hold;
+- writes every page to disk as it arrives and only keeps that page in memory;
+- drops bars already written, so pages that overlap at their boundary do not
+  produce duplicate rows;
+- reports progress (bars, bars/sec, ETA) after each page.
+"""
+
+import math
+import time
+from bisect import bisect_left, bisect_right
+
+
+# Largest `request_more_data` the server answers in full.
+MAX_PAGE_SIZE = 5000
+MIN_PAGE_SIZE = 100
+
+
+def print_progress(progress):
+    """Default progress reporter for `HistoryDownload`."""
+    eta = progress["eta"]
+    print(
+        f"Saved {progress['bars']} candles to {progress['filename']} "
+        f"({progress['bars_per_sec']:.0f} bars/s, "
+        f"ETA {'?' if eta is None else f'{eta:.0f}s'})"
+    )
+
+
+class HistoryDownload:
+    """
+    State of one streaming download.
+
+    Args:
+        start (int): Oldest bar time wanted, in seconds since epoch.
+        end (int): Newest bar time wanted, in seconds since epoch.
+        writer: Object with `write(batch, first, stop)` and `close()`.
+        fetch (callable): Called as `fetch(count)` to request `count` older bars.
+        on_progress (callable, optional): Called with a progress dict after each
+            page; `print_progress` when omitted.
+        clock (callable): Monotonic time source, overridable for tests.
+    """
+
+    def __init__(self, start, end, writer, fetch, on_progress=None, clock=time.monotonic):
+        self.start = start
+        self.end = end
+        self.writer = writer
+        self.fetch = fetch
+        self.on_progress = on_progress or print_progress
+        self.clock = clock
+
+        self.page_size = MIN_PAGE_SIZE
+        self.bars = 0
+        self.pages = 0
+        self.received = 0
+        self.oldest = None
+        self.done = False
+        self.started = clock()
+
+    def next_page_size(self, batch):
+        """
+        Returns the size of the next `request_more_data`: double the last one,
+        capped by `MAX_PAGE_SIZE` and by the bars that fit between the oldest bar
+        and `start` at the page's bar spacing.
+        """
+        size = min(MAX_PAGE_SIZE, self.page_size * 2)
+        times = batch.columns["time"]
+        if len(times) > 1:
+            spacing = (times[-1] - times[0]) / (len(times) - 1)
+            if spacing > 0:
+                remaining = math.ceil((times[0] - self.start) / spacing) + 1
+                size = min(size, max(MIN_PAGE_SIZE, remaining))
+        self.page_size = size
+        return size
+
+    def on_page(self, batch):
+        """
+        Handles one page of bars, in ascending time order.
+
+        Returns:
+            bool: True once the download is complete.
+        """
+        if self.done:
+            return True
+
+        times = batch.columns["time"]
+        self.pages += 1
+        self.received += len(times)
+        oldest = times[0] if len(times) else None
+        # No bars older than what we have: the server has no more history.
+        exhausted = oldest is None or (self.oldest is not None and oldest >= self.oldest)
+        self.done = exhausted or oldest <= self.start
+
+        if not self.done:
+            self.fetch(self.next_page_size(batch))
+
+        if not exhausted:
+            first = bisect_left(times, self.start)
+            stop = bisect_right(times, self.end)
+            if self.oldest is not None:
+                stop = min(stop, bisect_left(times, self.oldest))
+            if stop > first:
+                self.writer.write(batch, first, stop)
+                self.bars += stop - first
+            self.oldest = oldest if self.oldest is None else min(self.oldest, oldest)
+
+        self.on_progress(self.progress())
+        if self.done:
+            self.writer.close()
+        return self.done
+
+    def progress(self):
+        """
+        Returns:
+            dict: `bars` written, `pages` and `received` bars, `bars_per_sec`,
+            `fraction` of the time range covered and `eta` in seconds (None
+            until it can be estimated).
+        """
+        elapsed = max(self.clock() - self.started, 1e-9)
+        span = max(self.end - self.start, 1)
+        covered = 0.0 if self.oldest is None else min(1.0, max(0.0, (self.end - self.oldest) / span))
+        if self.done:
+            covered = 1.0
+        eta = elapsed * (1 - covered) / covered if covered else None
+        return {
+            "filename": getattr(self.writer, "filename", None),
+            "bars": self.bars,
+            "pages": self.pages,
+            "received": self.received,
+            "bars_per_sec": self.bars / elapsed,
+            "fraction": covered,
+            "eta": eta,
+        }
@@ -0,0 +1,95 @@
+"""
+Per-instance event bus used by the client and chart sessions.
+
+Each `EventBus` keeps its own topic -> listeners mapping, so several clients or
+chart sessions in one process never see each other's callbacks, and emitting an
+event costs one dictionary lookup plus the listeners of that topic. Listener
+lists are stored as tuples and replaced on (un)subscribe, so `emit` can iterate
+them without copying even if a listener unsubscribes while it runs.
+
+`on` returns a `Subscription` handle whose `cancel()` removes the listener;
+`once` registers a listener that removes itself after its first call.
+"""
+
+
+class Subscription:
+    """Handle returned by `EventBus.on`; call `cancel()` to remove the listener."""
+
+    __slots__ = ('bus', 'topic', 'callback')
+
+    def __init__(self, bus, topic, callback):
+        self.bus = bus
+        self.topic = topic
+        self.callback = callback
+
+    def cancel(self):
+        """Removes the listener. Safe to call more than once."""
+        self.bus.off(self.topic, self.callback)
+
+    def __repr__(self):
+        return f'Subscription({self.topic!r}, {self.callback!r})'
+
+
+class EventBus:
+    """
+    Topic-indexed listener registry.
+
+    Args:
+        topics (iterable, optional): Topics known up front. Listeners can also be
+            added for other topics; emitting a topic nobody listens to is a no-op.
+    """
+
+    def __init__(self, topics=()):
+        self._listeners = {topic: () for topic in topics}
+
+    def on(self, topic, callback):
+        """
+        Registers `callback` for `topic`.
+
+        Returns:
+            Subscription: Handle to remove the listener.
+        """
+        self._listeners[topic] = self._listeners.get(topic, ()) + (callback,)
+        return Subscription(self, topic, callback)
+
+    def once(self, topic, callback):
+        """
+        Registers `callback` for the next `topic` event only.
+
+        Returns:
+            Subscription: Handle to remove the listener before it fires.
+        """
+        def wrapper(*args):
+            subscription.cancel()
+            return callback(*args)
+
+        subscription = self.on(topic, wrapper)
+        return subscription
+
+    def off(self, topic, callback):
+        """Removes the first registration of `callback` for `topic`, if any."""
+        listeners = self._listeners.get(topic, ())
+        if callback in listeners:
+            index = listeners.index(callback)
+            self._listeners[topic] = listeners[:index] + listeners[index + 1:]
+
+    def emit(self, topic, *args):
+        """Calls every listener of `topic` with `args`, in registration order."""
+        for callback in self._listeners.get(topic, ()):
+            callback(*args)
+
+    def listeners(self, topic):
+        """Returns the listeners registered for `topic`."""
+        return self._listeners.get(topic, ())
+
+    def has_listeners(self, topic):
+        """Returns True if at least one listener is registered for `topic`."""
+        return bool(self._listeners.get(topic))
+
+    def clear(self, topic=None):
+        """Removes every listener of `topic`, or of all topics when omitted."""
+        if topic is None:
+            for name in self._listeners:
+                self._listeners[name] = ()
+        else:
+            self._listeners[topic] = ()
@@ -7,12 +7,30 @@ parsing WebSocket messages used by TradingView's real-time data feed.
 
 Functions included:
 - `parse_ws_packet`: Parses a raw WebSocket message into JSON objects.
+- `FrameDecoder`: Incrementally decodes length-prefixed frames, keeping partial frames between calls.
+- `peek_header`: Reads the message type and session id of a raw payload without decoding it.
+- `parse_heartbeat`: Returns the number carried by a `~h~<n>` heartbeat payload.
 - `format_ws_packet`: Encodes a packet (as a dict or string) into the TradingView-specific WebSocket message format.
 - `parse_compressed`: Decodes and decompresses a base64-encoded, zlib-compressed JSON string.
+- `set_json_backend` / `get_json_backend`: Select the JSON implementation used for encoding and decoding.
+
+JSON backends:
+    Encoding and decoding go through a pluggable backend. On import the fastest
+    installed library is selected, in the order listed in `JSON_BACKEND_PREFERENCE`
+    (orjson, msgspec, ujson), falling back to the standard library `json` module.
+    Custom implementations can be added with `register_json_backend`.
+
+Binary mode:
+    `FrameDecoder(binary=True)` accepts raw `bytes` straight from the socket and
+    yields `memoryview` slices of the payloads, which `JSONBackend.loads_buffer`
+    parses without an intermediate `str`. Use it together with websocket-client's
+    `skip_utf8_validation` to avoid validating and decoding each message.
 
 Constants:
 - `CLEANER_RGX`: Regex pattern to remove heartbeat tokens.
 - `SPLITTER_RGX`: Regex pattern to split raw WebSocket messages into individual packets.
+- `FRAME_HEADER_RGX`: Compiled pattern matching a single `~m~<len>~m~` frame header.
+- `PACKET_HEADER_RGX`: Compiled pattern matching the `{"m":...,"p":["<session>"` prefix of a payload.
 
 These functions are essential for interpreting and composing the custom protocol used
 by TradingView's socket.io-based WebSocket API.
@@ -27,6 +45,227 @@ import base64
 CLEANER_RGX = '~h~'
 SPLITTER_RGX = '~m~[0-9]{1,}~m~'
 
+JSON_BACKEND_PREFERENCE = ('orjson', 'msgspec', 'ujson', 'json')
+
+FRAME_HEADER = '~m~'
+HEARTBEAT_PREFIX = '~h~'
+FRAME_HEADER_RGX = re.compile('~m~([0-9]+)~m~')
+PARTIAL_HEADER_RGX = re.compile('~(?:m(?:~(?:[0-9]+(?:~m?)?)?)?)?')
+PACKET_HEADER_RGX = re.compile(r'\{"m":"([^"\\]+)","p":\["([^"\\]*)"')
+
+FRAME_HEADER_BYTES = FRAME_HEADER.encode()
+HEARTBEAT_PREFIX_BYTES = HEARTBEAT_PREFIX.encode()
+FRAME_HEADER_BYTES_RGX = re.compile(FRAME_HEADER_RGX.pattern.encode())
+PARTIAL_HEADER_BYTES_RGX = re.compile(PARTIAL_HEADER_RGX.pattern.encode())
+PACKET_HEADER_BYTES_RGX = re.compile(PACKET_HEADER_RGX.pattern.encode())
+
+class JSONBackend:
+    """
+    A named pair of JSON `loads` / `dumps` callables.
+
+    `loads` must accept `str` or `bytes` and raise a `ValueError` subclass on
+    invalid input. `dumps` must return a compact, ASCII-only `str` (no whitespace
+    after separators, non-ASCII characters escaped), so that a frame's length in
+    characters is also its length in bytes. The output is not byte-identical
+    across backends: float formatting differs (`1e16` vs `1e+16`), which is why
+    `format_ws_packet` measures each encoded payload.
+
+    Args:
+        name (str): The registry name of the backend.
+        loads (callable): Parses a JSON document.
+        dumps (callable): Serialises an object to a compact JSON string.
+        accepts_buffer (bool): Whether `loads` also accepts `memoryview` slices.
+            When False, `loads_buffer` copies the slice to `bytes` first.
+    """
+
+    def __init__(self, name, loads, dumps, accepts_buffer=False):
+        self.name = name
+        self.loads = loads
+        self._dumps = dumps
+        self.accepts_buffer = accepts_buffer
+        self.loads_buffer = loads if accepts_buffer else (lambda data: loads(bytes(data)))
+
+    def dumps(self, obj, null_as_empty=False):
+        """
+        Serialises `obj` to a compact JSON string.
+
+        Args:
+            obj: The object to serialise.
+            null_as_empty (bool): Encode `None` values as empty strings, which is
+                what the TradingView server expects in place of `null`.
+
+        Returns:
+            str: The JSON document.
+        """
+        if null_as_empty:
+            obj = _null_to_empty(obj)
+        return self._dumps(obj)
+
+    def __repr__(self):
+        return f'JSONBackend({self.name!r})'
+
+
+def _null_to_empty(obj):
+    """
+    Returns `obj` with every `None` replaced by ''. Containers without a `None`
+    inside are returned as they are, so the common packet is not copied.
+    """
+    if obj is None:
+        return ''
+    if isinstance(obj, dict):
+        copy = None
+        for key, value in obj.items():
+            new = _null_to_empty(value)
+            if new is not value:
+                if copy is None:
+                    copy = dict(obj)
+                copy[key] = new
+        return obj if copy is None else copy
+    if isinstance(obj, (list, tuple)):
+        copy = None
+        for index, value in enumerate(obj):
+            new = _null_to_empty(value)
+            if new is not value:
+                if copy is None:
+                    copy = list(obj)
+                copy[index] = new
+        return obj if copy is None else copy
+    return obj
+
+
+def _json_dumps(obj):
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _ascii_only(encode):
+    # orjson and msgspec always emit raw UTF-8; escape the rare non-ASCII packet
+    # with the standard library so the output matches the other backends.
+    def dumps(obj):
+        out = encode(obj).decode()
+        return out if out.isascii() else _json_dumps(obj)
+    return dumps
+
+
+def _make_json():
+    return JSONBackend('json', json.loads, _json_dumps)
+
+
+def _make_orjson():
+    import orjson
+    return JSONBackend('orjson', orjson.loads, _ascii_only(orjson.dumps), accepts_buffer=True)
+
+
+def _make_msgspec():
+    import msgspec
+    decoder = msgspec.json.Decoder()
+    return JSONBackend(
+        'msgspec',
+        decoder.decode,
+        _ascii_only(msgspec.json.Encoder().encode),
+        accepts_buffer=True,
+    )
+
+
+def _make_ujson():
+    import ujson
+    return JSONBackend(
+        'ujson',
+        ujson.loads,
+        lambda obj: ujson.dumps(obj, escape_forward_slashes=False),
+    )
+
+
+JSON_BACKEND_FACTORIES = {
+    'json': _make_json,
+    'orjson': _make_orjson,
+    'msgspec': _make_msgspec,
+    'ujson': _make_ujson,
+}
+
+JSON_BACKENDS = {}
+_json_backend = None
+
+
+def register_json_backend(backend):
+    """
+    Adds a backend to the registry so it can be selected by name.
+
+    Args:
+        backend (JSONBackend): The backend to register.
+    """
+    JSON_BACKENDS[backend.name] = backend
+
+
+def load_json_backend(name):
+    """
+    Returns the registered backend called `name`, importing it on first use.
+
+    Args:
+        name (str): A registered name such as `'orjson'` or `'json'`.
+
+    Returns:
+        JSONBackend: The backend.
+
+    Raises:
+        ImportError: If the library behind a built-in backend is not installed.
+        KeyError: If no backend with that name exists.
+    """
+    backend = JSON_BACKENDS.get(name)
+    if backend is None:
+        backend = JSON_BACKEND_FACTORIES[name]()
+        register_json_backend(backend)
+    return backend
+
+
+def available_json_backends():
+    """
+    Lists the backends that can be loaded in this environment, fastest first.
+
+    Returns:
+        list: Backend names.
+    """
+    names = []
+    for name in list(JSON_BACKEND_PREFERENCE) + [n for n in JSON_BACKENDS if n not in JSON_BACKEND_PREFERENCE]:
+        try:
+            load_json_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_json_backend(name=None):
+    """
+    Selects the JSON backend used by the protocol functions.
+
+    Args:
+        name (str, optional): The backend to use. When omitted, the first
+            installed backend in `JSON_BACKEND_PREFERENCE` is chosen.
+
+    Returns:
+        JSONBackend: The backend now in use.
+    """
+    global _json_backend
+    if name is None:
+        for candidate in JSON_BACKEND_PREFERENCE:
+            try:
+                _json_backend = load_json_backend(candidate)
+                break
+            except ImportError:
+                continue
+    else:
+        _json_backend = load_json_backend(name)
+    return _json_backend
+
+
+def get_json_backend():
+    """Returns the JSON backend currently in use."""
+    return _json_backend
+
+
+set_json_backend()
+
+
 def parse_ws_packet(string):
     """
     Parses a WebSocket packet string into a list of JSON objects.
@@ -49,23 +288,232 @@ def parse_ws_packet(string):
         - If a part cannot be parsed as JSON, it is skipped, and a warning is printed.
     """
     l = re.split(SPLITTER_RGX, re.sub(CLEANER_RGX, '', string))
+    loads = _json_backend.loads
     packet = []
     for p in l:
         if not p:
             continue
         try:
-            packet.append(json.loads(p))
-        except json.JSONDecodeError:
+            packet.append(loads(p))
+        except ValueError:
             pass
     return packet
 
+class FrameDecoder:
+    """
+    Incremental decoder for TradingView's `~m~<len>~m~<payload>` framing.
+
+    Unlike `parse_ws_packet`, the decoder walks the frame headers and slices each
+    payload by its announced length, so heartbeat markers or separators that
+    appear inside a JSON payload are left untouched. A frame that is split
+    across websocket messages is kept in an internal buffer and completed by
+    the next call to `feed` / `decode`.
+
+    If a payload does not end where its header says it should (for example when
+    the server counts characters differently), the decoder resynchronises on
+    the next frame header instead of dropping the rest of the message. A last
+    frame whose header counts more than the buffer holds is emitted right away
+    when its length in UTF-8 bytes, UTF-16 units or characters matches the
+    header, instead of waiting for a message that would never complete it.
+
+    In binary mode the decoder is fed `bytes` and yields `memoryview` slices of
+    the received message, so no payload is copied before it reaches the JSON
+    parser.
+
+    Args:
+        binary (bool): Accept `bytes` instead of `str` messages.
+
+    Example:
+        decoder = FrameDecoder()
+        for packet in decoder.decode(message):
+            ...
+    """
+
+    def __init__(self, binary=False):
+        self.binary = binary
+        if binary:
+            self._buffer = b''
+            self._separator = FRAME_HEADER_BYTES
+            self._header_rgx = FRAME_HEADER_BYTES_RGX
+            self._partial_rgx = PARTIAL_HEADER_BYTES_RGX
+        else:
+            self._buffer = ''
+            self._separator = FRAME_HEADER
+            self._header_rgx = FRAME_HEADER_RGX
+            self._partial_rgx = PARTIAL_HEADER_RGX
+
+    @property
+    def pending(self):
+        """Number of buffered characters belonging to an incomplete frame."""
+        return len(self._buffer)
+
+    def reset(self):
+        """Discards any buffered partial frame."""
+        self._buffer = self._buffer[:0]
+
+    def feed(self, data):
+        """
+        Appends `data` to the buffer and returns a generator of raw frame payloads.
+
+        Payloads are produced lazily; whatever is left unconsumed (including a
+        trailing partial frame) stays buffered for the next call. Generators
+        returned by successive calls should be consumed in order.
+
+        Args:
+            data (str | bytes): A websocket message, or part of one.
+
+        Returns:
+            generator: Yields each complete payload as a `str`, or as a
+            `memoryview` in binary mode.
+        """
+        self._buffer += data
+        return self._drain()
+
+    def decode(self, data):
+        """
+        Feeds `data` and yields the decoded packets.
+
+        Heartbeat frames (`~h~<n>`) are yielded as integers without going
+        through the JSON parser. Payloads that are not valid JSON are skipped,
+        matching `parse_ws_packet`.
+
+        Args:
+            data (str | bytes): A websocket message, or part of one.
+
+        Yields:
+            int | dict | list: The decoded packets in arrival order.
+        """
+        loads = _json_backend.loads_buffer if self.binary else _json_backend.loads
+        for payload in self.feed(data):
+            heartbeat = parse_heartbeat(payload)
+            if heartbeat is not None:
+                yield heartbeat
+                continue
+            try:
+                yield loads(payload)
+            except ValueError:
+                pass
+
+    def _drain(self):
+        buf = self._buffer
+        size = len(buf)
+        pos = 0
+        separator = self._separator
+        header_rgx = self._header_rgx
+        partial_rgx = self._partial_rgx
+        view = memoryview(buf) if self.binary else buf
+        try:
+            while pos < size:
+                header = header_rgx.match(buf, pos)
+                if header is None:
+                    # Not at a frame boundary: either a truncated header that the
+                    # next message completes, or stray bytes to skip over.
+                    if partial_rgx.fullmatch(buf, pos):
+                        break
+                    header = header_rgx.search(buf, pos)
+                    if header is None:
+                        pos = size
+                        break
+                    pos = header.start()
+
+                start = header.end()
+                end = start + int(header.group(1))
+                if end > size:
+                    if not _counts_as(buf[start:size], end - start):
+                        break
+                    end = size
+
+                if (end < size and not buf.startswith(separator, end)
+                        and not partial_rgx.fullmatch(buf, end)):
+                    # Length mismatch: fall back to the next header as the boundary.
+                    following = header_rgx.search(buf, start)
+                    end = following.start() if following else size
+
+                pos = end
+                yield view[start:end]
+        finally:
+            self._buffer = buf[pos:] if pos else buf
+
+
+def _counts_as(tail, length):
+    """
+    Tells whether `tail` is a whole payload of `length` counted in UTF-8 bytes,
+    UTF-16 units or characters: a frame the server measured differently.
+    """
+    try:
+        text = tail.decode() if isinstance(tail, bytes) else tail
+    except UnicodeDecodeError:
+        # Ends inside a multi-byte character: the frame is still arriving.
+        return False
+    if length not in (len(text), len(text.encode('utf-16-le', 'surrogatepass')) // 2,
+                      len(text.encode('utf-8', 'surrogatepass'))):
+        return False
+    # A split frame can match one of the counts by chance; only a whole payload parses.
+    try:
+        _json_backend.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+def peek_header(payload):
+    """
+    Reads the message type and session id from a raw JSON payload.
+
+    TradingView session packets always start with `{"m":"<type>","p":["<session>",`,
+    so both values can be read with an anchored match before paying for a full
+    JSON decode. Heartbeats, handshake packets and any payload laid out
+    differently return `None` and should be decoded normally.
+
+    Args:
+        payload (str | bytes | memoryview): A single frame payload, as yielded
+            by `FrameDecoder.feed`.
+
+    Returns:
+        tuple | None: `(message_type, session_id)` as strings, or `None`.
+    """
+    if isinstance(payload, str):
+        header = PACKET_HEADER_RGX.match(payload)
+        return header.groups() if header else None
+
+    header = PACKET_HEADER_BYTES_RGX.match(payload)
+    if header is None:
+        return None
+    kind, session = header.groups()
+    return kind.decode(), session.decode()
+
+
+def parse_heartbeat(payload):
+    """
+    Returns the number carried by a `~h~<n>` heartbeat payload.
+
+    Args:
+        payload (str | bytes | memoryview): A single frame payload.
+
+    Returns:
+        int | None: The heartbeat number, or `None` if the payload is not a heartbeat.
+    """
+    if isinstance(payload, str):
+        if not payload.startswith(HEARTBEAT_PREFIX):
+            return None
+        digits = payload[3:]
+    else:
+        if payload[:3] != HEARTBEAT_PREFIX_BYTES:
+            return None
+        digits = bytes(payload[3:])
+    try:
+        return int(digits)
+    except ValueError:
+        return None
+
+
 def format_ws_packet(packet):
     """
     Formats a WebSocket packet to the required TradingView format.
 
-    This function converts a dictionary packet into a compact JSON string,
-    replacing any `null` values with empty strings, and prepends the message 
-    with a length header in the format `~m~<length>~m~`.
+    This function converts a dictionary packet into a compact JSON string with
+    the active JSON backend, encoding `None` values as empty strings, and
+    prepends the message with a length header in the format `~m~<length>~m~`.
 
     Args:
         packet (dict or str): The packet to format. If it's a dictionary, 
@@ -75,7 +523,7 @@ def format_ws_packet(packet):
         str: The formatted WebSocket packet as a string.
     """
     if isinstance(packet, dict):
-        packet = json.dumps(packet, separators=(',', ':')).replace('null', '""')
+        packet = _json_backend.dumps(packet, null_as_empty=True)
     return f'~m~{len(packet)}~m~{packet}'
 
 def parse_compressed(data):
@@ -92,4 +540,4 @@ def parse_compressed(data):
         object: The decompressed and parsed JSON content as a Python object 
                 (typically a dict or list).
     """
-    return json.loads(zlib.decompress(base64.b64decode(data)))
+    return _json_backend.loads(zlib.decompress(base64.b64decode(data)))
@@ -15,12 +15,22 @@ Main Components:
 - **QuoteSession**:
     A class representing a single quote session. It manages symbol subscriptions,
     incoming data handling, and session lifecycle with methods like `set_up_quote` and `delete`.
+    Every `qsd` delta is merged into `QuoteSession.store`, read with `snapshot(symbol)`
+    and `snapshot_many(symbols)`.
 
 Key Features:
 -------------
 - Flexible field selection via custom fields or predefined groups.
 - Symbol-level listener registration for quote updates.
 - Automatic cleanup of unsubscribed symbols.
+- Chunked, optionally rate-limited subscription messages that only send the
+  difference to the current symbol set (`SubscriptionManager`).
+- One-shot bulk snapshots without an open stream (`fetch_snapshot`).
+- Optional conflation of `qsd` updates per symbol before the listeners run
+  (`conflate`; see `pytradingview.conflate`).
+- Merged per-symbol quote state (`QuoteStore`) with fixed field slots.
+- Byte and packet counters for the payloads routed to the session (`received`),
+  used by `QuotePool` to report bandwidth per field set.
 - Session management through a client bridge interface.
 
 Dependencies:
@@ -40,9 +50,20 @@ quote_session = QuoteSession(client_bridge)
 quote_session.set_up_quote({'fields': 'price'})
 """
 
+import threading
+
+from .conflate import Conflator, merge_qsd
+from .quote_store import QuoteStore
+from .snapshot import DEFAULT_FIELDS, DEFAULT_MAX_IN_FLIGHT, DEFAULT_TIMEOUT, SnapshotRequest
+from .subscriptions import DEFAULT_CHUNK_SIZE, SubscriptionManager
 from .utils import genSessionID
 
 
+# Packet types handled by `QuoteSession.on_data_q`; the client drops any other
+# type addressed to a quote session before decoding it.
+QUOTE_PACKET_TYPES = frozenset({'qsd', 'quote_completed'})
+
+
 def get_quote_fields(fields_type:str):
     """
     Returns a list of quote fields based on the specified field type.
@@ -84,10 +105,38 @@ def get_quote_fields(fields_type:str):
 
 class QuoteSession:
 
-    def __init__(self, client_bridge) -> None:
+    def __init__(self, client_bridge, chunk_size=DEFAULT_CHUNK_SIZE, chunk_rate=None,
+                 conflate=None, conflate_max_batch=None) -> None:
+        """
+        Args:
+            client_bridge (dict): The client's `sessions`/`send`/`end` bridge.
+            chunk_size (int): Maximum symbols per `quote_add_symbols`, `quote_fast_symbols`
+                or `quote_remove_symbols` message.
+            chunk_rate (float, optional): Maximum subscription messages per second.
+            conflate (float, optional): Seconds to merge `qsd` packets per symbol before
+                the `on_symbol` listeners get one merged packet; every packet when None.
+            conflate_max_batch (int, optional): Deliver the merged packets early once
+                this many symbols are pending.
+
+        Attributes:
+            lock (RLock): Held while a packet updates `store` and while conflated
+                packets are delivered, which happens on the conflator's timer thread.
+        """
         self.__session_id = genSessionID('qs')
         self.__client = client_bridge
         self.__symbol_listeners = {}
+        # Symbols subscribed with `add_symbols`/`set_symbols`, kept without callbacks.
+        self.__added = set()
+        self.lock = threading.RLock()
+        self.store = QuoteStore()
+        # Frame payloads the client routed to this session; see `Client.parse_packet`.
+        self.received = {'bytes': 0, 'packets': 0}
+        self.conflator = (
+            Conflator(self.__deliver, conflate, conflate_max_batch, merge_qsd, lock=self.lock) if conflate else None
+        )
+        self.subscriptions = SubscriptionManager(
+            lambda t, p: self.__client['send'](t, p), self.__session_id, chunk_size, chunk_rate,
+        )
 
     @property
     def session_id(self):
@@ -100,9 +149,23 @@ class QuoteSession:
         listeners = self.__symbol_listeners.setdefault(symbol, [])
         listeners.append(callback)
 
+    def off_symbol(self, symbol: str, callback):
+        """
+        Remove a callback registered with `on_symbol`. A symbol left without
+        callbacks is unsubscribed on its next update, unless it was added with
+        `add_symbols` or `set_symbols`.
+        """
+        listeners = self.__symbol_listeners.get(symbol, [])
+        if callback in listeners:
+            listeners.remove(callback)
+            if not listeners and symbol not in self.__added:
+                del self.__symbol_listeners[symbol]
+
     def add_symbols(self, symbols, fast: bool = True, force_permission: bool = True):
         """
         Subscribe one or more symbols to the active quote session.
+        Their quotes are kept in `store` even without `on_symbol` callbacks.
+        Symbols are sent in chunks by `subscriptions`; already subscribed ones are skipped.
         """
         if isinstance(symbols, str):
             symbols = [symbols]
@@ -113,21 +176,82 @@ class QuoteSession:
 
         for symbol in normalized:
             self.__symbol_listeners.setdefault(symbol, [])
-            payload = [self.__session_id, symbol]
-            if force_permission:
-                payload.append({"flags": ["force_permission"]})
-            self.__client['send']('quote_add_symbols', payload)
+        self.__added.update(normalized)
+        self.subscriptions.add(normalized, fast=fast, force_permission=force_permission)
 
-        if fast:
-            for symbol in normalized:
-                self.__client['send']('quote_fast_symbols', [self.__session_id, symbol])
+    def set_symbols(self, symbols, fast: bool = True, force_permission: bool = True):
+        """
+        Makes `symbols` the session's symbol set: subscribes the new ones and
+        unsubscribes (and forgets the callbacks and quotes of) the others, sending
+        only the difference.
+
+        Returns:
+            tuple: `(added, removed)` symbol lists.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        normalized = [s.strip() for s in symbols if s and s.strip()]
+        added, removed = self.subscriptions.set_symbols(normalized, fast=fast, force_permission=force_permission)
+        for symbol in removed:
+            self.__symbol_listeners.pop(symbol, None)
+            self.store.remove(symbol)
+        for symbol in normalized:
+            self.__symbol_listeners.setdefault(symbol, [])
+        self.__added = set(normalized)
+        return added, removed
 
     def remove_symbol(self, symbol: str):
         """
         Unsubscribe a symbol from the active quote session.
         """
         self.__symbol_listeners.pop(symbol, None)
-        self.__client['send']('quote_remove_symbols', [self.__session_id, symbol])
+        self.__added.discard(symbol)
+        self.store.remove(symbol)
+        self.subscriptions.remove([symbol])
+
+    def snapshot(self, symbol: str):
+        """
+        Returns the latest merged quote fields of `symbol` as a read-only
+        `QuoteSnapshot` mapping (`dict(snapshot)` copies it), or None if no update
+        has arrived for it yet.
+        """
+        return self.store.snapshot(symbol)
+
+    def snapshot_many(self, symbols=None):
+        """
+        Returns `{symbol: fields}` for `symbols` (every stored symbol when None),
+        leaving out symbols without an update yet.
+        """
+        return self.store.snapshot_many(symbols)
+
+    def fetch_snapshot(self, symbols, fields=DEFAULT_FIELDS, timeout=DEFAULT_TIMEOUT,
+                       max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        """
+        Fetches the current quote of many symbols once, without keeping them subscribed.
+
+        Runs on a temporary quote session with `fields`, so this session's symbols
+        and callbacks are not touched. Blocks until every symbol is done: call it
+        from your own thread, not from a client callback.
+
+        Args:
+            symbols (str or list): Symbols to fetch.
+            fields (iterable): Quote fields to request.
+            timeout (float): Seconds a symbol may take to complete once subscribed.
+            max_in_flight (int): Maximum symbols subscribed at once.
+
+        Returns:
+            list: One `SnapshotRow(symbol, state, fields)` per symbol, in input order;
+            `state` is 'complete', 'partial' (timed out) or 'error'.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        bucket = self.subscriptions.bucket
+        session = type(self)(self.__client, self.subscriptions.chunk_size, bucket.rate if bucket else None)
+        session.set_up_quote({'customFields': list(fields)})
+        normalized = [s.strip() for s in symbols if s and s.strip()]
+        return SnapshotRequest(session, normalized, timeout, max_in_flight).run()
 
     def on_data_q(self, packet):
         """
@@ -139,9 +263,11 @@ class QuoteSession:
 
         For both types:
         - Extracts the symbol from the packet.
-        - Checks if there are any registered listeners for that symbol.
-            - If no listeners exist, it sends a request to remove the symbol from the quote session.
-        - If listeners are found, the packet is dispatched to each listener callback.
+        - Checks that the symbol is still subscribed (added, or with callbacks left).
+            - If not, it sends a request to remove the symbol from the quote session.
+        - `qsd` deltas are merged into `self.store`.
+        - The packet is dispatched to each listener callback, or queued in `self.conflator`
+          when the session conflates updates.
 
         Args:
             packet (dict): The incoming WebSocket packet with keys:
@@ -157,24 +283,39 @@ class QuoteSession:
         if packet['type'] == 'quote_completed':
 
             symbol = packet['data'][1]
-            listeners = self.__symbol_listeners.get(symbol, [])
-            if not listeners:
-                self.__client['send']('quote_remove_symbols', [self.__session_id, symbol])
+            listeners = self.__symbol_listeners.get(symbol)
+            if listeners is None:
+                self.subscriptions.remove([symbol])
                 return
 
+            if self.conflator is not None:
+                self.conflator.flush_key(symbol)
             for h in listeners:
                 h(packet)
 
         if packet['type'] == 'qsd':
-            symbol = packet['data'][1]['n']
-            listeners = self.__symbol_listeners.get(symbol, [])
-            if not listeners:
-                self.__client['send']('quote_remove_symbols', [self.__session_id, symbol])
+            data = packet['data'][1]
+            symbol = data['n']
+            listeners = self.__symbol_listeners.get(symbol)
+            if listeners is None:
+                with self.lock:
+                    self.store.remove(symbol)
+                self.subscriptions.remove([symbol])
                 return
 
+            with self.lock:
+                self.store.update(symbol, data.get('v'), data.get('s'))
+                if self.conflator is not None:
+                    self.conflator.push(symbol, packet)
+                    return
             for h in listeners:
                 h(packet)
 
+    def __deliver(self, symbol, packet):
+        """Runs the listeners of `symbol` with a conflated `qsd` packet."""
+        for h in self.__symbol_listeners.get(symbol, ()):
+            h(packet)
+
     def set_up_quote(self, options: dict = None):
         """
         Initializes and configures a quote session for receiving real-time market data.
@@ -207,7 +348,12 @@ class QuoteSession:
         if options is None:
             options = {}
 
-        self.__client['sessions'][self.__session_id] = {'type':'quote', 'onData':self.on_data_q}
+        self.__client['sessions'][self.__session_id] = {
+            'type': 'quote',
+            'onData': self.on_data_q,
+            'types': QUOTE_PACKET_TYPES,
+            'received': self.received,
+        }
 
         fields = (options.get('customFields') if options.get('customFields') and
                   (len(options.get('customFields')) > 0)
@@ -215,6 +361,7 @@ class QuoteSession:
                     get_quote_fields(options.get('fields'))
         )
 
+        self.store.set_fields(fields)
         self.__client['send']('quote_create_session', [self.__session_id])
         self.__client['send']('quote_set_fields', [self.__session_id]+[fields])
 
@@ -238,5 +385,9 @@ class QuoteSession:
             - This operation is irreversible for the current session ID once called.
         """
 
+        self.subscriptions.cancel()
+        if self.conflator is not None:
+            self.conflator.close()
         self.__client['send']('quote_delete_session', [self.__session_id])
         del self.__client['sessions'][self.__session_id]
+        self.store.clear()
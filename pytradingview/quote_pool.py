@@ -0,0 +1,204 @@
+"""
+Quote sessions pooled by field set.
+
+A `QuoteSession` requests one field set for every symbol it carries, so a few
+symbols that need the full field list and thousands that only need `lp` would
+all pay full-field bandwidth and decoding in one session. `QuotePool` keeps one
+session per distinct field set and routes each subscription to the session with
+the fewest fields that covers it:
+
+- a symbol already carried by a session whose fields cover the request is not
+  subscribed a second time; its callback is added to that session;
+- otherwise the smallest covering session with at most `max_extra_fields` fields
+  beyond the request is reused, and a session for exactly the requested fields
+  is created when there is none;
+- a session left without symbols is deleted;
+- `stats()` reports, per session, its field and symbol counts and the bytes and
+  packets the client routed to it.
+
+Example:
+--------
+```python
+pool = QuotePool(client.client_bridge)
+pool.subscribe(watchlist, 'all', on_quote)          # ~50 symbols, every field
+pool.subscribe(universe, ['lp'])                    # 3,000 symbols, last price only
+pool.snapshot('NASDAQ:AAPL', ['lp'])['lp']
+```
+"""
+
+import threading
+
+from .quote import QuoteSession, get_quote_fields
+from .subscriptions import DEFAULT_CHUNK_SIZE
+
+
+def quote_fields(fields):
+    """Returns the field list for a `get_quote_fields` preset name or an iterable of field names."""
+    if isinstance(fields, str):
+        return get_quote_fields(fields)
+    return list(dict.fromkeys(fields))
+
+
+class QuotePool:
+    """
+    Quote sessions created and reused per field set.
+
+    Args:
+        client_bridge (dict): The client's `sessions`/`send`/`end` bridge.
+        max_extra_fields (int): Fields a reused session may request beyond a new
+            subscription's fields. With 0, symbols only join a session with exactly
+            their field set, unless they are already carried by a covering one.
+        chunk_size (int): Passed to every `QuoteSession`.
+        chunk_rate (float, optional): Passed to every `QuoteSession`.
+        session_class (type): Session factory, `QuoteSession` by default.
+    """
+
+    def __init__(self, client_bridge, max_extra_fields=0, chunk_size=DEFAULT_CHUNK_SIZE, chunk_rate=None,
+                 session_class=QuoteSession):
+        self.max_extra_fields = max_extra_fields
+        self.__client = client_bridge
+        self.__chunk_size = chunk_size
+        self.__chunk_rate = chunk_rate
+        self.__session_class = session_class
+        self.__lock = threading.RLock()
+        self.__sessions = {}    # frozenset(fields) -> QuoteSession
+        self.__carried = {}     # frozenset(fields) -> {symbol: number of routes}
+        self.__routes = {}      # (symbol, frozenset(requested fields)) -> (session key, callbacks)
+
+    def __len__(self):
+        return len(self.__sessions)
+
+    @property
+    def sessions(self):
+        """The pool's sessions, in creation order."""
+        with self.__lock:
+            return list(self.__sessions.values())
+
+    def subscribe(self, symbols, fields='price', callback=None, fast=True):
+        """
+        Subscribes `symbols` with at least `fields`.
+
+        Args:
+            symbols (str or list): Symbols to subscribe.
+            fields (str or iterable): A `get_quote_fields` preset ('price', 'all') or field names.
+            callback (callable, optional): Registered with `QuoteSession.on_symbol` for each symbol.
+            fast (bool): Also send `quote_fast_symbols`.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        fields = quote_fields(fields)
+        if not fields:
+            raise ValueError("fields must not be empty")
+        requested = frozenset(fields)
+        groups = {}
+        with self.__lock:
+            for symbol in symbols:
+                symbol = symbol.strip() if symbol else ''
+                if not symbol:
+                    continue
+                route = self.__routes.get((symbol, requested))
+                if route is None:
+                    key = self.__route(symbol, requested, fields)
+                    route = self.__routes[(symbol, requested)] = (key, [])
+                    carried = self.__carried[key]
+                    carried[symbol] = carried.get(symbol, 0) + 1
+                key, callbacks = route
+                session = self.__sessions[key]
+                if callback is not None:
+                    callbacks.append(callback)
+                    session.on_symbol(symbol, callback)
+                groups.setdefault(key, []).append(symbol)
+            for key, group in groups.items():
+                self.__sessions[key].add_symbols(group, fast=fast)
+
+    def unsubscribe(self, symbols, fields='price'):
+        """
+        Drops the subscriptions made with `fields` for `symbols`, with their callbacks.
+        A symbol is unsubscribed from its session once no subscription uses it there.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        requested = frozenset(quote_fields(fields))
+        with self.__lock:
+            for symbol in symbols:
+                route = self.__routes.pop((symbol, requested), None)
+                if route is None:
+                    continue
+                key, callbacks = route
+                session = self.__sessions[key]
+                for callback in callbacks:
+                    session.off_symbol(symbol, callback)
+                carried = self.__carried[key]
+                carried[symbol] -= 1
+                if carried[symbol]:
+                    continue
+                del carried[symbol]
+                if carried:
+                    session.remove_symbol(symbol)
+                else:
+                    del self.__carried[key]
+                    del self.__sessions[key]
+                    session.delete()
+
+    def session_for(self, symbol, fields='price'):
+        """Returns the session carrying the subscription of `symbol` with `fields`, or None."""
+        route = self.__routes.get((symbol, frozenset(quote_fields(fields))))
+        return self.__sessions.get(route[0]) if route else None
+
+    def snapshot(self, symbol, fields='price'):
+        """
+        Returns the latest fields of the subscription of `symbol` with `fields`, or None.
+        The snapshot may hold more fields than requested when the session covers more.
+        """
+        session = self.session_for(symbol, fields)
+        return session.snapshot(symbol) if session else None
+
+    def stats(self):
+        """
+        Returns:
+            list: One dict per session: `session_id`, `fields` and `symbols` counts,
+            and the `bytes` and `packets` received for it.
+        """
+        with self.__lock:
+            return [
+                {
+                    'session_id': session.session_id,
+                    'fields': len(key),
+                    'symbols': len(self.__carried[key]),
+                    'bytes': session.received['bytes'],
+                    'packets': session.received['packets'],
+                }
+                for key, session in self.__sessions.items()
+            ]
+
+    def close(self):
+        """Deletes every session of the pool."""
+        with self.__lock:
+            sessions = list(self.__sessions.values())
+            self.__sessions.clear()
+            self.__carried.clear()
+            self.__routes.clear()
+        for session in sessions:
+            session.delete()
+
+    def __route(self, symbol, requested, fields):
+        """Returns the key of the session a new subscription goes to, creating it if needed."""
+        best = None
+        for key in self.__sessions:
+            if not key >= requested:
+                continue
+            if symbol in self.__carried[key]:
+                # Already carried with enough fields: no second subscription.
+                if best is None or best[0] or len(key) < len(best[1]):
+                    best = (False, key)
+            elif len(key) - len(requested) <= self.max_extra_fields:
+                if best is None or (best[0] and len(key) < len(best[1])):
+                    best = (True, key)
+        if best is not None:
+            return best[1]
+
+        session = self.__session_class(self.__client, self.__chunk_size, self.__chunk_rate)
+        session.set_up_quote({'customFields': fields})
+        self.__sessions[requested] = session
+        self.__carried[requested] = {}
+        return requested
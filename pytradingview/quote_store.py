@@ -0,0 +1,177 @@
+"""
+Merged quote state.
+
+`qsd` packets only carry the fields that changed. `QuoteStore` merges them into
+one compact record per symbol so consumers can read the latest quote without
+keeping their own dict per symbol:
+
+- Field names map to fixed slots, in the order given to `quote_set_fields`; a
+  record is a list with one value per slot instead of a dict per symbol. Fields
+  the server sends outside that set get new slots on first sight.
+- Symbol keys are interned, so the many copies of a symbol name decoded from
+  packets do not stay alive in the store.
+- `snapshot(symbol)` is one dictionary lookup plus a copy of the record's
+  value list, wrapped in a read-only `QuoteSnapshot` mapping that resolves field
+  names through the shared slot table; `snapshot_many(symbols)` reads many
+  symbols at once, and `get(symbol, field)` reads a single slot.
+"""
+
+import sys
+from collections.abc import Mapping
+
+
+# Slot value of a field the server has not sent yet.
+_UNSET = object()
+
+
+class QuoteSnapshot(Mapping):
+    """
+    Read-only mapping of one symbol's quote fields at the time of the snapshot.
+    Fields the server had not sent yet are absent. `dict(snapshot)` gives a plain dict.
+    """
+
+    __slots__ = ('_fields', '_slots', '_values')
+
+    def __init__(self, fields, slots, values):
+        self._fields = fields
+        self._slots = slots
+        self._values = values
+
+    def __getitem__(self, field):
+        slot = self._slots.get(field)
+        if slot is not None and slot < len(self._values):
+            value = self._values[slot]
+            if value is not _UNSET:
+                return value
+        raise KeyError(field)
+
+    def __iter__(self):
+        for field, value in zip(self._fields, self._values):
+            if value is not _UNSET:
+                yield field
+
+    def __len__(self):
+        return len(self._values) - self._values.count(_UNSET)
+
+    def __repr__(self):
+        return f'QuoteSnapshot({dict(self)!r})'
+
+
+class QuoteStore:
+    """
+    Latest quote fields per symbol.
+
+    Args:
+        fields (iterable, optional): Field names, usually those passed to `quote_set_fields`.
+    """
+
+    def __init__(self, fields=()):
+        self.set_fields(fields)
+
+    def set_fields(self, fields):
+        """Sets the field slots and drops every record."""
+        self.fields = []
+        self.__slots = {}
+        self.__records = {}
+        self.__errors = {}
+        for field in fields:
+            self.__slot(field)
+
+    def __slot(self, field):
+        slot = self.__slots.get(field)
+        if slot is None:
+            slot = self.__slots[field] = len(self.fields)
+            self.fields.append(sys.intern(field))
+        return slot
+
+    def __len__(self):
+        return len(self.__records)
+
+    def __contains__(self, symbol):
+        return symbol in self.__records
+
+    def symbols(self):
+        """Returns the symbols with a record."""
+        return list(self.__records)
+
+    def update(self, symbol, values, status=None):
+        """
+        Merges one `qsd` delta into the record of `symbol`.
+
+        Args:
+            symbol (str): The `n` of the packet.
+            values (dict): The `v` of the packet; fields missing from it keep their value.
+            status (str, optional): The `s` of the packet ('ok' or 'error').
+        """
+        record = self.__records.get(symbol)
+        if record is None:
+            symbol = sys.intern(symbol)
+            record = self.__records[symbol] = [_UNSET] * len(self.fields)
+        if status is not None and status != 'ok':
+            self.__errors[symbol] = status
+        elif status is not None and self.__errors:
+            self.__errors.pop(symbol, None)
+        if not values:
+            return
+        slots = self.__slots
+        try:
+            for field, value in values.items():
+                record[slots[field]] = value
+        except (KeyError, IndexError):
+            # A field without a slot yet, or a record older than the slot: grow and redo.
+            for field in values:
+                self.__slot(field)
+            record.extend([_UNSET] * (len(self.fields) - len(record)))
+            for field, value in values.items():
+                record[slots[field]] = value
+
+    def snapshot(self, symbol):
+        """
+        Returns the latest fields of `symbol` as a `QuoteSnapshot`, or None for an
+        unknown symbol. Later updates do not change a snapshot already taken.
+        """
+        record = self.__records.get(symbol)
+        if record is None:
+            return None
+        return QuoteSnapshot(self.fields, self.__slots, record[:])
+
+    def snapshot_many(self, symbols=None):
+        """
+        Returns `{symbol: snapshot}` for `symbols` (every symbol when None),
+        skipping unknown symbols.
+        """
+        records = self.__records
+        fields, slots = self.fields, self.__slots
+        if symbols is None:
+            symbols = records
+        snapshots = {}
+        for symbol in symbols:
+            record = records.get(symbol)
+            if record is not None:
+                snapshots[symbol] = QuoteSnapshot(fields, slots, record[:])
+        return snapshots
+
+    def get(self, symbol, field, default=None):
+        """Returns one field of `symbol`, or `default` if it is unknown or not sent yet."""
+        record = self.__records.get(symbol)
+        slot = self.__slots.get(field)
+        if record is None or slot is None or slot >= len(record):
+            return default
+        value = record[slot]
+        return default if value is _UNSET else value
+
+    def status(self, symbol):
+        """Returns the last status the server sent for `symbol`: 'ok', 'error', or None if unknown."""
+        if symbol not in self.__records:
+            return None
+        return self.__errors.get(symbol, 'ok')
+
+    def remove(self, symbol):
+        """Drops the record of `symbol`."""
+        self.__records.pop(symbol, None)
+        self.__errors.pop(symbol, None)
+
+    def clear(self):
+        """Drops every record, keeping the field slots."""
+        self.__records.clear()
+        self.__errors.clear()
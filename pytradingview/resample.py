@@ -0,0 +1,469 @@
+"""
+Local timeframe resampling.
+
+`Resampler` aggregates one base series (e.g. 1 minute bars) into a higher
+timeframe on the client, so several timeframes of a symbol can be followed with
+a single server series instead of one `set_market` per timeframe:
+
+```python
+chart.set_market('NASDAQ:AAPL', {'timeframe': '1'})
+hourly = chart.resample('60')
+hourly.on_update(lambda changes: print(hourly.get_periods))
+```
+
+- Each base bar is folded into the forming bar in O(1): the resampler keeps the
+  aggregate of the bucket's finished base bars plus the base bar still forming,
+  and only converts times to the session's timezone when a bar opens a new
+  bucket.
+- Buckets follow the trading session and timezone: intraday bars are aligned to
+  the session open (midnight without a session) and cut at the session close;
+  daily, weekly and monthly bars start at the session open of their first
+  trading day, across DST changes. Base bars outside the session are skipped.
+- The resampled series reads like a native one: `candles`, `get_periods`,
+  `get_all_periods`, `to_numpy`/`to_dataframe`, and `seriesLoaded`/`update`
+  events with the same arguments. `barClosed` also reports each bar once the
+  next bucket starts.
+- History can come from the chart's `seriesLoaded` pages, from `load(batch)`, or
+  from `ChartSession.download_data(writer=resampler)`; older pages are merged in
+  front of the bars already aggregated.
+"""
+
+import datetime
+import re
+from bisect import bisect_left
+
+from .candles import CANDLE_COLUMNS, CandleStore
+from .events import EventBus
+
+
+resampler_events = ('seriesLoaded', 'update', 'barClosed', 'event')
+
+DAY_MINUTES = 24 * 60
+
+
+def parse_timeframe(timeframe):
+    """
+    Splits a TradingView timeframe into `(unit, count)`.
+
+    Minutes ('1', '60', '240') and seconds ('30S') give `('S', seconds)`; 'D' and
+    'W' (or '1D', '1W') give `('D', 1)` and `('W', 1)`; months ('M', '3M') give
+    `('M', months)`.
+
+    Raises:
+        ValueError: For an unsupported timeframe.
+    """
+    match = re.fullmatch(r'(\d*)([SDWM]?)', str(timeframe).strip().upper())
+    if not match or not (match.group(1) or match.group(2)):
+        raise ValueError(f"unsupported timeframe {timeframe!r}")
+    count = int(match.group(1) or 1)
+    unit = match.group(2)
+    if count < 1 or (unit in ('D', 'W') and count != 1):
+        raise ValueError(f"unsupported timeframe {timeframe!r}")
+    if not unit:
+        return 'S', count * 60
+    return unit, count
+
+
+def parse_session(session):
+    """
+    Parses a TradingView session string such as '0930-1600', '1700-1600:23456'
+    (days 1 = Sunday .. 7 = Saturday) or '0400-0930,0930-1600' (spanning from the
+    first open to the last close).
+
+    Returns:
+        tuple: `(open, close, days)`, minutes after midnight and a frozenset of
+        day numbers or None. A session without hours ('24x7', '0000-0000' or
+        None) is `(0, 1440, days)`; `close <= open` means the session starts the
+        evening before its trading day.
+    """
+    if not session or session == '24x7':
+        return 0, DAY_MINUTES, None
+    ranges = []
+    days = set()
+    for part in str(session).split(','):
+        hours, _, weekdays = part.partition(':')
+        match = re.fullmatch(r'(\d{2})(\d{2})-(\d{2})(\d{2})', hours.strip())
+        if not match:
+            raise ValueError(f"unsupported session {session!r}")
+        open_hour, open_minute, close_hour, close_minute = (int(value) for value in match.groups())
+        ranges.append((open_hour * 60 + open_minute, close_hour * 60 + close_minute))
+        days.update(int(day) for day in weekdays if day.isdigit())
+    open, close = ranges[0][0], ranges[-1][1]
+    if open == close == 0:
+        close = DAY_MINUTES
+    return open, close, frozenset(days) or None
+
+
+def check_timeframes(timeframe, base):
+    """
+    Checks that bars of `base` timeframe aggregate into whole `timeframe` bars:
+    intraday bars into intraday bars of a multiple of their length or into D, W
+    or M bars, days into weeks or months, and months into a multiple of months.
+
+    Raises:
+        ValueError: When `timeframe` is not a multiple of `base`.
+    """
+    unit, count = parse_timeframe(timeframe)
+    base_unit, base_count = parse_timeframe(base)
+    if base_unit == 'S':
+        valid = unit != 'S' or count % base_count == 0
+    elif base_unit == 'D':
+        valid = unit != 'S'
+    else:
+        valid = unit == base_unit and count % base_count == 0
+    if not valid:
+        raise ValueError(f"timeframe {timeframe!r} is not a multiple of the base timeframe {base!r}")
+
+
+def _zone_info():
+    try:
+        from zoneinfo import ZoneInfo
+    except ImportError:
+        try:
+            from backports.zoneinfo import ZoneInfo
+        except ImportError as exc:
+            raise ImportError(
+                'Time zone names require zoneinfo (Python 3.9+) or backports.zoneinfo; '
+                'install it or pass a datetime.tzinfo instead'
+            ) from exc
+    return ZoneInfo
+
+
+def _zone(timezone):
+    if isinstance(timezone, datetime.tzinfo):
+        return timezone
+    if timezone in (None, 'UTC', 'Etc/UTC'):
+        return datetime.timezone.utc
+    return _zone_info()(timezone)
+
+
+def _combine(older, newer):
+    """Aggregates two `(open, high, low, close, volume)` tuples; `older` may be None."""
+    if older is None:
+        return newer
+    return (
+        older[0],
+        older[1] if older[1] > newer[1] else newer[1],
+        older[2] if older[2] < newer[2] else newer[2],
+        newer[3],
+        older[4] + newer[4],
+    )
+
+
+class Resampler:
+    """
+    Aggregates a base series into a higher timeframe.
+
+    Args:
+        timeframe (str): Target timeframe, e.g. '5', '60', 'D', 'W' or 'M'. It
+            must be a multiple of the base series' timeframe; see `check_timeframes`.
+        chart (ChartSession, optional): Base series to follow; see `attach`.
+        timezone (str or tzinfo, optional): Time zone of the bucket boundaries.
+            Defaults to the chart symbol's `timezone`, else UTC. Names need
+            `zoneinfo`, or `backports.zoneinfo` before Python 3.9.
+        session (str, optional): Trading session, e.g. '0930-1600'. Defaults to
+            the chart symbol's `session`; pass '24x7' to ignore it.
+        history_capacity (int, optional): Maximum number of resampled bars kept.
+    Raises:
+        ValueError: For an unsupported timeframe, or one that is not a multiple of
+            the chart's.
+        ImportError: When a time zone name may be needed and no `zoneinfo` module
+            is available, instead of later on the receive thread.
+    Attributes:
+        candles (CandleStore): The resampled bars.
+        events (EventBus): 'seriesLoaded', 'update', 'barClosed' and 'event'.
+        skipped (int): Base bars dropped because they fall outside the session.
+        late (int): Base bars dropped because they are older than the forming one.
+    """
+
+    def __init__(self, timeframe, chart=None, timezone=None, session=None, history_capacity=None):
+        self.timeframe = str(timeframe)
+        self.__unit, self.__count = parse_timeframe(timeframe)
+        if isinstance(timezone, str):
+            timezone = _zone(timezone)
+        elif timezone is None and chart is not None:
+            _zone_info()
+        self.__timezone = timezone
+        self.__session = session
+        self.candles = CandleStore(history_capacity)
+        self.events = EventBus(resampler_events)
+        self.skipped = 0
+        self.late = 0
+        self.__chart = None
+        self.__subscriptions = []
+        self.__reset()
+        if chart is not None:
+            self.attach(chart)
+
+    def __reset(self):
+        self.__zone = None
+        self.__hours = None
+        self.__start = None    # current bucket: [start, end)
+        self.__end = None
+        self.__closed = None   # aggregate of the bucket's finished base bars
+        self.__bar = None      # forming base bar: [time, open, high, low, close, volume]
+        self.__base_first = None
+
+    def clear(self):
+        """Removes every resampled bar and forgets the base series' state."""
+        self.candles.clear()
+        self.__reset()
+
+    @property
+    def get_periods(self):
+        return self.candles.last()
+
+    @property
+    def get_all_periods(self):
+        return [(row['time'], row) for row in reversed(self.candles.rows())]
+
+    def handleEvent(self, event, *args):
+        self.events.emit(event, args)
+        self.events.emit('event', event, args)
+
+    def attach(self, chart):
+        """
+        Follows `chart`: its history pages (`seriesLoaded`) and live updates are
+        resampled as they arrive, and a new symbol (`symbolLoaded`) starts over.
+        Bars already in `chart.candles` are loaded right away.
+
+        Raises:
+            ValueError: When the resampler's timeframe is not a multiple of the chart's.
+        """
+        if chart.timeframe is not None:
+            check_timeframes(self.timeframe, chart.timeframe)
+        self.detach()
+        self.__chart = chart
+        self.__subscriptions = [
+            chart.on_symbol_loaded(lambda args: self.clear()),
+            chart.on_series_loaded(lambda args: self.load(args[0])),
+            chart.on_update(self.__on_chart_update),
+        ]
+        if chart.candles:
+            self.load(chart.candles.batch())
+        return self
+
+    def detach(self):
+        """Stops following the chart session."""
+        for subscription in self.__subscriptions:
+            subscription.cancel()
+        self.__subscriptions = []
+        self.__chart = None
+
+    def __on_chart_update(self, args):
+        if '$prices' not in args[0]:
+            return
+        source = self.__chart.candles
+        if not source:
+            return
+        if self.__bar is None:
+            first, stop = len(source) - 1, len(source)
+        else:
+            first, stop = source.index_range(self.__bar[0])
+        columns = [source.view(name) for name in CANDLE_COLUMNS]
+        closed = []
+        for index in range(first, stop):
+            bar = self.__ingest(*(column[index] for column in columns))
+            if bar is not None:
+                closed.append(bar)
+        self.__publish(closed)
+
+    def update(self, time, open, high, low, close, volume=0.0):
+        """
+        Feeds one live base bar: a new bar, or a new value of the forming one.
+        Emits 'barClosed' when it opens a new bucket, then 'update'.
+        """
+        bar = self.__ingest(time, open, high, low, close, volume)
+        self.__publish([bar] if bar is not None else [])
+
+    def __publish(self, closed):
+        for bar in closed:
+            self.handleEvent('barClosed', bar)
+        self.handleEvent('update', ['$prices'])
+
+    def load(self, batch, first=0, stop=None):
+        """
+        Feeds bars `first..stop-1` of a history `CandleBatch` (ascending times)
+        and emits 'seriesLoaded' with the resampled bars they touched.
+
+        Bars newer than the forming base bar are appended; bars older than the
+        oldest base bar seen are merged in front. Bars in between were already
+        aggregated and are ignored.
+        """
+        columns = [batch.columns[name] for name in CANDLE_COLUMNS]
+        times = columns[0]
+        stop = len(times) if stop is None else stop
+        if stop <= first:
+            return
+        low = high = None
+
+        if self.__base_first is not None and times[first] < self.__base_first:
+            older = bisect_left(times, self.__base_first, first, stop)
+            low, high = self.__prepend(columns, first, older)
+        if self.__bar is not None:
+            first = bisect_left(times, self.__bar[0], first, stop)
+
+        for index in range(first, stop):
+            self.__ingest(*(column[index] for column in columns))
+            if low is None:
+                low = self.__start
+        if first < stop and self.__start is not None:
+            high = self.__start
+
+        if low is not None:
+            self.handleEvent('seriesLoaded', self.candles.batch(low, high))
+
+    def write(self, batch, first, stop):
+        """Download writer interface: `download_data(..., writer=resampler)`."""
+        self.load(batch, first, stop)
+
+    def close(self):
+        pass
+
+    def __ingest(self, time, open, high, low, close, volume):
+        """Folds one base bar into the forming bar. Returns the bar it closed, if any."""
+        bar = self.__bar
+        if bar is not None and time <= bar[0]:
+            if time < bar[0]:
+                self.late += 1
+                return None
+            bar[1:] = open, high, low, close, volume
+            self.__write()
+            return None
+
+        if self.__start is not None and self.__start <= time < self.__end:
+            self.__closed = _combine(self.__closed, tuple(bar[1:]))
+            self.__bar = [time, open, high, low, close, volume]
+            self.__write()
+            return None
+
+        bucket = self.__bucket(time)
+        if bucket is None:
+            self.skipped += 1
+            return None
+        finished = self.__current() if bar is not None else None
+        self.__start, self.__end = bucket
+        self.__closed = None
+        self.__bar = [time, open, high, low, close, volume]
+        if self.__base_first is None:
+            self.__base_first = time
+        self.__write()
+        if finished is None:
+            return None
+        return {
+            'time': finished[0], 'open': finished[1], 'close': finished[4],
+            'high': finished[2], 'low': finished[3], 'volume': round(finished[5] * 100) / 100,
+        }
+
+    def __current(self):
+        return (self.__start,) + _combine(self.__closed, tuple(self.__bar[1:]))
+
+    def __write(self):
+        self.candles.upsert(*self.__current())
+
+    def __prepend(self, columns, first, stop):
+        """Aggregates base bars older than any seen so far and merges them in front."""
+        bars = []
+        start = end = None
+        values = None
+        for index in range(first, stop):
+            time = columns[0][index]
+            if start is None or not start <= time < end:
+                bucket = self.__bucket(time)
+                if bucket is None:
+                    self.skipped += 1
+                    continue
+                if values is not None:
+                    bars.append((start,) + values)
+                start, end = bucket
+                values = None
+            values = _combine(values, tuple(column[index] for column in columns[1:]))
+        if values is None:
+            return None, None
+        self.__base_first = columns[0][first]
+
+        if start == self.__start:
+            # The oldest known bucket is still forming: extend its finished part.
+            self.__closed = values if self.__closed is None else _combine(values, self.__closed)
+        elif self.candles.first_time == start:
+            stored = tuple(self.candles.view(name, start, start)[0] for name in CANDLE_COLUMNS[1:])
+            bars.append((start,) + _combine(values, stored))
+        else:
+            bars.append((start,) + values)
+
+        if bars:
+            self.candles.extend(bars)
+        if start == self.__start:
+            self.__write()
+        return (bars[0][0] if bars else start), start
+
+    def __bucket(self, time):
+        """Returns the `(start, end)` bucket holding base bar `time`, or None outside the session."""
+        if self.__zone is None:
+            infos = self.__chart.get_infos if self.__chart is not None else {}
+            self.__zone = _zone(self.__timezone or infos.get('timezone'))
+            self.__hours = parse_session(self.__session if self.__session is not None else infos.get('session'))
+        local = datetime.datetime.fromtimestamp(time, self.__zone)
+        day = self.__trading_day(local)
+        if day is None:
+            return None
+
+        unit, count = self.__unit, self.__count
+        if unit == 'S':
+            open = self.__open(day)
+            start = open + (time - open) // count * count
+            return start, min(start + count, self.__close(day))
+        if unit == 'D':
+            return self.__open(day), self.__close(day)
+        if unit == 'W':
+            monday = day - datetime.timedelta(days=day.weekday())
+            return self.__open(monday), self.__open(monday + datetime.timedelta(days=7))
+        month = (day.year * 12 + day.month - 1) // count * count
+        following = month + count
+        return (
+            self.__open(datetime.date(month // 12, month % 12 + 1, 1)),
+            self.__open(datetime.date(following // 12, following % 12 + 1, 1)),
+        )
+
+    def __trading_day(self, local):
+        open, close, days = self.__hours
+        minute = local.hour * 60 + local.minute
+        day = local.date()
+        if open < close:
+            if not open <= minute < close:
+                return None
+        elif minute >= open:
+            day += datetime.timedelta(days=1)
+        elif minute >= close:
+            return None
+        if days is not None and day.isoweekday() % 7 + 1 not in days:
+            return None
+        return day
+
+    def __at(self, day, minutes):
+        midnight = datetime.datetime(day.year, day.month, day.day, tzinfo=self.__zone)
+        return int((midnight + datetime.timedelta(minutes=minutes)).timestamp())
+
+    def __open(self, day):
+        open, close, _ = self.__hours
+        return self.__at(day, open if open < close else open - DAY_MINUTES)
+
+    def __close(self, day):
+        return self.__at(day, self.__hours[1])
+
+    def to_numpy(self, columns=CANDLE_COLUMNS, start=None, end=None):
+        """Returns the resampled bars as NumPy arrays; see `CandleStore.to_numpy`."""
+        return self.candles.to_numpy(columns, start, end)
+
+    def to_dataframe(self, columns=('open', 'high', 'low', 'close', 'volume'), start=None, end=None):
+        """Returns the resampled bars as a pandas DataFrame; see `CandleStore.to_dataframe`."""
+        return self.candles.to_dataframe(columns, start, end)
+
+    def on_series_loaded(self, cb):
+        return self.events.on('seriesLoaded', cb)
+
+    def on_update(self, cb):
+        return self.events.on('update', cb)
+
+    def on_bar_closed(self, cb):
+        return self.events.on('barClosed', cb)
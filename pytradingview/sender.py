@@ -0,0 +1,438 @@
+"""
+Outbound packet queue for the TradingView WebSocket client.
+
+`SendQueue` is a thread-safe, prioritised FIFO. Each priority class has its own
+`collections.deque` lane, so both ends are O(1), and the client's writer thread
+always takes from the highest non-empty lane:
+
+- `HEARTBEAT`: `~h~` ping replies, which the server drops us for if they lag.
+- `CONTROL`: session control such as `set_auth_token`, `*_create_session` or
+  `quote_set_fields`.
+- `DATA`: bulk data requests (`DATA_MESSAGE_TYPES`), e.g. `quote_add_symbols`,
+  `resolve_symbol` or `request_more_data`.
+
+Packets keep their order within a class. Any class can be throttled with a
+`TokenBucket`; the client uses one for `DATA` so a large subscription burst is
+spread out without holding back heartbeats.
+
+Packets of one session also keep their order across classes: a packet put with
+a `session` while that session still has packets waiting in a lower lane joins
+that lane instead, behind them. So a `quote_delete_session` or `remove_series`
+never overtakes the same session's queued `quote_add_symbols` or
+`create_series`, however long the rate limit holds the `DATA` lane.
+
+When the queue is bounded (`maxsize > 0`), the bound applies to `DATA` packets
+only: heartbeat replies and control packets are always accepted, so a full
+queue never delays a `~h~` reply or loses a `set_auth_token`. A backpressure
+policy decides what happens to a data packet that does not fit:
+
+- `'block'`: wait until the writer frees a slot (optionally up to a timeout).
+  `put(..., block=False)` raises `SendQueueFull` instead, for callers that
+  cannot wait, e.g. when no writer is running or on the thread the writer
+  depends on.
+- `'drop_oldest'`: discard the oldest queued data packet and report it to
+  `on_drop`.
+- `'raise'`: raise `SendQueueFull` immediately.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+RAISE = 'raise'
+
+BACKPRESSURE_POLICIES = (BLOCK, DROP_OLDEST, RAISE)
+
+HEARTBEAT = 0
+CONTROL = 1
+DATA = 2
+
+PRIORITY_NAMES = ('heartbeat', 'control', 'data')
+
+DATA_MESSAGE_TYPES = frozenset({
+    'quote_add_symbols',
+    'quote_fast_symbols',
+    'quote_remove_symbols',
+    'resolve_symbol',
+    'create_series',
+    'modify_series',
+    'request_more_data',
+    'create_study',
+    'modify_study',
+    'remove_study',
+    'replay_add_series',
+})
+
+
+def packet_priority(message_type):
+    """
+    Classifies an outbound message by the type passed to `Client.send`.
+
+    Args:
+        message_type (str or dict): The message type, a raw `~h~<n>` heartbeat
+            string, or a full packet dictionary.
+
+    Returns:
+        int: `HEARTBEAT`, `CONTROL` or `DATA`.
+    """
+    if isinstance(message_type, dict):
+        message_type = message_type.get('m')
+    if not isinstance(message_type, str):
+        return CONTROL
+    if message_type.startswith('~h~'):
+        return HEARTBEAT
+    if message_type in DATA_MESSAGE_TYPES:
+        return DATA
+    return CONTROL
+
+
+class SendQueueFull(RuntimeError):
+    """Raised when a bounded send queue cannot accept another packet."""
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter. Not thread-safe on its own; `SendQueue` only uses
+    it while holding its lock.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (int, optional): Bucket capacity, i.e. how many packets may go out
+            back to back. Defaults to one second's worth of tokens.
+        clock (callable): Monotonic time source, overridable for tests.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = burst if burst else max(1, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._stamp = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def delay(self):
+        """Seconds until a token is available; 0 if one is available now."""
+        self._refill()
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def consume(self):
+        """
+        Takes a token if one is available.
+
+        Returns:
+            bool: True if a token was taken.
+        """
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class SendQueue:
+    """
+    Thread-safe prioritised queue of formatted packets waiting to be written.
+
+    Args:
+        maxsize (int): Maximum number of queued `DATA` packets; 0 means unbounded.
+            Heartbeat and control packets are never refused, dropped or delayed.
+        policy (str): Backpressure policy applied when the queue is full, one of
+            `BACKPRESSURE_POLICIES`.
+        put_timeout (float, optional): With the `'block'` policy, how long `put`
+            waits for room before raising `SendQueueFull`. Waits forever if None.
+        rate_limits (dict, optional): Maps a priority class to the `TokenBucket`
+            that throttles it.
+        on_drop (callable, optional): Called with each packet the `'drop_oldest'`
+            policy discards, after the queue's lock is released.
+    """
+
+    def __init__(self, maxsize=0, policy=BLOCK, put_timeout=None, rate_limits=None, on_drop=None):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"policy must be one of {BACKPRESSURE_POLICIES}, got {policy!r}")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.put_timeout = put_timeout
+        self.rate_limits = dict(rate_limits or {})
+        self.on_drop = on_drop
+        self.sent = 0
+        self.dropped = 0
+
+        self._lanes = tuple(deque() for _ in PRIORITY_NAMES)
+        # session -> packets of that session waiting in each lane
+        self._sessions = {}
+        self._size = 0
+        # Queued packets put as DATA, the ones `maxsize` applies to.
+        self._bounded = 0
+        self._unfinished = 0
+        self._closed = False
+        self._dequeued = [0] * len(PRIORITY_NAMES)
+        self._wait_total = [0.0] * len(PRIORITY_NAMES)
+        self._wait_max = [0.0] * len(PRIORITY_NAMES)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_sent = threading.Condition(self._lock)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def depth(self):
+        """Number of packets currently waiting in the queue."""
+        return self._size
+
+    def snapshot(self):
+        """Returns a copy of the queued packets in the order they would be sent, ignoring rate limits."""
+        with self._lock:
+            return [item[0] for lane in self._lanes for item in lane]
+
+    def put(self, packet, priority=DATA, session=None, front=False, block=True):
+        """
+        Appends a packet to its priority lane, applying the backpressure policy if
+        it is a `DATA` packet and the queue is full.
+
+        Args:
+            packet (str): The formatted packet.
+            priority (int): `HEARTBEAT`, `CONTROL` or `DATA`.
+            session (str, optional): The session the packet belongs to. If that
+                session has packets waiting in a lower lane, the packet goes to the
+                lowest of them so it is sent after them.
+            front (bool): Put the packet at the front of its lane, e.g. a
+                `set_auth_token` that must precede everything already queued.
+            block (bool): Whether the `'block'` policy may wait for room. When
+                False, a full queue raises `SendQueueFull` right away.
+
+        Raises:
+            SendQueueFull: With the `'raise'` policy, or when a `'block'` wait times
+                out or is not allowed.
+        """
+        bounded = priority == DATA
+        dropped = None
+        with self._lock:
+            if bounded and self.maxsize > 0 and self._bounded >= self.maxsize:
+                if self.policy == RAISE:
+                    raise SendQueueFull(f"send queue is full ({self.maxsize} packets)")
+                if self.policy == DROP_OLDEST:
+                    dropped = self._drop_oldest()
+                elif not block:
+                    raise SendQueueFull(
+                        f"send queue is full ({self.maxsize} packets) and this caller cannot wait for the writer"
+                    )
+                elif not self._not_full.wait_for(
+                    lambda: self._closed or self._bounded < self.maxsize,
+                    self.put_timeout,
+                ):
+                    raise SendQueueFull(f"timed out waiting for room in the send queue ({self.maxsize} packets)")
+
+            if session is not None:
+                priority = self._hold(session, priority)
+            item = (packet, time.monotonic(), session, bounded)
+            if front:
+                self._lanes[priority].appendleft(item)
+            else:
+                self._lanes[priority].append(item)
+            self._size += 1
+            self._bounded += bounded
+            self._unfinished += 1
+            self._not_empty.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def _drop_oldest(self):
+        """Removes the oldest bounded packet and returns it."""
+        for priority in reversed(range(len(self._lanes))):
+            lane = self._lanes[priority]
+            for index, item in enumerate(lane):
+                if item[3]:
+                    del lane[index]
+                    self._release(item[2], priority)
+                    self._size -= 1
+                    self._bounded -= 1
+                    self._unfinished -= 1
+                    self.dropped += 1
+                    return item[0]
+        return None
+
+    def _hold(self, session, priority):
+        """Counts a packet of `session` and returns the lane that keeps the session's order."""
+        counts = self._sessions.get(session)
+        if counts is None:
+            counts = self._sessions[session] = [0] * len(self._lanes)
+        for lower in range(len(counts) - 1, priority, -1):
+            if counts[lower]:
+                priority = lower
+                break
+        counts[priority] += 1
+        return priority
+
+    def _release(self, session, priority):
+        if session is None:
+            return
+        counts = self._sessions[session]
+        counts[priority] -= 1
+        if not any(counts):
+            del self._sessions[session]
+
+    def get(self, block=True, timeout=None):
+        """
+        Removes and returns the oldest packet of the highest-priority lane that is
+        not held back by its rate limit.
+
+        Returns None when the queue is closed, or when nothing can be sent and
+        `block` is False or the timeout expires. Call `task_done` once the packet
+        is written.
+        """
+        item = self.get_item(block, timeout)
+        return item[0] if item else None
+
+    def get_item(self, block=True, timeout=None):
+        """
+        Same as `get`, but returns a `(packet, priority, session)` tuple so a failed
+        write can be put back in the right lane with `requeue`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while not self._closed:
+                wait = None
+                for priority, lane in enumerate(self._lanes):
+                    if not lane:
+                        continue
+                    bucket = self.rate_limits.get(priority)
+                    if bucket is not None and not bucket.consume():
+                        delay = bucket.delay()
+                        wait = delay if wait is None else min(wait, delay)
+                        continue
+
+                    packet, queued_at, session, bounded = lane.popleft()
+                    self._release(session, priority)
+                    self._size -= 1
+                    self._bounded -= bounded
+                    waited = time.monotonic() - queued_at
+                    self._dequeued[priority] += 1
+                    self._wait_total[priority] += waited
+                    if waited > self._wait_max[priority]:
+                        self._wait_max[priority] = waited
+                    self._not_full.notify()
+                    return packet, priority, session
+
+                if not block:
+                    return None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._not_empty.wait(wait)
+            return None
+
+    def requeue(self, packet, priority=DATA, session=None):
+        """Puts a packet that could not be written back at the front of its lane."""
+        with self._lock:
+            if session is not None:
+                counts = self._sessions.setdefault(session, [0] * len(self._lanes))
+                counts[priority] += 1
+            bounded = priority == DATA
+            self._lanes[priority].appendleft((packet, time.monotonic(), session, bounded))
+            self._size += 1
+            self._bounded += bounded
+            self._not_empty.notify()
+
+    def discard_sessions(self, sessions=None):
+        """
+        Drops the queued packets of `sessions`, or of every session when None;
+        packets put without a session are kept.
+
+        Returns:
+            int: Number of packets dropped.
+        """
+        with self._lock:
+            dropped = 0
+            for lane in self._lanes:
+                kept = [
+                    item for item in lane
+                    if item[2] is None or (sessions is not None and item[2] not in sessions)
+                ]
+                dropped += len(lane) - len(kept)
+                self._bounded -= sum(item[3] for item in lane) - sum(item[3] for item in kept)
+                lane.clear()
+                lane.extend(kept)
+            if sessions is None:
+                self._sessions.clear()
+            else:
+                for session in sessions:
+                    self._sessions.pop(session, None)
+            self._size -= dropped
+            self._unfinished -= dropped
+            self.dropped += dropped
+            if self._unfinished <= 0:
+                self._all_sent.notify_all()
+            self._not_full.notify_all()
+            return dropped
+
+    def task_done(self):
+        """Marks a packet returned by `get` as written."""
+        with self._lock:
+            self._unfinished -= 1
+            self.sent += 1
+            if self._unfinished <= 0:
+                self._all_sent.notify_all()
+
+    def join(self, timeout=None):
+        """
+        Waits until every queued packet has been written.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        with self._lock:
+            return self._all_sent.wait_for(lambda: self._unfinished <= 0, timeout)
+
+    def close(self):
+        """Wakes and stops the writer. Queued packets are kept for `reopen`."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def reopen(self):
+        """Allows `get` to hand out packets again after `close`."""
+        with self._lock:
+            self._closed = False
+
+    def stats(self):
+        """
+        Returns the queue counters.
+
+        Returns:
+            dict: `depth`, `sent` and `dropped` packet counts, plus a `classes`
+            mapping of each priority class name to its `depth`, `sent` count and
+            `wait_avg` / `wait_max` queueing delay in seconds.
+        """
+        with self._lock:
+            classes = {}
+            for priority, name in enumerate(PRIORITY_NAMES):
+                count = self._dequeued[priority]
+                classes[name] = {
+                    'depth': len(self._lanes[priority]),
+                    'sent': count,
+                    'wait_avg': self._wait_total[priority] / count if count else 0.0,
+                    'wait_max': self._wait_max[priority],
+                }
+            return {
+                'depth': self._size,
+                'sent': self.sent,
+                'dropped': self.dropped,
+                'classes': classes,
+            }
@@ -0,0 +1,170 @@
+"""
+Additional price series inside one chart session.
+
+A `ChartSession` has one main series (`$prices`, set with `set_market`) and can
+carry any number of extra series added with `ChartSession.add_series`. Each
+`ChartSeries` has its own symbol, timeframe, `CandleStore` and `EventBus`, and
+the session routes `timescale_update`, `du`, `symbol_resolved` and error packets
+to it by series (or symbol) id with one dictionary lookup, so one session can
+follow many instruments instead of opening a session per symbol/timeframe.
+"""
+
+import json
+
+from .candles import CANDLE_COLUMNS, CandleBatch, CandleStore
+from .events import EventBus
+from .resample import Resampler
+
+
+series_events = ('seriesLoaded', 'symbolLoaded', 'update', 'error', 'event')
+
+
+def symbol_init(symbol, options):
+    """Builds the `resolve_symbol` payload for `symbol` and market options."""
+    init = {
+        'symbol': symbol or 'BTCEUR',
+        'adjustment': options.get('adjustment') or 'splits',
+    }
+    if options.get('session'): init['session'] = options.get('session')
+    if options.get('currency'): init['currency-id'] = options.get('currency')
+    return init
+
+
+class ChartSeries:
+    """
+    One extra price series of a `ChartSession`, created by `ChartSession.add_series`.
+
+    Attributes:
+        id (str): Series id used by the server in `timescale_update`/`du` packets.
+        symbol_id (str): Id of the resolved symbol.
+        symbol (str): Symbol of the series.
+        timeframe (str): Current timeframe.
+        candles (CandleStore): Columnar OHLCV history of this series.
+        events (EventBus): 'seriesLoaded', 'symbolLoaded', 'update', 'error' and 'event'.
+        conflator (Conflator): The session's conflator when it conflates 'update' events, else None.
+    """
+
+    def __init__(self, chart_session_id, send, series_id, symbol_id, symbol, options, history_capacity=None):
+        self.id = series_id
+        self.symbol_id = symbol_id
+        self.symbol = symbol
+        self.timeframe = options.get('timeframe')
+        self.candles = CandleStore(history_capacity)
+        self.events = EventBus(series_events)
+        self.conflator = None
+        self.__chart_session_id = chart_session_id
+        self.__send = send
+        self.__infos = {}
+        self.__options = options
+
+    def create(self):
+        """Resolves the symbol and creates the series on the server."""
+        options = self.__options
+        self.__send('resolve_symbol', [
+            self.__chart_session_id,
+            self.symbol_id,
+            f'={json.dumps(symbol_init(self.symbol, options))}',
+        ])
+        range = options.get('range') or 100
+        reference = options.get('to')
+        self.__send('create_series', [
+            self.__chart_session_id,
+            self.id,
+            's1',
+            self.symbol_id,
+            self.timeframe,
+            ['bar_count', reference, range] if reference else range,
+        ])
+
+    @property
+    def get_periods(self):
+        return self.candles.last()
+
+    @property
+    def get_all_periods(self):
+        return [(row['time'], row) for row in reversed(self.candles.rows())]
+
+    @property
+    def get_infos(self):
+        return self.__infos
+
+    def handleEvent(self, event, *args):
+        self.events.emit(event, args)
+        self.events.emit('event', event, args)
+
+    def handleError(self, *args):
+        if not self.events.has_listeners('error'):
+            print('\033[31m ERROR:\033[0m', self.symbol, args)
+        else:
+            self.handleEvent('error', args)
+
+    def handle_symbol_resolved(self, infos):
+        self.__infos = {'series_id': self.symbol_id, **infos}
+        self.handleEvent('symbolLoaded')
+
+    def handle_history(self, periods):
+        """Handles this series' part of a `timescale_update` packet."""
+        if not periods:
+            return
+        batch = CandleBatch.from_periods(periods)
+        self.candles.extend_batch(batch)
+        self.handleEvent('seriesLoaded', batch)
+
+    def handle_update(self, periods):
+        """
+        Handles this series' part of a `du` packet. Like the main series, the
+        'update' event reports the changed bars as `['$prices']` rather than the
+        series id, so the same listeners (and `Resampler`) work on both.
+        """
+        if not periods:
+            return
+        for p in periods:
+            v = p['v']
+            self.candles.upsert(v[0], v[1], v[2], v[3], v[4], v[5] if len(v) > 5 else 0.0)
+        if self.conflator is None:
+            self.handleEvent('update', ['$prices'])
+        else:
+            self.conflator.push(self.id, ['$prices'])
+
+    def set_series(self, timeframe, range=100, reference=None):
+        """Switches the series to another timeframe, reloading its history."""
+        self.timeframe = timeframe
+        self.candles.clear()
+        self.__send('modify_series', [
+            self.__chart_session_id,
+            self.id,
+            's1',
+            self.symbol_id,
+            timeframe,
+            ['bar_count', reference, range] if reference else '',
+        ])
+
+    def fetch_more(self, number=100):
+        self.__send('request_more_data', [self.__chart_session_id, self.id, number])
+
+    def resample(self, timeframe, timezone=None, session=None, history_capacity=None):
+        """Returns a `Resampler` following this series; see `ChartSession.resample`."""
+        return Resampler(timeframe, self, timezone, session, history_capacity)
+
+    def to_numpy(self, columns=CANDLE_COLUMNS, start=None, end=None):
+        """Returns the series history as NumPy arrays; see `CandleStore.to_numpy`."""
+        return self.candles.to_numpy(columns, start, end)
+
+    def to_dataframe(self, columns=('open', 'high', 'low', 'close', 'volume'), start=None, end=None):
+        """Returns the series history as a pandas DataFrame; see `CandleStore.to_dataframe`."""
+        return self.candles.to_dataframe(columns, start, end)
+
+    def on_series_loaded(self, cb):
+        return self.events.on('seriesLoaded', cb)
+
+    def on_symbol_loaded(self, cb):
+        return self.events.on('symbolLoaded', cb)
+
+    def on_update(self, cb):
+        return self.events.on('update', cb)
+
+    def on_error(self, cb):
+        return self.events.on('error', cb)
+
+    def __repr__(self):
+        return f'ChartSeries({self.id!r}, {self.symbol!r}, {self.timeframe!r})'
@@ -0,0 +1,365 @@
+"""
+Sharded multi-connection client
+===============================
+
+`ShardedClient` spreads quote subscriptions and chart sessions for a large
+symbol universe over several `Client` connections. Each symbol is placed with a
+consistent-hash ring (`HashRing`), so adding or losing a connection only moves
+the symbols that hashed to it, and a symbol's quotes and charts always share a
+connection.
+
+All shards report through one callback surface (`on_symbol`, `on_quote`,
+`on_chart_update`, `on_series_loaded`), so consumers never see which connection
+carried an update. When a shard disconnects its symbols and charts are
+re-subscribed on the remaining shards; `reconnect` brings it back and moves its
+share of symbols home again.
+
+Example:
+--------
+```python
+sharded = ShardedClient(shards=4, quote_options={'fields': 'price'})
+sharded.on_quote(lambda symbol, packet: print(symbol, packet['data'][1]))
+sharded.add_symbols(universe)
+sharded.start()
+```
+"""
+
+import bisect
+import hashlib
+import threading
+
+from .client import Client
+
+
+class HashRing:
+    """
+    Consistent-hash ring mapping string keys to nodes.
+
+    Args:
+        nodes (iterable): Initial nodes; any hashable value with a stable `str()`.
+        replicas (int): Virtual points per node. More points spread keys more evenly.
+    """
+
+    def __init__(self, nodes=(), replicas=64):
+        self.replicas = replicas
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+    def __len__(self):
+        return len(set(self._owners.values()))
+
+    def __contains__(self, node):
+        return node in self._owners.values()
+
+    def add(self, node):
+        """Adds a node's virtual points to the ring."""
+        for replica in range(self.replicas):
+            point = self._hash(f'{node}#{replica}')
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+            self._owners[point] = node
+
+    def remove(self, node):
+        """Removes a node; its keys move to the next nodes on the ring."""
+        points = [point for point, owner in self._owners.items() if owner == node]
+        for point in points:
+            del self._owners[point]
+            del self._points[bisect.bisect_left(self._points, point)]
+
+    def get(self, key):
+        """
+        Returns the node that owns `key`, or None if the ring is empty.
+        """
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+
+class Shard:
+    """One connection of a `ShardedClient` and the symbols and charts it carries."""
+
+    def __init__(self, index, client):
+        self.index = index
+        self.client = client
+        self.quote = None
+        self.symbols = set()
+        self.charts = {}
+        self.connected = False
+        self.updates = 0
+        self.thread = None
+        self.handle_quote = None
+
+    def stats(self):
+        """
+        Returns:
+            dict: Connection state, symbol and chart counts, quote updates received
+            and outbound queue depth for this shard.
+        """
+        return {
+            'shard': self.index,
+            'connected': self.connected,
+            'symbols': len(self.symbols),
+            'charts': len(self.charts),
+            'updates': self.updates,
+            'send_queue_depth': self.client.send_queue_depth,
+        }
+
+
+class ShardedClient:
+    """
+    Spreads quote symbols and chart sessions across several connections.
+
+    Args:
+        shards (int): Number of websocket connections.
+        quote_options (dict, optional): Passed to `QuoteSession.set_up_quote` on every shard.
+        replicas (int): Virtual points per shard on the hash ring.
+        client_factory (callable): Builds each shard's client; defaults to `Client`.
+        **client_kwargs: Forwarded to `client_factory` (auth token, queue options, ...).
+    """
+
+    def __init__(self, shards=2, quote_options=None, replicas=64, client_factory=Client, **client_kwargs):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+
+        self.quote_options = quote_options or {}
+        self.shards = [Shard(index, client_factory(**client_kwargs)) for index in range(shards)]
+        self.ring = HashRing(range(shards), replicas)
+
+        self.__lock = threading.RLock()
+        self.__symbol_owner = {}
+        self.__chart_options = {}
+        self.__chart_owner = {}
+        self.__symbol_listeners = {}
+        self.__quote_listeners = []
+        self.__chart_listeners = {'update': [], 'seriesLoaded': []}
+
+        for shard in self.shards:
+            self.__bind(shard)
+            self.__set_up_quote(shard)
+
+    def add_symbols(self, symbols):
+        """
+        Subscribes symbols, each on the shard that owns it on the hash ring.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+
+        with self.__lock:
+            for symbol in (s.strip() for s in symbols if s and s.strip()):
+                if symbol not in self.__symbol_owner:
+                    self.__symbol_owner[symbol] = None
+            self.rebalance()
+
+    def remove_symbol(self, symbol):
+        """Unsubscribes a symbol from whichever shard carries it."""
+        with self.__lock:
+            owner = self.__symbol_owner.pop(symbol, None)
+            if owner is not None:
+                shard = self.shards[owner]
+                shard.symbols.discard(symbol)
+                shard.quote.remove_symbol(symbol)
+
+    def add_chart(self, symbol, options=None):
+        """
+        Opens a chart session for `symbol` on the shard that owns it.
+
+        Args:
+            symbol (str): The market symbol.
+            options (dict, optional): Passed to `ChartSession.set_market`.
+
+        Returns:
+            tuple: The chart key `(symbol, timeframe)` used in chart callbacks.
+        """
+        options = dict(options or {})
+        key = (symbol, options.get('timeframe'))
+        with self.__lock:
+            self.__chart_options[key] = options
+            self.__chart_owner.setdefault(key, None)
+            self.rebalance()
+        return key
+
+    def chart(self, key):
+        """Returns the `ChartSession` currently serving a chart key, or None."""
+        owner = self.__chart_owner.get(key)
+        if owner is None or key not in self.shards[owner].charts:
+            return None
+        return self.shards[owner].charts[key][0]
+
+    def owner_of(self, symbol):
+        """Returns the index of the shard carrying `symbol`, or None."""
+        return self.__symbol_owner.get(symbol)
+
+    def on_symbol(self, symbol, cb):
+        """Registers `cb(packet)` for quote updates of one symbol, whichever shard carries it."""
+        self.__symbol_listeners.setdefault(symbol, []).append(cb)
+
+    def on_quote(self, cb):
+        """Registers `cb(symbol, packet)` for quote updates of every symbol."""
+        self.__quote_listeners.append(cb)
+
+    def on_chart_update(self, cb):
+        """Registers `cb(key, bar)` for the forming bar of every chart."""
+        self.__chart_listeners['update'].append(cb)
+
+    def on_series_loaded(self, cb):
+        """Registers `cb(key, candles)` for history loaded by every chart."""
+        self.__chart_listeners['seriesLoaded'].append(cb)
+
+    def start(self):
+        """Connects every shard, each on its own thread."""
+        for shard in self.shards:
+            self.__start(shard)
+
+    def reconnect(self, index):
+        """
+        Reconnects a shard that has dropped. Its old quote session is deleted and a
+        new one set up; its share of the symbols and charts moves back to it once
+        it is connected.
+        """
+        shard = self.shards[index]
+        if shard.thread is not None and shard.thread.is_alive():
+            return
+        with self.__lock:
+            if shard.quote is not None:
+                self.__delete_session(shard, shard.quote)
+            self.__set_up_quote(shard)
+        self.__start(shard)
+
+    def close(self):
+        """Closes every shard connection."""
+        for shard in self.shards:
+            if shard.client.wsapp is not None:
+                shard.client.end()
+
+    def join(self, timeout=None):
+        """Waits for every shard's connection thread to finish."""
+        for shard in self.shards:
+            if shard.thread is not None:
+                shard.thread.join(timeout)
+
+    def stats(self):
+        """
+        Returns:
+            list: One `Shard.stats()` dictionary per shard.
+        """
+        return [shard.stats() for shard in self.shards]
+
+    def rebalance(self):
+        """
+        Moves every symbol and chart to the shard the hash ring assigns it to.
+        Only entries whose owner changed, or that have none, are touched.
+        """
+        with self.__lock:
+            for symbol, owner in list(self.__symbol_owner.items()):
+                target = self.ring.get(symbol)
+                if target is None or target == owner:
+                    continue
+                if owner is not None:
+                    previous = self.shards[owner]
+                    previous.symbols.discard(symbol)
+                    previous.quote.remove_symbol(symbol)
+                shard = self.shards[target]
+                shard.symbols.add(symbol)
+                shard.quote.on_symbol(symbol, shard.handle_quote)
+                shard.quote.add_symbols([symbol])
+                self.__symbol_owner[symbol] = target
+
+            for key, owner in list(self.__chart_owner.items()):
+                target = self.ring.get(key[0])
+                if target is None or target == owner:
+                    continue
+                if owner is not None:
+                    self.__close_chart(self.shards[owner], key)
+                self.__open_chart(self.shards[target], key)
+                self.__chart_owner[key] = target
+
+    def __set_up_quote(self, shard):
+        client = shard.client
+        shard.quote = client.quote_session_class(client.client_bridge)
+        shard.quote.set_up_quote(self.quote_options)
+
+    def __open_chart(self, shard, key):
+        client = shard.client
+        chart = client.chart_session_class(client.client_bridge)
+        subscriptions = (
+            chart.on_update(lambda _: self.__dispatch_chart('update', key, chart.get_periods)),
+            chart.on_series_loaded(lambda args: self.__dispatch_chart('seriesLoaded', key, args[0])),
+        )
+        chart.set_up_chart()
+        chart.set_market(key[0], self.__chart_options[key])
+        shard.charts[key] = (chart, subscriptions)
+
+    def __close_chart(self, shard, key):
+        chart, subscriptions = shard.charts.pop(key)
+        for subscription in subscriptions:
+            subscription.cancel()
+        self.__delete_session(shard, chart)
+
+    def __delete_session(self, shard, session):
+        """
+        Deletes a quote or chart session. On a dropped connection the server has
+        already forgotten it, so it is only unregistered and its queued packets
+        (including the delete) are dropped.
+        """
+        client = shard.client
+        registered = set(client.sessions)
+        session.delete()
+        if not shard.connected:
+            client.outbox.discard_sessions(registered - set(client.sessions))
+
+    def __bind(self, shard):
+        shard.handle_quote = lambda packet: self.__dispatch_quote(shard, packet)
+        shard.client.on_connected(lambda args: self.__on_connected(shard, args))
+        shard.client.on_disconnected(lambda args: self.__on_disconnected(shard, args))
+
+    def __dispatch_quote(self, shard, packet):
+        shard.updates += 1
+        data = packet['data'][1]
+        symbol = data['n'] if packet['type'] == 'qsd' else data
+        for cb in self.__symbol_listeners.get(symbol, []):
+            cb(packet)
+        for cb in self.__quote_listeners:
+            cb(symbol, packet)
+
+    def __dispatch_chart(self, event, key, payload):
+        for cb in self.__chart_listeners[event]:
+            cb(key, payload)
+
+    def __on_connected(self, shard, args):
+        # Ignore events from a socket this shard has already replaced.
+        if args[0] is not shard.client.wsapp:
+            return
+        with self.__lock:
+            shard.connected = True
+            if shard.index not in self.ring:
+                self.ring.add(shard.index)
+                self.rebalance()
+
+    def __on_disconnected(self, shard, args):
+        if args[0] is not shard.client.wsapp:
+            return
+        with self.__lock:
+            shard.connected = False
+            self.ring.remove(shard.index)
+            for symbol in shard.symbols:
+                self.__symbol_owner[symbol] = None
+            shard.symbols.clear()
+            for key in list(shard.charts):
+                self.__close_chart(shard, key)
+                self.__chart_owner[key] = None
+            self.rebalance()
+
+    def __start(self, shard):
+        shard.thread = threading.Thread(
+            target=shard.client.create_connection,
+            name=f'pytradingview-shard-{shard.index}',
+            daemon=True,
+        )
+        shard.thread.start()
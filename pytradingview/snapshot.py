@@ -0,0 +1,123 @@
+"""
+One-shot bulk quote snapshots.
+
+`QuoteSession.fetch_snapshot(symbols, fields, timeout)` returns the current
+quote fields of many symbols without keeping a stream open. It runs on a
+temporary quote session with its own field set, so the caller's streaming
+session and its symbols are left alone:
+
+- at most `max_in_flight` symbols are subscribed at a time; as symbols complete
+  they are unsubscribed and the next ones subscribed, both in chunks through the
+  session's `SubscriptionManager`;
+- a symbol is complete when its `quote_completed` arrives; its merged fields are
+  taken from the session's `QuoteStore` at that moment;
+- a symbol that does not complete within `timeout` seconds of being subscribed
+  is returned as `PARTIAL` with whatever fields arrived, and one the server
+  rejects as `ERROR`, instead of failing the whole call.
+
+`fetch_snapshot` blocks until every symbol is done, so call it from your own
+thread, not from a callback running on the client's receive thread.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+
+COMPLETE = 'complete'
+PARTIAL = 'partial'
+ERROR = 'error'
+
+DEFAULT_FIELDS = ('lp', 'ch', 'chp', 'volume')
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_IN_FLIGHT = 500
+
+
+SnapshotRow = namedtuple('SnapshotRow', ('symbol', 'state', 'fields'))
+SnapshotRow.__doc__ = "One symbol of a `fetch_snapshot` table: `state` is COMPLETE, PARTIAL or ERROR; `fields` a dict."
+
+
+class SnapshotRequest:
+    """
+    Drives one `fetch_snapshot` call on a dedicated quote session.
+
+    Args:
+        session (QuoteSession): Temporary session, already set up with the wanted fields.
+        symbols (iterable): Symbols to fetch; duplicates are fetched once.
+        timeout (float): Seconds a symbol may take to complete after it is subscribed.
+        max_in_flight (int): Maximum symbols subscribed at once.
+        clock (callable): Monotonic time source, overridable for tests.
+    """
+
+    def __init__(self, session, symbols, timeout=DEFAULT_TIMEOUT, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 clock=time.monotonic):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.session = session
+        self.symbols = list(dict.fromkeys(symbols))
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.clock = clock
+        self.rows = {}
+        self.__condition = threading.Condition()
+        self.__pending = list(reversed(self.symbols))
+        self.__in_flight = {}     # symbol -> deadline
+        self.__finished = 0       # completed symbols still subscribed
+
+    def run(self):
+        """
+        Fetches every symbol and deletes the session.
+
+        Returns:
+            list: One `SnapshotRow` per symbol, in input order.
+        """
+        try:
+            with self.__condition:
+                while len(self.rows) < len(self.symbols):
+                    now = self.clock()
+                    for symbol, deadline in list(self.__in_flight.items()):
+                        if deadline <= now:
+                            self.__finish(symbol, PARTIAL)
+                    self.__refill()
+                    if not self.__in_flight:
+                        # Everything subscribed completed synchronously: refill again.
+                        continue
+                    self.__condition.wait(min(self.__in_flight.values()) - now)
+        finally:
+            self.session.delete()
+        return [self.rows[symbol] for symbol in self.symbols]
+
+    def on_packet(self, packet):
+        """Symbol callback: completes a symbol on `quote_completed` or an error status."""
+        if packet['type'] == 'quote_completed':
+            symbol, state = packet['data'][1], COMPLETE
+        elif packet['data'][1].get('s') == 'error':
+            symbol, state = packet['data'][1]['n'], ERROR
+        else:
+            return
+        with self.__condition:
+            if symbol in self.__in_flight:
+                self.__finish(symbol, state)
+                self.__condition.notify()
+
+    def __finish(self, symbol, state):
+        del self.__in_flight[symbol]
+        self.__finished += 1
+        self.rows[symbol] = SnapshotRow(symbol, state, dict(self.session.snapshot(symbol) or {}))
+
+    def __refill(self):
+        """Swaps finished symbols for pending ones, once a chunk's worth has finished."""
+        room = self.max_in_flight - len(self.__in_flight)
+        if not self.__pending or not room:
+            return
+        if self.__in_flight and self.__finished < min(room, self.session.subscriptions.chunk_size):
+            return
+        deadline = self.clock() + self.timeout
+        added = []
+        while self.__pending and len(added) < room:
+            symbol = self.__pending.pop()
+            self.__in_flight[symbol] = deadline
+            self.session.on_symbol(symbol, self.on_packet)
+            added.append(symbol)
+        self.__finished = 0
+        self.session.set_symbols(list(self.__in_flight))
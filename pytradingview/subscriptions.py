@@ -0,0 +1,210 @@
+"""
+Chunked quote subscriptions.
+
+`quote_add_symbols`, `quote_fast_symbols` and `quote_remove_symbols` accept any
+number of symbols after the session id. `SubscriptionManager` keeps the set of
+symbols a quote session should carry and sends the changes in chunks of
+`chunk_size` symbols per message instead of one message per symbol:
+
+- `set_symbols(target)` works out the delta against the current set and only
+  subscribes the new symbols and unsubscribes the dropped ones, so rolling a
+  universe costs the difference, not a full resubscription;
+- changes wait in pending sets until they are sent, so a symbol added and removed
+  again before its chunk goes out costs no message at all;
+- removals go first, then additions, then their `quote_fast_symbols`;
+- with a `rate`, chunks are paced by a `TokenBucket` and the rest is sent from a
+  timer thread, so a large universe does not flood the send queue.
+"""
+
+import threading
+import time
+
+from .sender import TokenBucket
+
+
+DEFAULT_CHUNK_SIZE = 100
+FORCE_PERMISSION = {"flags": ["force_permission"]}
+
+
+class SubscriptionManager:
+    """
+    Target-set quote subscriptions for one quote session.
+
+    Args:
+        send (callable): `client_bridge['send']`.
+        session_id (str): The quote session id.
+        chunk_size (int): Maximum symbols per message.
+        rate (float, optional): Maximum chunk messages per second; unthrottled when None.
+        burst (int, optional): Chunks that may be sent back to back before `rate`
+            applies. Defaults to one second's worth.
+        clock (callable): Monotonic time source, overridable for tests.
+        timer (callable): Called as `timer(delay, function)` and returns an
+            object with `start()` and `cancel()`; `threading.Timer` by default.
+    """
+
+    def __init__(self, send, session_id, chunk_size=DEFAULT_CHUNK_SIZE, rate=None, burst=None,
+                 clock=time.monotonic, timer=threading.Timer):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.send = send
+        self.session_id = session_id
+        self.chunk_size = chunk_size
+        self.bucket = TokenBucket(rate, burst, clock) if rate else None
+        self.messages = 0
+        self.__timer_factory = timer
+        self.__timer = None
+        self.__lock = threading.RLock()
+        self.__symbols = {}
+        self.__pending_add = {}      # symbol -> force_permission
+        self.__pending_fast = {}
+        self.__pending_remove = {}
+
+    @property
+    def symbols(self):
+        """The symbols the session should carry, in the order they were added."""
+        with self.__lock:
+            return list(self.__symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.__symbols
+
+    def __len__(self):
+        return len(self.__symbols)
+
+    def pending(self):
+        """Returns the number of symbols waiting in each pending set."""
+        with self.__lock:
+            return {
+                'add': len(self.__pending_add),
+                'fast': len(self.__pending_fast),
+                'remove': len(self.__pending_remove),
+            }
+
+    def add(self, symbols, fast=True, force_permission=True):
+        """
+        Subscribes `symbols` that are not subscribed yet.
+
+        Returns:
+            list: The symbols that were added.
+        """
+        added = []
+        with self.__lock:
+            for symbol in symbols:
+                if symbol in self.__symbols:
+                    continue
+                self.__symbols[symbol] = None
+                added.append(symbol)
+                if symbol in self.__pending_remove:
+                    # Its removal was not sent yet: the server still has it.
+                    del self.__pending_remove[symbol]
+                else:
+                    self.__pending_add[symbol] = force_permission
+                if fast:
+                    self.__pending_fast[symbol] = None
+        self.flush()
+        return added
+
+    def remove(self, symbols):
+        """
+        Unsubscribes `symbols`. A symbol whose subscription has not been sent yet
+        is simply dropped; any other symbol is unsubscribed, even if this manager
+        did not add it.
+
+        Returns:
+            list: The symbols that were subscribed.
+        """
+        removed = []
+        with self.__lock:
+            for symbol in symbols:
+                if self.__symbols.pop(symbol, 0) is None:
+                    removed.append(symbol)
+                self.__pending_fast.pop(symbol, None)
+                if symbol in self.__pending_add:
+                    del self.__pending_add[symbol]
+                else:
+                    self.__pending_remove[symbol] = None
+        self.flush()
+        return removed
+
+    def set_symbols(self, symbols, fast=True, force_permission=True):
+        """
+        Makes `symbols` the subscribed set, sending only the difference.
+
+        Returns:
+            tuple: `(added, removed)` symbol lists.
+        """
+        target = dict.fromkeys(symbols)
+        with self.__lock:
+            removed = self.remove([symbol for symbol in self.__symbols if symbol not in target])
+            added = self.add(target, fast=fast, force_permission=force_permission)
+        return added, removed
+
+    def flush(self):
+        """
+        Sends pending chunks while the rate limit allows and schedules the rest.
+
+        Returns:
+            int: Number of messages sent.
+        """
+        sent = 0
+        with self.__lock:
+            while True:
+                message = self.__next_message()
+                if message is None:
+                    break
+                if self.bucket is not None and not self.bucket.consume():
+                    self.__schedule(self.bucket.delay())
+                    break
+                name, pending, force_permission = message
+                symbols = self.__take(pending, force_permission)
+                payload = [self.session_id] + symbols
+                if name == 'quote_add_symbols' and force_permission:
+                    payload.append(FORCE_PERMISSION)
+                self.send(name, payload)
+                self.messages += 1
+                sent += 1
+        return sent
+
+    def cancel(self):
+        """Drops every pending change and stops the timer."""
+        with self.__lock:
+            self.__pending_add.clear()
+            self.__pending_fast.clear()
+            self.__pending_remove.clear()
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+
+    def __next_message(self):
+        if self.__pending_remove:
+            return 'quote_remove_symbols', self.__pending_remove, None
+        if self.__pending_add:
+            return 'quote_add_symbols', self.__pending_add, next(iter(self.__pending_add.values()))
+        if self.__pending_fast:
+            return 'quote_fast_symbols', self.__pending_fast, None
+        return None
+
+    def __take(self, pending, force_permission):
+        """Pops up to `chunk_size` symbols that share the first one's flag."""
+        symbols = []
+        for symbol, flag in pending.items():
+            if len(symbols) == self.chunk_size or flag is not force_permission:
+                break
+            symbols.append(symbol)
+        for symbol in symbols:
+            del pending[symbol]
+        return symbols
+
+    def __schedule(self, delay):
+        if self.__timer is not None:
+            return
+
+        def fire():
+            with self.__lock:
+                self.__timer = None
+            self.flush()
+
+        self.__timer = self.__timer_factory(delay, fire)
+        if hasattr(self.__timer, 'daemon'):
+            self.__timer.daemon = True
+        self.__timer.start()
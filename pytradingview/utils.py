@@ -14,6 +14,10 @@ def genSessionID(type='xs'):
 def strip_html_tags(text):
     return re.sub(r"<[^>]+>", "", text)
 
+def safe_filename(name):
+    """Replaces characters that are awkward in file names (e.g. `:` and `!`)."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_')
+
 def parse_datetime(value: str) -> datetime:
     now = datetime.now()
 
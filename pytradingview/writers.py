@@ -0,0 +1,296 @@
+"""
+Output writers for historical downloads.
+
+A writer receives the pages of `ChartSession.download_data` through
+`write(batch, first, stop)` (bars `first..stop-1` of a `CandleBatch`) and is
+closed with `close()`. Every writer keeps its file open for the whole download
+and writes rows newest first, in the order pages arrive.
+
+Formats:
+
+- `csv`: appends rows to a text file (header written once).
+- `parquet`: one row group per chunk (`pyarrow`).
+- `arrow`: Arrow IPC file, one record batch per chunk (`pyarrow`).
+- `npz`: NumPy archive with one array per column (`numpy`). Chunks are
+  appended to temporary column files and packed into the archive on `close`.
+
+Binary formats store raw float64 volumes (NaN when the server sent none) and
+replace any existing file. `pyarrow` and `numpy` are only imported when their
+format is used. `open_writer` picks the format from the file extension or an
+explicit `format`; `register_writer` adds new ones.
+"""
+
+import abc
+import csv
+import os
+import tempfile
+from array import array
+
+from .candles import CANDLE_COLUMNS, COLUMN_TYPES
+
+
+CSV_FIELDS = CANDLE_COLUMNS
+
+# Bars buffered before a binary writer writes a chunk.
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError('Parquet and Arrow output require pyarrow: pip install "pytradingview[arrow]"') from exc
+    return pyarrow
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError('NPZ output requires numpy: pip install "pytradingview[numpy]"') from exc
+    return numpy
+
+
+class CsvCandleWriter:
+    """
+    Appends bars to a CSV file, writing the header when the file is new or empty.
+    The file is opened on the first write and stays open until `close`.
+    """
+
+    def __init__(self, filename, compression=None, chunk_size=None):
+        if compression:
+            raise ValueError("CSV output does not support compression")
+        self.filename = filename
+        self._file = None
+        self._writer = None
+
+    def _open(self):
+        new = not os.path.isfile(self.filename) or os.path.getsize(self.filename) == 0
+        self._file = open(self.filename, mode="a", newline="")
+        self._writer = csv.writer(self._file)
+        if new:
+            self._writer.writerow(CSV_FIELDS)
+
+    def write(self, batch, first, stop):
+        """Writes bars `first..stop-1` of a `CandleBatch`, newest first."""
+        if self._file is None:
+            self._open()
+        columns = batch.columns
+        missing = batch.missing_volume
+        volumes = columns["volume"]
+        rows = (
+            (
+                columns["time"][i], columns["open"][i], columns["high"][i],
+                columns["low"][i], columns["close"][i],
+                None if i in missing else round(volumes[i] * 100) / 100,
+            )
+            for i in range(stop - 1, first - 1, -1)
+        )
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ChunkedCandleWriter(abc.ABC):
+    """
+    Base class for binary writers: buffers bars in `array` columns and calls
+    `write_chunk(columns)` every `chunk_size` bars and on `close`.
+    """
+
+    def __init__(self, filename, compression=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.filename = filename
+        self.compression = compression
+        self.chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        self._buffer = self._empty()
+        self._closed = False
+
+    @staticmethod
+    def _empty():
+        return {name: array(COLUMN_TYPES[name]) for name in CANDLE_COLUMNS}
+
+    def write(self, batch, first, stop):
+        """Buffers bars `first..stop-1` of a `CandleBatch`, newest first."""
+        for name in CANDLE_COLUMNS:
+            values = batch.columns[name][first:stop]
+            values.reverse()
+            if name == "volume" and batch.missing_volume:
+                for index in batch.missing_volume:
+                    if first <= index < stop:
+                        values[stop - 1 - index] = float("nan")
+            self._buffer[name].extend(values)
+        if len(self._buffer["time"]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered bars as one chunk."""
+        if self._buffer["time"]:
+            self.write_chunk(self._buffer)
+            self._buffer = self._empty()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self.finish()
+
+    @abc.abstractmethod
+    def write_chunk(self, columns):
+        """Writes one chunk: a dict of equally long `array` columns, newest bar first."""
+
+    def finish(self):
+        pass
+
+
+class _ArrowCandleWriter(ChunkedCandleWriter):
+    def __init__(self, filename, compression=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self._pa = _import_pyarrow()
+        super().__init__(filename, compression, chunk_size)
+        self.schema = self._pa.schema(
+            [("time", self._pa.int64())] + [(name, self._pa.float64()) for name in CANDLE_COLUMNS[1:]]
+        )
+        self._writer = None
+
+    def _record_batch(self, columns):
+        # Wrap the array buffers without copying; each chunk gets fresh arrays.
+        pa = self._pa
+        length = len(columns["time"])
+        return pa.record_batch(
+            [
+                pa.Array.from_buffers(field.type, length, [None, pa.py_buffer(columns[field.name])])
+                for field in self.schema
+            ],
+            schema=self.schema,
+        )
+
+
+class ParquetCandleWriter(_ArrowCandleWriter):
+    """Writes a Parquet file, one row group per chunk. `compression` defaults to pyarrow's (snappy)."""
+
+    def write_chunk(self, columns):
+        if self._writer is None:
+            options = {} if self.compression is None else {"compression": self.compression}
+            self._writer = self._pa.parquet.ParquetWriter(self.filename, self.schema, **options)
+        self._writer.write_table(self._pa.Table.from_batches([self._record_batch(columns)]))
+
+    def finish(self):
+        if self._writer is None:
+            self.write_chunk(self._empty())
+        self._writer.close()
+
+
+class ArrowCandleWriter(_ArrowCandleWriter):
+    """Writes an Arrow IPC (Feather v2) file, one record batch per chunk. `compression`: `'lz4'` or `'zstd'`."""
+
+    def write_chunk(self, columns):
+        if self._writer is None:
+            options = self._pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = self._pa.ipc.new_file(self.filename, self.schema, options=options)
+        self._writer.write_batch(self._record_batch(columns))
+
+    def finish(self):
+        if self._writer is None:
+            self.write_chunk(self._empty())
+        self._writer.close()
+
+
+class NpzCandleWriter(ChunkedCandleWriter):
+    """
+    Writes a NumPy `.npz` archive with one array per column. Pass any truthy
+    `compression` (e.g. `'deflate'`) to write it with `numpy.savez_compressed`.
+    """
+
+    def __init__(self, filename, compression=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self._np = _import_numpy()
+        super().__init__(filename, compression, chunk_size)
+        self._parts = {}
+
+    def write_chunk(self, columns):
+        if not self._parts:
+            directory = os.path.dirname(os.path.abspath(self.filename))
+            self._parts = {name: tempfile.TemporaryFile(dir=directory) for name in CANDLE_COLUMNS}
+        for name in CANDLE_COLUMNS:
+            self._parts[name].write(columns[name])
+
+    def finish(self):
+        np = self._np
+        arrays = {}
+        for name in CANDLE_COLUMNS:
+            dtype = np.int64 if COLUMN_TYPES[name] == "q" else np.float64
+            part = self._parts.get(name)
+            if part is None or not part.tell():
+                arrays[name] = np.empty(0, dtype=dtype)
+            else:
+                part.flush()
+                arrays[name] = np.memmap(part, dtype=dtype, mode="r")
+        save = np.savez_compressed if self.compression else np.savez
+        save(self.filename, **arrays)
+        for part in self._parts.values():
+            part.close()
+        self._parts = {}
+
+
+WRITERS = {
+    "csv": CsvCandleWriter,
+    "parquet": ParquetCandleWriter,
+    "arrow": ArrowCandleWriter,
+    "npz": NpzCandleWriter,
+}
+
+EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".npz": "npz",
+}
+
+
+def register_writer(name, factory, extensions=()):
+    """
+    Registers an output format.
+
+    Args:
+        name (str): Format name, as accepted by `open_writer(format=...)`.
+        factory (callable): Called as `factory(filename, compression=..., chunk_size=...)`.
+        extensions (iterable): File extensions (with the dot) that select this format.
+    """
+    WRITERS[name] = factory
+    for extension in extensions:
+        EXTENSIONS[extension.lower()] = name
+
+
+def format_for(filename, format=None):
+    """Returns the format name for `filename`, or `format` if given. Defaults to CSV."""
+    if format:
+        if format not in WRITERS:
+            raise ValueError(f"unknown output format {format!r}; expected one of {sorted(WRITERS)}")
+        return format
+    return EXTENSIONS.get(os.path.splitext(filename)[1].lower(), "csv")
+
+
+def default_extension(format):
+    """Returns the first registered file extension of `format`, without the dot."""
+    for extension, name in EXTENSIONS.items():
+        if name == format:
+            return extension[1:]
+    return format
+
+
+def open_writer(filename, format=None, compression=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Creates the writer for `filename`, chosen by `format` or by the file extension.
+
+    Raises:
+        ValueError: For an unknown format.
+        ImportError: When the format's optional dependency is not installed.
+    """
+    return WRITERS[format_for(filename, format)](filename, compression=compression, chunk_size=chunk_size)
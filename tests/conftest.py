@@ -0,0 +1,30 @@
+import pytest
+
+
+class FakeTimer:
+    """Stand-in for `threading.Timer`: records its timers and fires them on demand."""
+
+    created = []
+
+    def __init__(self, delay, function):
+        self.delay = delay
+        self.function = function
+        self.started = False
+        self.cancelled = False
+        FakeTimer.created.append(self)
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        self.function()
+
+
+@pytest.fixture
+def fake_timer():
+    """`FakeTimer`, with no timers created yet."""
+    FakeTimer.created = []
+    return FakeTimer
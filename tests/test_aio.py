@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+import pytest
+
+from pytradingview import aio
+from pytradingview.aio import AsyncClient, AsyncQuoteSession
+from pytradingview.dispatch import Dispatcher
+
+
+def frame(payload):
+    if not isinstance(payload, str):
+        payload = json.dumps(payload, separators=(",", ":"))
+    return f"~m~{len(payload)}~m~{payload}"
+
+
+class FakeConnection:
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.close_code = None
+        self.close_reason = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.incoming.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self):
+        self.close_code = 1000
+        self.incoming.put_nowait(None)
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    holder = {}
+
+    async def fake_connect(url, origin):
+        holder["connection"] = FakeConnection()
+        return holder["connection"]
+
+    monkeypatch.setattr(aio, "_connect", fake_connect)
+    return holder
+
+
+def test_async_client_streams_quotes(connection):
+    async def scenario():
+        async with AsyncClient() as client:
+            conn = connection["connection"]
+            quote = client.quote
+            quote.set_up_quote({"fields": "price"})
+            conn.incoming.put_nowait(frame({"session_id": "abc"}))
+
+            stream = quote.stream(["FX:EURUSD"])
+            pending = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            conn.incoming.put_nowait(frame({
+                "m": "qsd",
+                "p": [quote.session_id, {"n": "FX:EURUSD", "s": "ok", "v": {"lp": 1.08}}],
+            }))
+            update = await asyncio.wait_for(pending, 1)
+            await stream.aclose()
+
+            await client.asend("quote_fast_symbols", [quote.session_id, "FX:EURUSD"])
+            return update, conn.sent
+
+    update, sent = asyncio.run(scenario())
+
+    assert update["data"][1]["v"] == {"lp": 1.08}
+    assert "set_auth_token" in sent[0]
+    assert any("quote_add_symbols" in packet for packet in sent)
+    assert "quote_fast_symbols" in sent[-1]
+
+
+def test_async_client_answers_heartbeats(connection):
+    async def scenario():
+        client = AsyncClient()
+        await client.connect()
+        conn = connection["connection"]
+        conn.incoming.put_nowait(frame({"session_id": "abc"}))
+        conn.incoming.put_nowait(frame("~h~4"))
+        await asyncio.sleep(0.05)
+        await client.close()
+        return client, conn.sent
+
+    client, sent = asyncio.run(scenario())
+
+    assert "~m~4~m~~h~4" in sent
+    assert client.is_open() is False
+
+
+def qsd(session_id, lp):
+    return frame({"m": "qsd", "p": [session_id, {"n": "FX:EURUSD", "s": "ok", "v": {"lp": lp}}]})
+
+
+def test_full_stream_buffer_drops_the_oldest_update(connection):
+    async def scenario():
+        async with AsyncClient() as client:
+            conn = connection["connection"]
+            client.quote.set_up_quote({"fields": "price"})
+            conn.incoming.put_nowait(frame({"session_id": "abc"}))
+            stream = client.quote.stream(["FX:EURUSD"], maxsize=1)
+            pending = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            conn.incoming.put_nowait(qsd(client.quote.session_id, 1.0))
+            first = await asyncio.wait_for(pending, 1)
+            for lp in (2.0, 3.0):
+                conn.incoming.put_nowait(qsd(client.quote.session_id, lp))
+            conn.incoming.put_nowait(frame("~h~7"))
+            await asyncio.sleep(0.05)
+            latest = await asyncio.wait_for(stream.__anext__(), 1)
+            await stream.aclose()
+            return first, latest, client.is_open(), conn.sent
+
+    first, latest, is_open, sent = asyncio.run(scenario())
+
+    assert first["data"][1]["v"] == {"lp": 1.0}
+    assert latest["data"][1]["v"] == {"lp": 3.0}
+    assert is_open
+    assert "~m~4~m~~h~7" in sent
+
+
+def test_failing_callback_does_not_close_the_connection(connection):
+    errors = []
+
+    async def scenario():
+        async with AsyncClient() as client:
+            conn = connection["connection"]
+            client.on_error(errors.append)
+            client.on_data(lambda packet: 1 / 0)
+            conn.incoming.put_nowait(frame({"session_id": "abc"}))
+            conn.incoming.put_nowait(frame({"m": "notice", "p": ["boom"]}))
+            conn.incoming.put_nowait(frame("~h~3"))
+            await asyncio.sleep(0.05)
+            return client.is_open(), conn.sent
+
+    is_open, sent = asyncio.run(scenario())
+
+    assert is_open
+    assert "~m~4~m~~h~3" in sent
+    (exc,), = errors[0]
+    assert isinstance(exc, ZeroDivisionError)
+
+
+@pytest.mark.parametrize("threaded", ["dispatcher", "conflate"])
+def test_stream_takes_updates_from_other_threads(connection, threaded):
+    async def scenario():
+        dispatcher = Dispatcher(workers=2, key_by="symbol") if threaded == "dispatcher" else None
+        async with AsyncClient(dispatcher=dispatcher) as client:
+            conn = connection["connection"]
+            quote = client.quote if dispatcher else AsyncQuoteSession(client.client_bridge, conflate=0.01)
+            quote.set_up_quote({"fields": "price"})
+            conn.incoming.put_nowait(frame({"session_id": "abc"}))
+            stream = quote.stream(["FX:EURUSD"])
+            pending = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            conn.incoming.put_nowait(qsd(quote.session_id, 1.5))
+            update = await asyncio.wait_for(pending, 1)
+            await stream.aclose()
+        if dispatcher:
+            dispatcher.close()
+        return update
+
+    assert asyncio.run(scenario())["data"][1]["v"] == {"lp": 1.5}
+
+
+def test_async_client_rejects_binary_mode():
+    with pytest.raises(ValueError):
+        AsyncClient(binary=True)
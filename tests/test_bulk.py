@@ -0,0 +1,116 @@
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytradingview.bulk import DONE, FAILED, PENDING, RUNNING, BulkDownloader, read_symbols
+from pytradingview.utils import safe_filename
+
+
+START = datetime.datetime.fromtimestamp(1_700_000_000)
+END = datetime.datetime.fromtimestamp(1_700_000_600)
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    bulk = BulkDownloader(
+        ["FX:EURUSD", "FX:GBPUSD", "CME_MINI:ES1!"], ["1"], START, END,
+        output_dir=str(tmp_path), concurrency=2, connections=2,
+    )
+    for client in bulk.clients:
+        client.wsapp = MagicMock()
+    return bulk
+
+
+def connect(bulk):
+    bulk.started = 0.0
+    for client in bulk.clients:
+        client.handle_event("connected", client.wsapp)
+
+
+def complete(job):
+    session_id = job.chart.chart_session["sessionID"]
+    job.chart.on_data_c({"type": "timescale_update", "data": [session_id, {"$prices": {"s": [
+        {"i": i, "v": [t, 1.0, 2.0, 0.5, 1.5, 10.0]}
+        for i, t in enumerate(range(1_700_000_000 - 60, 1_700_000_660, 60))
+    ]}}]})
+
+
+def test_jobs_run_within_concurrency_limit(downloader):
+    connect(downloader)
+
+    statuses = [job.status for job in downloader.jobs]
+    assert statuses == [RUNNING, RUNNING, PENDING]
+
+
+def test_jobs_go_to_the_least_loaded_connection(downloader):
+    connect(downloader)
+    first, second, third = downloader.jobs
+    # Both slots were taken as soon as the first connection opened.
+    assert first.client is second.client is downloader.clients[0]
+
+    complete(first)
+
+    assert third.client is downloader.clients[1]
+
+
+def test_completed_jobs_write_files_and_start_the_next(downloader, tmp_path):
+    connect(downloader)
+    first, second, third = downloader.jobs
+
+    complete(first)
+
+    assert first.status == DONE
+    assert first.bars == 11
+    assert third.status == RUNNING
+    assert (tmp_path / "FX_EURUSD_1.csv").exists()
+    assert third.filename.endswith("CME_MINI_ES1_1.csv")
+
+    complete(second)
+    complete(third)
+    summary = downloader.summary()
+    assert summary["done"] == 3
+    assert summary["bars"] == 33
+    assert summary["failures"] == []
+
+
+def test_errors_and_disconnects_are_reported(downloader):
+    finished = []
+    downloader.on_job_done = finished.append
+    connect(downloader)
+    first, second, third = downloader.jobs
+
+    first.chart.on_data_c({"type": "symbol_error", "data": [first.chart.chart_session["sessionID"], "ser_1", "invalid symbol"]})
+    second.client.handle_event("disconnected", second.client.wsapp, 1006, "")
+
+    assert first.status == FAILED
+    assert "invalid symbol" in first.error
+    assert second.status == FAILED
+    assert finished[:2] == [first, second]
+    assert third.status == RUNNING
+    assert downloader.summary()["failed"] == 2
+
+
+def test_stalled_jobs_time_out(downloader):
+    downloader.timeout = 5
+    connect(downloader)
+    downloader.jobs[0].started -= 10
+
+    downloader.check_stalled()
+
+    assert downloader.jobs[0].status == FAILED
+    assert downloader.jobs[0].error == "no data for 5s"
+    assert downloader.jobs[1].status == RUNNING
+
+
+def test_binary_formats_cannot_be_appended_to(tmp_path):
+    with pytest.raises(ValueError):
+        BulkDownloader(["FX:EURUSD"], ["1"], START, END, output_dir=str(tmp_path), overwrite=False, format="parquet")
+
+
+def test_read_symbols(tmp_path):
+    path = tmp_path / "symbols.txt"
+    path.write_text("FX:EURUSD\n# comment\nFX:GBPUSD, BINANCE:BTCUSDT\n\n")
+
+    assert read_symbols(str(path)) == ["FX:EURUSD", "FX:GBPUSD", "BINANCE:BTCUSDT"]
+    assert safe_filename("CME_MINI:ES1!") == "CME_MINI_ES1"
@@ -0,0 +1,116 @@
+import datetime
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytradingview.cache import CacheKey, CandleCache, merge_ranges, missing_ranges
+from pytradingview.candles import CandleBatch
+from pytradingview.chart import ChartSession
+
+
+KEY = CacheKey("FX:EURUSD", "1")
+
+
+def batch(times, close=1.0):
+    return CandleBatch.from_periods([{"v": [t, close, close, close, close, 1.0]} for t in times])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CandleCache(str(tmp_path / "cache"))
+
+
+def test_range_helpers():
+    assert merge_ranges([[10, 20], [0, 5], [6, 8], [19, 30]]) == [[0, 8], [10, 30]]
+    assert missing_ranges([[0, 8], [10, 30]], 5, 40) == [(9, 9), (31, 40)]
+    assert missing_ranges([], 5, 40) == [(5, 40)]
+    assert missing_ranges([[0, 100]], 5, 40) == []
+
+
+def test_write_mark_and_read_merge(cache):
+    cache.write(KEY, batch(range(600, 1200, 60)))
+    cache.write(KEY, batch(range(0, 660, 60), close=2.0))
+    cache.mark(KEY, 0, 1199)
+
+    result = cache.read(KEY, 120, 900)
+
+    assert result.view("time").tolist() == list(range(120, 901, 60))
+    # The newer segment wins for bars stored twice.
+    assert result[-1]["close"] == 1.0
+    assert result[0]["close"] == 2.0
+    assert [bar["close"] for bar in result if bar["time"] in (600, 660)] == [2.0, 1.0]
+    assert cache.missing(KEY, 0, 2000) == [(1200, 2000)]
+
+
+def test_keys_are_separate(cache):
+    cache.mark(KEY, 0, 100)
+
+    assert cache.missing(CacheKey("FX:EURUSD", "1", currency="EUR"), 0, 100) == [(0, 100)]
+    assert cache.missing(CacheKey("FX:EURUSD", "5"), 0, 100) == [(0, 100)]
+    assert cache.missing(KEY, 0, 100) == []
+
+
+def test_compact_merges_segments(cache):
+    for start in range(0, 600, 120):
+        cache.write(KEY, batch(range(start, start + 120, 60)))
+    before = cache.read(KEY)
+
+    assert cache.compact() == 5
+
+    directory = cache.key_dir(KEY)
+    assert len([name for name in os.listdir(directory) if name.startswith("segment-")]) == 1
+    assert cache.read(KEY) == before
+    assert cache.compact(KEY) == 0
+
+
+def test_reader_retries_after_compaction(cache, monkeypatch):
+    cache.write(KEY, batch([0, 60]))
+    cache.write(KEY, batch([120]))
+    stale = cache._load_index(cache.key_dir(KEY))
+    cache.compact(KEY)
+
+    calls = []
+    real_load = CandleCache._load_index
+
+    def load(directory):
+        calls.append(directory)
+        return stale if len(calls) == 1 else real_load(directory)
+
+    monkeypatch.setattr(CandleCache, "_load_index", staticmethod(load))
+    assert cache.read(KEY).view("time").tolist() == [0, 60, 120]
+    assert len(calls) == 2
+
+
+def test_fetch_only_requests_gaps_and_records_stats(cache):
+    client_bridge = {"sessions": {}, "send": MagicMock(), "end": MagicMock()}
+    chart = ChartSession(client_bridge)
+    chart.set_up_chart()
+    session_id = chart.chart_session["sessionID"]
+
+    start, end = 1_600_000_000, 1_600_000_000 + 60 * 19
+    cache.write(KEY, batch(range(start, start + 600, 60)))
+    cache.mark(KEY, start, start + 599)
+
+    results = []
+    cache.fetch(chart, KEY, start, end, results.append, on_progress=MagicMock())
+
+    create = [c for c in client_bridge["send"].call_args_list if c.args[0] == "create_series"]
+    assert create[0].args[1][-1] == ["bar_count", end, 100]
+    chart.on_data_c({"type": "timescale_update", "data": [session_id, {"$prices": {"s": [
+        {"i": i, "v": [t, 3.0, 3.0, 3.0, 3.0, 1.0]} for i, t in enumerate(range(start + 540, end + 1, 60))
+    ]}}]})
+
+    assert results[0].view("time").tolist() == list(range(start, end + 1, 60))
+    assert results[0][-1]["close"] == 3.0
+    assert cache.missing(KEY, start, end) == []
+
+    cache.fetch(chart, KEY, datetime.datetime.fromtimestamp(start), end, results.append)
+    assert len(results) == 2
+
+    stats = cache.stats()
+    assert stats["requests"] == 2
+    assert stats["hits"] == 1
+    assert stats["partial"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["bars_fetched"] == 10
@@ -0,0 +1,181 @@
+import pytest
+
+from pytradingview.candles import CandleBatch, CandleStore
+
+
+def bar(time, close=1.0, volume=10.0):
+    return (time, close, close + 1, close - 1, close, volume)
+
+
+def test_upsert_appends_and_updates_forming_bar():
+    store = CandleStore()
+
+    store.upsert(*bar(60))
+    store.upsert(*bar(120, close=2.0))
+    store.upsert(*bar(120, close=3.0, volume=12.3456))
+
+    assert len(store) == 2
+    assert store[-1] == {
+        "time": 120, "open": 3.0, "close": 3.0, "high": 4.0, "low": 2.0, "volume": 12.35,
+    }
+    assert store.last()["close"] == 3.0
+
+
+def test_upsert_accepts_float_times_and_rejects_bad_bars_whole():
+    store = CandleStore()
+    store.upsert(60.0, 1.0, 2.0, 0.5, 1.5, 10.0)
+    store.upsert(60, 1.0, 2.0, 0.5, 1.6, 11.0)
+
+    assert len(store) == 1
+    assert store.last() == {"time": 60, "open": 1.0, "close": 1.6, "high": 2.0, "low": 0.5, "volume": 11.0}
+
+    with pytest.raises(TypeError):
+        store.upsert(120, 1.0, None, 0.5, 1.5)
+    assert len(store) == 1
+    assert store.last_time == 60
+
+
+def test_capacity_keeps_newest_bars():
+    store = CandleStore(capacity=3)
+
+    for time in range(0, 1000, 10):
+        store.upsert(*bar(time))
+
+    assert len(store) == 3
+    assert [row["time"] for row in store] == [970, 980, 990]
+    assert store.nbytes() <= 6 * 8 * 64
+
+
+def test_extend_merges_older_history_and_dedupes():
+    store = CandleStore()
+    store.extend([bar(300), bar(400)])
+
+    store.extend([bar(100), bar(200), bar(300, close=9.0)])
+
+    assert [row["time"] for row in store] == [100, 200, 300, 400]
+    assert store[2]["close"] == 9.0
+
+
+def test_upsert_out_of_order_bar_is_inserted():
+    store = CandleStore()
+    store.extend([bar(100), bar(300)])
+
+    store.upsert(*bar(200))
+
+    assert [row["time"] for row in store] == [100, 200, 300]
+    assert store.last()["time"] == 200
+
+
+def test_range_lookup_and_views():
+    store = CandleStore()
+    store.extend(bar(time, close=float(time)) for time in range(0, 100, 10))
+
+    assert store.index_range(25, 55) == (3, 6)
+    assert [row["time"] for row in store.rows(20, 40)] == [20, 30, 40]
+    assert store.view("close", 20, 40).tolist() == [20.0, 30.0, 40.0]
+    assert store.view("close", 200).tolist() == []
+
+
+def test_view_shares_memory_with_forming_bar():
+    store = CandleStore()
+    store.extend([bar(60), bar(120, close=1.0)])
+    closes = store.view("close")
+
+    store.upsert(*bar(120, close=5.0))
+
+    assert closes[-1] == 5.0
+    with pytest.raises(TypeError):
+        closes[0] = 0.0
+
+
+def test_views_survive_reallocation():
+    store = CandleStore()
+    store.upsert(*bar(0))
+    times = store.view("time")
+
+    for time in range(1, 500):
+        store.upsert(*bar(time))
+
+    assert times.tolist() == [0]
+    assert len(store) == 500
+
+
+def test_unknown_column():
+    with pytest.raises(KeyError):
+        CandleStore().view("vwap")
+
+
+def test_to_numpy_shares_memory():
+    numpy = pytest.importorskip("numpy")
+    store = CandleStore()
+    store.extend([bar(60), bar(120), bar(180)])
+
+    arrays = store.to_numpy(["time", "close"], start=120)
+    store.upsert(*bar(180, close=7.0))
+
+    assert arrays["time"].dtype == numpy.int64
+    assert arrays["time"].tolist() == [120, 180]
+    assert arrays["close"][-1] == 7.0
+    assert not arrays["close"].flags.writeable
+
+
+def test_to_dataframe():
+    pandas = pytest.importorskip("pandas")
+    store = CandleStore()
+    store.extend([bar(60, close=1.0), bar(120, close=2.0)])
+
+    frame = store.to_dataframe(["close", "volume"])
+
+    assert list(frame.columns) == ["close", "volume"]
+    assert frame.index[0] == pandas.Timestamp(60, unit="s", tz="UTC")
+    assert frame["close"].tolist() == [1.0, 2.0]
+
+
+def test_missing_numpy_raises_import_error(monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name == "numpy":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", fake_import)
+    with pytest.raises(ImportError, match="pytradingview\\[numpy\\]"):
+        CandleStore().to_numpy()
+
+
+def test_batch_from_periods_reads_like_bar_dicts():
+    periods = [
+        {"i": 0, "v": [60, 1.0, 2.0, 0.5, 1.5, 10.126]},
+        {"i": 1, "v": [120, 1.5, 2.5, 1.0, 2.0, 11.0]},
+    ]
+
+    batch = CandleBatch.from_periods(periods)
+
+    assert len(batch) == 2
+    assert batch[0] == {"time": 60, "open": 1.0, "close": 1.5, "high": 2.0, "low": 0.5, "volume": 10.13}
+    assert [bar["time"] for bar in batch] == [60, 120]
+    assert batch[-1]["close"] == 2.0
+    assert batch[:1] == [batch[0]]
+    assert batch == list(batch)
+    assert batch.view("close").tolist() == [1.5, 2.0]
+
+
+def test_batch_without_volume():
+    periods = [{"i": 0, "v": [60, 1.0, 2.0, 0.5, 1.5]}, {"i": 1, "v": [120, 1.5, 2.5, 1.0, 2.0, 3.0]}]
+
+    batch = CandleBatch.from_periods(periods)
+
+    assert batch[0]["volume"] is None
+    assert batch[1]["volume"] == 3.0
+
+
+def test_extend_batch():
+    store = CandleStore()
+    store.extend([bar(180)])
+
+    store.extend_batch(CandleBatch.from_periods([{"v": list(bar(60))}, {"v": list(bar(120))}]))
+
+    assert [row["time"] for row in store] == [60, 120, 180]
@@ -101,3 +101,292 @@ def test_on_event_callbacks(chart_session):
     mock_callback.assert_called_once_with(({"key": "value"},))
 
 
+
+
+def test_callbacks_are_per_instance(client_bridge):
+    first = ChartSession(client_bridge)
+    second = ChartSession(client_bridge)
+    mock_callback = MagicMock()
+
+    first.on_update(mock_callback)
+    second.handleEvent("update")
+
+    mock_callback.assert_not_called()
+
+
+def test_download_data_replaces_previous_listener(chart_session):
+    start = datetime.datetime(2023, 1, 1)
+    end = datetime.datetime(2023, 1, 10)
+
+    chart_session.download_data(start, end, "test.csv")
+    chart_session.download_data(start, end, "test.csv")
+
+    assert len(chart_session.events.listeners("seriesLoaded")) == 1
+
+
+def test_subscription_cancel(chart_session):
+    mock_callback = MagicMock()
+
+    subscription = chart_session.on_update(mock_callback)
+    subscription.cancel()
+    chart_session.handleEvent("update")
+
+    mock_callback.assert_not_called()
+
+
+def test_du_updates_candle_store(chart_session):
+    session_id = chart_session.chart_session["sessionID"]
+
+    def du(time, close):
+        return {"type": "du", "data": [session_id, {"$prices": {"s": [
+            {"i": 0, "v": [time, 1.0, 2.0, 0.5, close, 100.0]},
+        ]}}]}
+
+    chart_session.on_data_c(du(60, 1.5))
+    chart_session.on_data_c(du(60, 1.7))
+    chart_session.on_data_c(du(120, 1.8))
+
+    assert len(chart_session.candles) == 2
+    assert chart_session.get_periods["close"] == 1.8
+    assert [time for time, _ in chart_session.get_all_periods] == [120, 60]
+    assert chart_session.get_all_periods[1][1]["close"] == 1.7
+
+
+def test_timescale_update_emits_columnar_batch(chart_session):
+    loaded = MagicMock()
+    chart_session.on_series_loaded(loaded)
+
+    chart_session.on_data_c({"type": "timescale_update", "data": [
+        chart_session.chart_session["sessionID"],
+        {"$prices": {"s": [
+            {"i": 0, "v": [60, 1.0, 2.0, 0.5, 1.5, 100.0]},
+            {"i": 1, "v": [120, 1.5, 2.5, 1.0, 2.0, 50.0]},
+        ]}},
+    ]})
+
+    batch = loaded.call_args.args[0][0]
+    assert batch == [
+        {"time": 60, "open": 1.0, "close": 1.5, "high": 2.0, "low": 0.5, "volume": 100.0},
+        {"time": 120, "open": 1.5, "close": 2.0, "high": 2.5, "low": 1.0, "volume": 50.0},
+    ]
+    assert chart_session.candles.view("time").tolist() == [60, 120]
+
+
+def test_download_data_streams_to_csv(chart_session, client_bridge, tmp_path):
+    filename = tmp_path / "out.csv"
+    session_id = chart_session.chart_session["sessionID"]
+
+    def timescale_update(times):
+        return {"type": "timescale_update", "data": [session_id, {"$prices": {"s": [
+            {"i": i, "v": [t, 1.0, 2.0, 0.5, 1.5, 10.0]} for i, t in enumerate(times)
+        ]}}]}
+
+    start = datetime.datetime.fromtimestamp(1_700_000_000 - 600)
+    end = datetime.datetime.fromtimestamp(1_700_000_000 + 6000)
+    chart_session.download_data(start, end, str(filename), on_progress=MagicMock())
+
+    chart_session.on_data_c(timescale_update(range(1_700_000_000, 1_700_006_000, 60)))
+    client_bridge["send"].assert_called_with("request_more_data", [session_id, "$prices", 100])
+    chart_session.on_data_c(timescale_update(range(1_700_000_000 - 6000, 1_700_000_000, 60)))
+
+    client_bridge["end"].assert_called_once()
+    assert len(chart_session.candles) == 0
+    assert not chart_session.events.has_listeners("seriesLoaded")
+    with open(filename) as file:
+        times = [int(line.split(",")[0]) for line in file.read().splitlines()[1:]]
+    assert times == list(range(1_700_005_940, 1_700_000_000 - 660, -60))
+
+
+def test_download_data_anchors_series_at_end(chart_session, client_bridge):
+    chart_session.set_market("AAPL", {"timeframe": "1"})
+    start = datetime.datetime.fromtimestamp(1_600_000_000)
+    end = datetime.datetime.fromtimestamp(1_600_086_400)
+
+    chart_session.download_data(start, end, "unused.csv", on_progress=MagicMock())
+
+    client_bridge["send"].assert_called_with("modify_series", [
+        chart_session.chart_session["sessionID"], "$prices", "s1", "ser_1", "1",
+        ["bar_count", 1_600_086_400, 100],
+    ])
+    chart_session.cancel_download()
+
+
+def test_download_data_skips_anchor_when_market_is_anchored(chart_session, client_bridge):
+    chart_session.set_market("AAPL", {"timeframe": "1", "to": 1_600_086_400})
+    client_bridge["send"].reset_mock()
+
+    chart_session.download_data(
+        datetime.datetime.fromtimestamp(1_600_000_000),
+        datetime.datetime.fromtimestamp(1_600_086_400),
+        "unused.csv",
+    )
+
+    client_bridge["send"].assert_not_called()
+    chart_session.cancel_download()
+
+
+def test_refused_anchor_falls_back_to_paging(chart_session, client_bridge):
+    chart_session.set_market("AAPL", {"timeframe": "1", "to": 1_600_086_400})
+    chart_session.download_data(
+        datetime.datetime.fromtimestamp(1_600_000_000),
+        datetime.datetime.fromtimestamp(1_600_086_400),
+        "unused.csv",
+    )
+
+    with patch("builtins.print") as mock_print:
+        chart_session.on_data_c({"type": "series_error", "data": [
+            chart_session.chart_session["sessionID"], "ser_1", "s1", "invalid range",
+        ]})
+
+    mock_print.assert_not_called()
+    client_bridge["send"].assert_called_with("create_series", [
+        chart_session.chart_session["sessionID"], "$prices", "s1", "ser_1", "1", 100,
+    ])
+    chart_session.cancel_download()
+
+
+def test_refused_anchor_modification_sends_unanchored_bar_count(chart_session, client_bridge):
+    chart_session.set_market("AAPL", {"timeframe": "1"})
+    chart_session.download_data(
+        datetime.datetime.fromtimestamp(1_600_000_000),
+        datetime.datetime.fromtimestamp(1_600_086_400),
+        "unused.csv",
+    )
+
+    with patch("builtins.print") as mock_print:
+        chart_session.on_data_c({"type": "series_error", "data": [
+            chart_session.chart_session["sessionID"], "ser_1", "s1", "invalid range",
+        ]})
+
+    mock_print.assert_not_called()
+    client_bridge["send"].assert_called_with("modify_series", [
+        chart_session.chart_session["sessionID"], "$prices", "s1", "ser_1", "1", 100,
+    ])
+    assert chart_session.series_created
+    chart_session.cancel_download()
+
+
+def test_add_series_creates_series_with_own_ids(chart_session, client_bridge):
+    series = chart_session.add_series("FX:EURUSD", {"timeframe": "5", "range": 300})
+    other = chart_session.add_series("FX:GBPUSD", {"timeframe": "60"})
+    session_id = chart_session.chart_session["sessionID"]
+
+    assert series.id != other.id
+    assert chart_session.series == {series.id: series, other.id: other}
+    sent = [call.args for call in client_bridge["send"].call_args_list]
+    assert ("create_series", [session_id, series.id, "s1", series.symbol_id, "5", 300]) in sent
+    resolve = [args for name, args in sent if name == "resolve_symbol" and args[1] == series.symbol_id]
+    assert json.loads(resolve[0][2][1:]) == {"symbol": "FX:EURUSD", "adjustment": "splits"}
+
+
+def test_packets_are_routed_by_series_id(chart_session):
+    session_id = chart_session.chart_session["sessionID"]
+    eurusd = chart_session.add_series("FX:EURUSD", {"timeframe": "1"})
+    gbpusd = chart_session.add_series("FX:GBPUSD", {"timeframe": "1"})
+    main_update, eur_update, eur_loaded, gbp_symbol = MagicMock(), MagicMock(), MagicMock(), MagicMock()
+    chart_session.on_update(main_update)
+    eurusd.on_update(eur_update)
+    eurusd.on_series_loaded(eur_loaded)
+    gbpusd.on_symbol_loaded(gbp_symbol)
+
+    chart_session.on_data_c({"type": "symbol_resolved", "data": [session_id, gbpusd.symbol_id, {"description": "GBP"}]})
+    gbp_symbol.assert_called_once()
+    assert gbpusd.get_infos["description"] == "GBP"
+    assert chart_session.get_infos == {}
+
+    chart_session.on_data_c({"type": "timescale_update", "data": [session_id, {
+        eurusd.id: {"s": [{"i": 0, "v": [60, 1.0, 2.0, 0.5, 1.5, 10.0]}]},
+        gbpusd.id: {"s": [{"i": 0, "v": [60, 3.0, 4.0, 2.5, 3.5, 20.0]}]},
+    }]})
+    eur_loaded.assert_called_once()
+    assert eurusd.get_periods["close"] == 1.5
+    assert gbpusd.get_periods["close"] == 3.5
+    assert len(chart_session.candles) == 0
+
+    chart_session.on_data_c({"type": "du", "data": [session_id, {
+        eurusd.id: {"s": [{"i": 1, "v": [120, 1.5, 1.6, 1.4, 1.55]}]},
+    }]})
+    eur_update.assert_called_once_with((["$prices"],))
+    main_update.assert_not_called()
+    assert eurusd.get_periods == {"time": 120, "open": 1.5, "close": 1.55, "high": 1.6, "low": 1.4, "volume": 0.0}
+
+    chart_session.on_data_c({"type": "du", "data": [session_id, {
+        "$prices": {"s": [{"i": 0, "v": [60, 9.0, 9.0, 9.0, 9.0, 1.0]}]},
+        gbpusd.id: {"s": [{"i": 1, "v": [120, 3.5, 3.5, 3.5, 3.6, 1.0]}]},
+    }]})
+    main_update.assert_called_once_with((["$prices"],))
+    assert chart_session.get_periods["close"] == 9.0
+    assert gbpusd.get_periods["close"] == 3.6
+
+
+def test_series_errors_and_removal(chart_session, client_bridge):
+    session_id = chart_session.chart_session["sessionID"]
+    series = chart_session.add_series("FX:NOPE", {"timeframe": "1"})
+    errors, main_errors = MagicMock(), MagicMock()
+    series.on_error(errors)
+    chart_session.on_error(main_errors)
+
+    chart_session.on_data_c({"type": "symbol_error", "data": [session_id, series.symbol_id, "invalid symbol"]})
+    errors.assert_called_once_with((("(FX:NOPE) Symbol error:", "invalid symbol"),))
+    main_errors.assert_not_called()
+
+    chart_session.remove_series(series)
+    client_bridge["send"].assert_called_with("remove_series", [session_id, series.id])
+    assert chart_session.series == {}
+    chart_session.on_data_c({"type": "du", "data": [session_id, {series.id: {"s": [{"i": 0, "v": [60, 1, 1, 1, 1]}]}}]})
+    assert len(series.candles) == 0
+
+
+def test_conflated_session_merges_update_events(client_bridge):
+    chart = ChartSession(client_bridge, conflate=60)
+    chart.set_up_chart()
+    session_id = chart.chart_session["sessionID"]
+    series = chart.add_series("FX:EURUSD", {"timeframe": "1"})
+    main_update, series_update = MagicMock(), MagicMock()
+    chart.on_update(main_update)
+    series.on_update(series_update)
+    chart.study_listeners["st1"] = MagicMock()
+
+    for close in (1.0, 1.1, 1.2):
+        chart.on_data_c({"type": "du", "data": [session_id, {
+            "$prices": {"s": [{"i": 0, "v": [60, 1.0, 1.2, 1.0, close, 1.0]}]},
+            series.id: {"s": [{"i": 0, "v": [60, 2.0, 2.0, 2.0, close + 1, 1.0]}]},
+        }]})
+    chart.on_data_c({"type": "du", "data": [session_id, {"st1": {"st": []}}]})
+
+    main_update.assert_not_called()
+    assert chart.get_periods["close"] == 1.2
+    assert series.get_periods["close"] == 2.2
+
+    assert chart.conflator.flush() == 2
+    main_update.assert_called_once_with((["$prices", "st1"],))
+    series_update.assert_called_once_with((["$prices"],))
+    assert chart.conflator.stats()["coalesced"] == 5
+    chart.delete()
+
+def test_save_batch_appends_csv_rows_as_given(chart_session, tmp_path):
+    filename = str(tmp_path / "bars.csv")
+    rows = [
+        {"time": 60, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.25},
+        {"time": 0, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.0, "volume": 3.5},
+    ]
+    chart_session.save_batch(rows, filename)
+    chart_session.save_batch(rows[:1], filename)
+
+    with open(filename) as file:
+        lines = file.read().splitlines()
+    assert lines == [
+        "time,open,high,low,close,volume",
+        "60,1.0,2.0,0.5,1.5,10.25",
+        "0,1.0,2.0,0.5,1.0,3.5",
+        "60,1.0,2.0,0.5,1.5,10.25",
+    ]
+
+
+def test_save_batch_refuses_to_replace_binary_files(chart_session, tmp_path):
+    filename = tmp_path / "bars.parquet"
+    filename.write_bytes(b"old")
+
+    with pytest.raises(FileExistsError):
+        chart_session.save_batch([], str(filename))
+    assert filename.read_bytes() == b"old"
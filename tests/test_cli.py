@@ -1,6 +1,11 @@
+import datetime
 import os
+from unittest.mock import patch
 
-from pytradingview.__main__ import resolve_auth_token
+import pytest
+
+from pytradingview.__main__ import main, resolve_auth_token
+from pytradingview.bulk import DownloadJob
 
 
 def test_resolve_auth_token_from_primary_env(monkeypatch):
@@ -29,3 +34,141 @@ def test_resolve_auth_token_none_when_unset(monkeypatch):
     monkeypatch.delenv("TV_AUTH_TOKEN", raising=False)
 
     assert resolve_auth_token(None) is None
+
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr("sys.argv", ["pytradingview", *argv])
+    monkeypatch.delenv("PYTRADINGVIEW_AUTH_TOKEN", raising=False)
+    monkeypatch.delenv("TV_AUTH_TOKEN", raising=False)
+    with patch("pytradingview.TVclient") as client_class:
+        main()
+    client = client_class.return_value
+    on_connected = client.on_connected.call_args.args[0]
+    on_connected(None)
+    return client
+
+
+def test_download_anchors_market_at_end(monkeypatch):
+    client = run_main(monkeypatch, "-d", "-p", "FX:EURUSD", "-t", "1", "-s", "2024-01-01", "-e", "2024-01-02")
+
+    chart = client.chart
+    end = datetime.datetime(2024, 1, 2)
+    chart.set_market.assert_called_once_with("FX:EURUSD", {
+        "timeframe": "1",
+        "currency": "USD",
+        "to": int(end.timestamp()),
+    })
+    chart.download_data.assert_called_once_with(
+        start=datetime.datetime(2024, 1, 1), end=end, filename="output.csv", format=None, compression=None,
+    )
+    client.create_connection.assert_called_once_with()
+
+
+def run_bulk(monkeypatch, summary, *argv):
+    monkeypatch.setattr("sys.argv", ["pytradingview", "-d", "-s", "2024-01-01", "-e", "2024-01-02", *argv])
+    monkeypatch.delenv("PYTRADINGVIEW_AUTH_TOKEN", raising=False)
+    monkeypatch.delenv("TV_AUTH_TOKEN", raising=False)
+    with patch("pytradingview.bulk.BulkDownloader") as downloader_class, \
+            patch("pytradingview.TVclient") as client_class:
+        downloader_class.return_value.run.return_value = summary
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+    client_class.assert_not_called()
+    return downloader_class, exit_info.value.code
+
+
+def summary(**overrides):
+    result = {"jobs": 4, "done": 4, "failed": 0, "bars": 2000, "elapsed": 2.0, "bars_per_sec": 1000.0, "failures": []}
+    result.update(overrides)
+    return result
+
+
+def test_bulk_download_passes_symbols_and_options(monkeypatch, tmp_path, capsys):
+    symbols_file = tmp_path / "symbols.txt"
+    symbols_file.write_text("# majors\nFX:GBPUSD, FX:USDJPY\n\n")
+
+    downloader_class, code = run_bulk(
+        monkeypatch, summary(),
+        "--symbols", "FX:EURUSD, ,OANDA:XAUUSD",
+        "--symbols-file", str(symbols_file),
+        "--timeframes", "1, 60",
+        "--output-dir", str(tmp_path),
+        "--concurrency", "8",
+        "--connections", "2",
+    )
+
+    assert code == 0
+    args, kwargs = downloader_class.call_args
+    assert args == (["FX:EURUSD", "OANDA:XAUUSD", "FX:GBPUSD", "FX:USDJPY"], ["1", "60"])
+    assert kwargs["start"] == datetime.datetime(2024, 1, 1)
+    assert kwargs["end"] == datetime.datetime(2024, 1, 2)
+    assert kwargs["output_dir"] == str(tmp_path)
+    assert kwargs["concurrency"] == 8
+    assert kwargs["connections"] == 2
+    assert kwargs["format"] == "csv"
+    assert "Downloaded 4/4 series, 2000 candles in 2.0s (1000 candles/s), 0 failed" in capsys.readouterr().out
+
+
+def test_bulk_download_defaults_to_single_timeframe(monkeypatch):
+    downloader_class, _ = run_bulk(monkeypatch, summary(), "--symbols", "FX:EURUSD", "-t", "15")
+
+    args, kwargs = downloader_class.call_args
+    assert args == (["FX:EURUSD"], ["15"])
+    assert kwargs["output_dir"] == "."
+    assert kwargs["concurrency"] == 4
+    assert kwargs["connections"] == 1
+
+
+def test_bulk_download_reports_jobs_and_failures(monkeypatch, capsys):
+    failures = [("FX:NOPE", "1", "invalid symbol")]
+    downloader_class, code = run_bulk(
+        monkeypatch, summary(jobs=2, done=1, failed=1, bars=500, failures=failures), "--symbols", "FX:EURUSD,FX:NOPE",
+    )
+
+    report = downloader_class.call_args.kwargs["on_job_done"]
+    done = DownloadJob("FX:EURUSD", "1", "FX_EURUSD_1.csv")
+    done.bars, done.started, done.finished = 500, 10.0, 11.5
+    failed = DownloadJob("FX:NOPE", "1", "FX_NOPE_1.csv")
+    failed.error = "invalid symbol"
+    report(done)
+    report(failed)
+
+    out = capsys.readouterr().out
+    assert code == 1
+    assert "1 failed" in out
+    assert "- FX:NOPE [1]: invalid symbol" in out
+    assert "✅ FX:EURUSD [1]: 500 candles -> FX_EURUSD_1.csv (1.5s)" in out
+    assert "❌ FX:NOPE [1]: invalid symbol" in out
+
+
+@pytest.mark.parametrize("argv, filename, format", [
+    (["-o", "eurusd.parquet"], "eurusd.parquet", None),
+    (["-o", "eurusd.npz"], "eurusd.npz", None),
+    (["-o", "eurusd.dat", "--format", "arrow"], "eurusd.dat", "arrow"),
+])
+def test_download_passes_output_format(monkeypatch, argv, filename, format):
+    client = run_main(monkeypatch, "-d", "-p", "FX:EURUSD", "-s", "2024-01-01", "-e", "2024-01-02",
+                      *argv, "--compression", "zstd")
+
+    kwargs = client.chart.download_data.call_args.kwargs
+    assert kwargs["filename"] == filename
+    assert kwargs["format"] == format
+    assert kwargs["compression"] == "zstd"
+
+
+@pytest.mark.parametrize("argv", [
+    ["-p", "FX:EURUSD", "-o", "eurusd.csv"],
+    ["-p", "FX:EURUSD", "-o", "eurusd.parquet", "--format", "csv"],
+    ["--symbols", "FX:EURUSD"],
+])
+def test_compressed_csv_is_rejected(monkeypatch, capsys, argv):
+    monkeypatch.setattr("sys.argv", ["pytradingview", "-d", "-s", "2024-01-01", "-e", "2024-01-02", "--compression", "zstd", *argv])
+    with patch("pytradingview.TVclient") as client_class, \
+            patch("pytradingview.bulk.BulkDownloader") as downloader_class:
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+
+    assert exit_info.value.code == 2
+    assert capsys.readouterr().out.strip() == "CSV output does not support compression"
+    client_class.assert_not_called()
+    downloader_class.assert_not_called()
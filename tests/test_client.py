@@ -1,7 +1,12 @@
+import json
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
+from pytradingview import protocol
+from pytradingview.chart import ChartSession
 from pytradingview.client import Client
+from pytradingview.quote import QuoteSession
+from pytradingview.sender import DATA, SendQueue, SendQueueFull, TokenBucket
 
 
 @pytest.fixture
@@ -27,7 +32,16 @@ def test_send(client):
     with patch("pytradingview.protocol.format_ws_packet") as mock_format:
         mock_format.return_value = "formatted_packet"
         client.send("test_type", ["param1", "param2"])
-        assert "formatted_packet" in client._Client__send_queue
+        assert "formatted_packet" in client._Client__send_queue.snapshot()
+
+
+def test_send_puts_heartbeats_ahead_of_data(client):
+    client.send("quote_add_symbols", ["qs_test", "FX:EURUSD"])
+    client.send("~h~5")
+
+    queued = client._Client__send_queue.snapshot()
+    assert queued[0] == "~m~4~m~~h~5"
+    assert "quote_add_symbols" in queued[-1]
 
 
 def test_set_auth_token(client):
@@ -35,7 +49,7 @@ def test_set_auth_token(client):
         mock_format.return_value = "auth_packet"
         client.set_auth_token("token-123")
         assert client.auth_token == "token-123"
-        assert "auth_packet" in client._Client__send_queue
+        assert "auth_packet" in client._Client__send_queue.snapshot()
 
 
 def test_login_sets_token(client):
@@ -48,35 +62,121 @@ def test_login_sets_token(client):
 def test_send_queue(client):
     client._Client__is_opened = True
     client._Client__logged = True
-    client._Client__send_queue = ["packet1", "packet2"]
+    client._Client__send_queue = SendQueue()
+    client._Client__send_queue.put("packet1")
+    client._Client__send_queue.put("packet2")
+
+    client.send_queue()
+
+    assert client.flush(timeout=2)
+    assert client.send_queue_depth == 0
+    assert client.wsapp.send.call_args_list == [call("packet1"), call("packet2")]
 
+
+def test_send_queue_waits_until_logged(client):
+    client._Client__is_opened = True
+    client.send("quote_create_session", ["qs_test"])
+
+    assert client.flush(timeout=0.05) is False
+    client.wsapp.send.assert_not_called()
+
+    client._Client__logged = True
     client.send_queue()
 
-    client.wsapp.send.assert_any_call("packet1")
-    client.wsapp.send.assert_any_call("packet2")
+    assert client.flush(timeout=2)
+    assert client.send_stats["sent"] == 2  # set_auth_token + quote_create_session
 
 
 def test_parse_packet_ping(client):
     client._Client__is_opened = True
 
-    with patch("pytradingview.protocol.parse_ws_packet", return_value=[123]):
-        with patch.object(client, "send") as mock_send:
-            with patch.object(client, "handle_event") as mock_event:
-                client.parse_packet("ping_packet")
+    with patch.object(client, "send") as mock_send:
+        with patch.object(client, "handle_event") as mock_event:
+            client.parse_packet("~m~6~m~~h~123")
 
-                mock_send.assert_called_once_with("~h~123")
-                mock_event.assert_called_once_with("ping", 123)
+            mock_send.assert_called_once_with("~h~123")
+            mock_event.assert_called_once_with("ping", 123)
 
 
 def test_parse_packet_error(client):
     client._Client__is_opened = True
-    with patch("pytradingview.protocol.parse_ws_packet") as mock_parse:
-        mock_parse.return_value = [{"m": "protocol_error", "p": ["error_details"]}]
-        with patch.object(client, "handle_error") as mock_handle_error:
-            client.parse_packet("error_packet")
-            mock_handle_error.assert_called_with(
-                "Client critical error:", ["error_details"]
+    payload = '{"m":"protocol_error","p":["error_details"]}'
+    with patch.object(client, "handle_error") as mock_handle_error:
+        client.parse_packet(f"~m~{len(payload)}~m~{payload}")
+        mock_handle_error.assert_called_with(
+            "Client critical error:", ["error_details"]
+        )
+
+
+def test_parse_packet_frame_split_across_messages(client):
+    client._Client__is_opened = True
+    client._Client__logged = True
+    on_data = MagicMock()
+    client.sessions["cs_test"] = {"type": "chart", "onData": on_data}
+    payload = '{"m":"du","p":["cs_test",{"s1":{}}]}'
+    message = f"~m~{len(payload)}~m~{payload}"
+
+    client.parse_packet(message[:20])
+    on_data.assert_not_called()
+
+    client.parse_packet(message[20:])
+    on_data.assert_called_once_with({"type": "du", "data": ["cs_test", {"s1": {}}]})
+
+
+def frame(payload):
+    return f"~m~{len(payload)}~m~{payload}"
+
+
+def test_parse_packet_skips_unrouted_packets_without_decoding(client):
+    client._Client__is_opened = True
+    client._Client__logged = True
+    on_quote = MagicMock()
+    client.sessions["qs_known"] = {"type": "quote", "onData": on_quote, "types": {"qsd"}}
+
+    backend = protocol.get_json_backend()
+    with patch.object(backend, "loads", wraps=backend.loads) as mock_loads:
+        with patch.object(client, "handle_event") as mock_event:
+            client.parse_packet(
+                frame('{"m":"qsd","p":["qs_unknown",{"n":"A","v":{}}]}')
+                + frame('{"m":"quote_list_fields","p":["qs_known",[]]}')
+                + frame("~h~7")
             )
+            mock_event.assert_called_once_with("ping", 7)
+
+        mock_loads.assert_not_called()
+        on_quote.assert_not_called()
+
+        client.parse_packet(frame('{"m":"qsd","p":["qs_known",{"n":"A","v":{"lp":1}}]}'))
+        mock_loads.assert_called_once()
+        on_quote.assert_called_once_with({"type": "qsd", "data": ["qs_known", {"n": "A", "v": {"lp": 1}}]})
+
+
+def test_parse_packet_counts_received_bytes_per_session(client):
+    client._Client__is_opened = True
+    client._Client__logged = True
+    received = {"bytes": 0, "packets": 0}
+    client.sessions["qs_known"] = {"type": "quote", "onData": MagicMock(), "types": {"qsd"}, "received": received}
+    qsd = '{"m":"qsd","p":["qs_known",{"n":"A","v":{"lp":1}}]}'
+    skipped = '{"m":"quote_list_fields","p":["qs_known",[]]}'
+
+    client.parse_packet(frame(qsd) + frame(skipped) + frame('{"m":"qsd","p":["qs_other",{}]}'))
+
+    assert received == {"bytes": len(qsd) + len(skipped), "packets": 2}
+
+
+def test_parse_packet_binary_mode():
+    client = Client(binary=True)
+    client.wsapp = MagicMock()
+    client._Client__is_opened = True
+    client._Client__logged = True
+    on_chart = MagicMock()
+    client.sessions["cs_known"] = {"type": "chart", "onData": on_chart}
+
+    with patch.object(client, "send") as mock_send:
+        client.parse_packet(frame('{"m":"du","p":["cs_known",{}]}').encode() + b"~m~4~m~~h~3")
+
+    on_chart.assert_called_once_with({"type": "du", "data": ["cs_known", {}]})
+    mock_send.assert_called_once_with("~h~3")
 
 
 def test_on_message(client):
@@ -135,7 +235,10 @@ def test_create_connection(client):
             on_open=client.on_open,
             on_error=client.on_ws_error,
         )
-        mock_instance.run_forever.assert_called_once()
+        mock_instance.run_forever.assert_called_once_with(
+            origin="https://s.tradingview.com",
+            skip_utf8_validation=False,
+        )
 
 
 def test_end(client):
@@ -144,3 +247,84 @@ def test_end(client):
 
     client.wsapp.close.assert_called_once()
     mock_callback.assert_called_once()
+
+
+def test_session_packets_keep_their_order_under_throttling():
+    clock = [0.0]
+    client = Client(data_rate_limit=1)
+    client.outbox.rate_limits[DATA] = TokenBucket(rate=1, burst=1, clock=lambda: clock[0])
+    quote = QuoteSession(client.client_bridge)
+    quote.set_up_quote({"fields": "price"})
+    quote.add_symbols(["FX:EURUSD"])
+    quote.delete()
+
+    names = []
+    while client.outbox.depth:
+        item = client.outbox.get_item(block=False)
+        if item is None:
+            clock[0] += 1.0
+            continue
+        names.append(json.loads(item[0].split("~m~", 2)[2])["m"])
+
+    assert names == [
+        "set_auth_token", "quote_create_session", "quote_set_fields",
+        "quote_add_symbols", "quote_fast_symbols", "quote_delete_session",
+    ]
+
+def test_removed_series_is_not_created_after_its_removal():
+    clock = [0.0]
+    client = Client(data_rate_limit=1)
+    client.outbox.rate_limits[DATA] = TokenBucket(rate=1, burst=1, clock=lambda: clock[0])
+    chart = ChartSession(client.client_bridge)
+    chart.set_up_chart()
+    series = chart.add_series("FX:EURUSD", {"timeframe": "1"})
+    chart.remove_series(series)
+
+    names = []
+    while client.outbox.depth:
+        item = client.outbox.get_item(block=False)
+        if item is None:
+            clock[0] += 1.0
+            continue
+        names.append(json.loads(item[0].split("~m~", 2)[2])["m"])
+
+    assert names[-3:] == ["resolve_symbol", "create_series", "remove_series"]
+
+def test_bounded_send_fails_fast_without_a_writer():
+    client = Client(send_queue_size=1)
+    client.send("quote_add_symbols", ["qs_1", "FX:EURUSD"])
+
+    with pytest.raises(SendQueueFull):
+        client.send("quote_add_symbols", ["qs_1", "FX:GBPUSD"])
+    client.send("~h~1")
+    client.send("quote_create_session", ["qs_2"])
+    assert client.send_queue_depth == 4  # with the initial set_auth_token
+
+
+def test_bounded_send_does_not_block_the_receive_thread():
+    client = Client(send_queue_size=1)
+    client.wsapp = MagicMock()
+    client.outbox.rate_limits[DATA] = TokenBucket(rate=1, burst=1, clock=lambda: 0.0)
+    client.outbox.rate_limits[DATA].consume()
+    client.on_open(None)
+    client.on_message(None, "~m~4~m~~h~1")
+    client.send("quote_add_symbols", ["qs_1", "FX:EURUSD"])
+
+    try:
+        with pytest.raises(SendQueueFull):
+            client.send("quote_add_symbols", ["qs_1", "FX:GBPUSD"])
+    finally:
+        client.on_close(None, 1000, "Normal Closure")
+
+
+def test_dropped_packets_are_reported():
+    client = Client(send_queue_size=1, send_queue_policy="drop_oldest")
+    errors = MagicMock()
+    client.on_error(errors)
+
+    client.send("quote_add_symbols", ["qs_1", "FX:EURUSD"])
+    client.send("quote_add_symbols", ["qs_1", "FX:GBPUSD"])
+
+    message, packet = errors.call_args.args[0][0]
+    assert message == "Send queue full, dropped packet:"
+    assert "FX:EURUSD" in packet and client.send_queue_depth == 2
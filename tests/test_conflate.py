@@ -0,0 +1,118 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytradingview.conflate import Conflator, conflate_quotes, conflate_updates, merge_qsd
+
+
+def qsd(symbol, values, status=None):
+    data = {"n": symbol, "v": values}
+    if status:
+        data["s"] = status
+    return {"type": "qsd", "data": ["qs_1", data]}
+
+
+def test_updates_are_merged_per_key_until_the_timer_fires(fake_timer):
+    delivered = []
+    conflator = Conflator(lambda key, value: delivered.append((key, value)), 0.1,
+                          merge=lambda old, new: old + new, timer=fake_timer)
+
+    for key, value in [("A", [1]), ("B", [2]), ("A", [3]), ("A", [4])]:
+        conflator.push(key, value)
+
+    assert delivered == []
+    assert len(fake_timer.created) == 1 and fake_timer.created[0].delay == 0.1
+    fake_timer.created[0].fire()
+
+    assert delivered == [("A", [1, 3, 4]), ("B", [2])]
+    assert conflator.stats() == {"pushed": 4, "delivered": 2, "coalesced": 2, "flushes": 1, "pending": 0}
+
+    conflator.push("A", [5])
+    assert len(fake_timer.created) == 2
+
+
+def test_max_batch_flushes_early_and_cancels_the_timer(fake_timer):
+    deliver = MagicMock()
+    conflator = Conflator(deliver, 1.0, max_batch=2, timer=fake_timer)
+
+    conflator.push("A", 1)
+    conflator.push("A", 2)
+    deliver.assert_not_called()
+    conflator.push("B", 3)
+
+    assert [call.args for call in deliver.call_args_list] == [("A", 2), ("B", 3)]
+    assert fake_timer.created[0].cancelled
+    assert conflator.coalesced == 1
+
+
+def test_timer_deliveries_wait_for_the_lock(fake_timer):
+    lock = threading.RLock()
+    delivered = []
+    conflator = Conflator(lambda key, value: delivered.append(key), 0.1, timer=fake_timer, lock=lock)
+    conflator.push("A", 1)
+
+    with lock:
+        flusher = threading.Thread(target=fake_timer.created[0].fire)
+        flusher.start()
+        flusher.join(0.05)
+        assert delivered == []
+    flusher.join()
+
+    assert delivered == ["A"]
+
+
+def test_close_drops_pending_updates(fake_timer):
+    deliver = MagicMock()
+    conflator = Conflator(deliver, 1.0, timer=fake_timer)
+    conflator.push("A", 1)
+
+    conflator.close()
+
+    assert fake_timer.created[0].cancelled
+    assert conflator.flush() == 0
+    deliver.assert_not_called()
+
+
+@pytest.mark.parametrize("interval, max_batch", [(0, None), (0.1, 0)])
+def test_invalid_settings_are_rejected(interval, max_batch):
+    with pytest.raises(ValueError):
+        Conflator(MagicMock(), interval, max_batch)
+
+
+def test_merge_qsd_keeps_every_changed_field():
+    first = qsd("A", {"lp": 1.0, "ch": 0.1}, "ok")
+    merged = merge_qsd(first, qsd("A", {"lp": 1.2, "volume": 10}))
+
+    assert merged == {"type": "qsd", "data": ["qs_1", {"n": "A", "s": "ok", "v": {"lp": 1.2, "ch": 0.1, "volume": 10}}]}
+    assert first["data"][1]["v"] == {"lp": 1.0, "ch": 0.1}
+
+
+def test_conflated_quote_listener_flushes_a_symbol_before_quote_completed(fake_timer):
+    received = []
+    listener = conflate_quotes(received.append, 0.1, timer=fake_timer)
+
+    listener(qsd("A", {"lp": 1.0}))
+    listener(qsd("B", {"lp": 2.0}))
+    listener(qsd("A", {"ch": 0.5}))
+    listener({"type": "quote_completed", "data": ["qs_1", "A"]})
+
+    assert received == [
+        qsd("A", {"lp": 1.0, "ch": 0.5}),
+        {"type": "quote_completed", "data": ["qs_1", "A"]},
+    ]
+    listener.flush()
+    assert received[-1] == qsd("B", {"lp": 2.0})
+    assert listener.conflator.coalesced == 1
+
+
+def test_conflated_update_listener_merges_changed_keys(fake_timer):
+    callback = MagicMock()
+    listener = conflate_updates(callback, 0.2, timer=fake_timer)
+
+    listener((["$prices"],))
+    listener((["st1"],))
+    listener((["$prices", "st2"],))
+    fake_timer.created[0].fire()
+
+    callback.assert_called_once_with((["$prices", "st1", "st2"],))
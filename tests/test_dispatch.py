@@ -0,0 +1,89 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytradingview.client import Client
+from pytradingview.dispatch import Dispatcher
+
+
+@pytest.fixture
+def dispatcher():
+    d = Dispatcher(workers=4, batch=3)
+    yield d
+    d.close()
+
+
+def test_dispatcher_keeps_per_key_order(dispatcher):
+    seen = {"a": [], "b": []}
+    for i in range(50):
+        dispatcher.submit("a", seen["a"].append, i)
+        dispatcher.submit("b", seen["b"].append, i)
+
+    assert dispatcher.join(timeout=5)
+    assert seen["a"] == list(range(50))
+    assert seen["b"] == list(range(50))
+    assert dispatcher.stats()["keys"]["a"]["processed"] == 50
+
+
+def test_slow_key_does_not_block_others(dispatcher):
+    release = threading.Event()
+    fast = threading.Event()
+
+    dispatcher.submit("slow", release.wait, 5)
+    dispatcher.submit("slow", lambda: None)
+    dispatcher.submit("fast", fast.set)
+
+    assert fast.wait(timeout=2)
+    time.sleep(0.01)
+    lagging = dispatcher.lagging()
+    assert [key for key, _ in lagging] == ["slow"]
+    assert dispatcher.stats()["keys"]["slow"]["depth"] == 1
+
+    release.set()
+    assert dispatcher.join(timeout=5)
+    assert dispatcher.lagging() == []
+
+
+def test_dispatcher_reports_errors():
+    on_error = MagicMock()
+    dispatcher = Dispatcher(workers=1, on_error=on_error)
+    error = ValueError("boom")
+
+    def fail():
+        raise error
+
+    dispatcher.submit("a", fail)
+    dispatcher.close()
+
+    on_error.assert_called_once_with("a", error)
+
+
+def test_symbol_keys_for_quote_packets():
+    dispatcher = Dispatcher(workers=1, key_by="symbol")
+    try:
+        qsd = {"type": "qsd", "data": ["qs_1", {"n": "FX:EURUSD", "v": {}}]}
+        done = {"type": "quote_completed", "data": ["qs_1", "FX:EURUSD"]}
+        du = {"type": "du", "data": ["cs_1", {}]}
+
+        assert dispatcher.key_for("qs_1", qsd) == ("qs_1", "FX:EURUSD")
+        assert dispatcher.key_for("qs_1", done) == ("qs_1", "FX:EURUSD")
+        assert dispatcher.key_for("cs_1", du) == "cs_1"
+    finally:
+        dispatcher.close()
+
+
+def test_client_runs_session_handlers_on_dispatcher(dispatcher):
+    client = Client(dispatcher=dispatcher)
+    client.wsapp = MagicMock()
+    client._Client__is_opened = True
+    client._Client__logged = True
+
+    threads = []
+    client.sessions["cs_1"] = {"type": "chart", "onData": lambda packet: threads.append(threading.current_thread())}
+    payload = '{"m":"du","p":["cs_1",{}]}'
+    client.parse_packet(f"~m~{len(payload)}~m~{payload}")
+
+    assert dispatcher.join(timeout=2)
+    assert threads and threads[0] is not threading.current_thread()
@@ -0,0 +1,97 @@
+import csv
+
+from pytradingview.candles import CandleBatch
+from pytradingview.download import MAX_PAGE_SIZE, HistoryDownload
+from pytradingview.writers import CsvCandleWriter
+
+
+def page(times):
+    return CandleBatch.from_periods([{"v": [t, 1.0, 2.0, 0.5, 1.5, 10.0]} for t in times])
+
+
+class ListWriter:
+    def __init__(self):
+        self.times = []
+        self.closed = False
+
+    def write(self, batch, first, stop):
+        self.times.extend(batch.columns["time"][i] for i in range(stop - 1, first - 1, -1))
+
+    def close(self):
+        self.closed = True
+
+
+def make_download(start, end, **kwargs):
+    writer = ListWriter()
+    requests = []
+    progress = []
+    download = HistoryDownload(start, end, writer, requests.append, progress.append, **kwargs)
+    return download, writer, requests, progress
+
+
+def test_streams_pages_and_dedupes_boundaries():
+    download, writer, requests, progress = make_download(150, 1000)
+
+    assert not download.on_page(page(range(600, 1200, 60)))
+    # Overlaps the first page at 600 and 660.
+    assert not download.on_page(page(range(300, 720, 60)))
+    assert download.on_page(page(range(0, 360, 60)))
+
+    assert writer.times == sorted(set(range(180, 1000, 60)), reverse=True)
+    assert writer.closed
+    assert len(requests) == 2
+    assert progress[-1]["bars"] == len(writer.times)
+    assert progress[-1]["eta"] == 0
+
+
+def test_page_size_grows_and_is_capped_by_remaining_range():
+    download, _, requests, _ = make_download(0, 10**9)
+    times = range(10**8, 10**8 + 60 * 100, 60)
+
+    for _ in range(8):
+        download.on_page(page(times))
+        times = range(times[0] - 60 * 100, times[0], 60)
+
+    assert requests[:3] == [200, 400, 800]
+    assert max(requests) == MAX_PAGE_SIZE
+
+    download, _, requests, _ = make_download(10**8 - 60 * 150, 10**9)
+    download.on_page(page(range(10**8, 10**8 + 60 * 100, 60)))
+    assert requests == [151]
+
+
+def test_stops_when_server_has_no_older_bars():
+    download, writer, requests, _ = make_download(0, 1000)
+
+    download.on_page(page(range(600, 900, 60)))
+    assert download.on_page(page(range(600, 900, 60)))
+
+    assert writer.closed
+    assert len(requests) == 1
+
+
+def test_progress_reports_rate_and_eta():
+    now = [0.0]
+    download, _, _, progress = make_download(0, 1000, clock=lambda: now[0])
+
+    now[0] = 2.0
+    download.on_page(page(range(500, 1000, 100)))
+
+    assert progress[-1]["bars_per_sec"] == 2.5
+    assert progress[-1]["fraction"] == 0.5
+    assert progress[-1]["eta"] == 2.0
+
+
+def test_csv_writer_appends_newest_first(tmp_path):
+    filename = tmp_path / "out.csv"
+    writer = CsvCandleWriter(str(filename))
+
+    writer.write(page([60, 120, 180]), 0, 3)
+    writer.write(page([0]), 0, 1)
+    writer.close()
+
+    with open(filename, newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["time", "open", "high", "low", "close", "volume"]
+    assert [row[0] for row in rows[1:]] == ["180", "120", "60", "0"]
+    assert rows[1] == ["180", "1.0", "2.0", "0.5", "1.5", "10.0"]
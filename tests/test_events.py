@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock
+
+from pytradingview.events import EventBus
+
+
+def test_emit_calls_listeners_in_order():
+    bus = EventBus(("update",))
+    calls = []
+
+    bus.on("update", lambda value: calls.append(("a", value)))
+    bus.on("update", lambda value: calls.append(("b", value)))
+    bus.emit("update", 1)
+
+    assert calls == [("a", 1), ("b", 1)]
+
+
+def test_emit_unknown_topic_is_noop():
+    bus = EventBus()
+
+    bus.emit("nothing", 1)
+
+    assert not bus.has_listeners("nothing")
+
+
+def test_cancel_removes_only_that_listener():
+    bus = EventBus(("update",))
+    first, second = MagicMock(), MagicMock()
+
+    subscription = bus.on("update", first)
+    bus.on("update", second)
+    subscription.cancel()
+    subscription.cancel()
+    bus.emit("update")
+
+    first.assert_not_called()
+    second.assert_called_once_with()
+
+
+def test_once_fires_a_single_time():
+    bus = EventBus(("update",))
+    callback = MagicMock()
+
+    bus.once("update", callback)
+    bus.emit("update", 1)
+    bus.emit("update", 2)
+
+    callback.assert_called_once_with(1)
+    assert not bus.has_listeners("update")
+
+
+def test_unsubscribe_during_emit():
+    bus = EventBus(("update",))
+    second = MagicMock()
+    subscriptions = []
+
+    subscriptions.append(bus.on("update", lambda: subscriptions[1].cancel()))
+    subscriptions.append(bus.on("update", second))
+    bus.emit("update")
+    bus.emit("update")
+
+    second.assert_called_once_with()
+
+
+def test_buses_are_independent():
+    first, second = EventBus(("update",)), EventBus(("update",))
+    callback = MagicMock()
+
+    first.on("update", callback)
+    second.emit("update")
+
+    callback.assert_not_called()
+
+
+def test_clear():
+    bus = EventBus(("update", "error"))
+    bus.on("update", MagicMock())
+    bus.on("error", MagicMock())
+
+    bus.clear("update")
+    assert not bus.has_listeners("update")
+    assert bus.has_listeners("error")
+
+    bus.clear()
+    assert not bus.has_listeners("error")
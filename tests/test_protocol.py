@@ -2,13 +2,29 @@ import json
 import base64
 import zlib
 
+import pytest
+
+from pytradingview import protocol
 from pytradingview.protocol import (
+    FrameDecoder,
     parse_ws_packet,
     format_ws_packet,
     parse_compressed,
+    _null_to_empty,
 )
 
 
+@pytest.fixture(params=["json", "orjson", "msgspec", "ujson"])
+def json_backend(request):
+    previous = protocol.get_json_backend()
+    try:
+        backend = protocol.set_json_backend(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} is not installed")
+    yield backend
+    protocol.set_json_backend(previous.name)
+
+
 def test_parse_ws_packet():
     raw_message = '~m~7~m~{"a":1}~m~13~m~{"b":2,"c":3}'
     expected = [{"a": 1}, {"b": 2, "c": 3}]
@@ -22,6 +38,62 @@ def test_parse_ws_packet():
     assert parse_ws_packet(invalid_message) == [{"a": 1}]
 
 
+def frame(payload):
+    return f"~m~{len(payload)}~m~{payload}"
+
+
+def test_frame_decoder_slices_by_length():
+    decoder = FrameDecoder()
+    payload = '{"m":"qsd","p":["qs_x",{"n":"A~h~B","v":{"s":"~m~1~m~"}}]}'
+    message = frame(payload) + frame("~h~42") + frame('{"b":2}')
+
+    assert list(decoder.decode(message)) == [
+        json.loads(payload),
+        42,
+        {"b": 2},
+    ]
+    assert decoder.pending == 0
+
+
+def test_frame_decoder_keeps_partial_frames():
+    decoder = FrameDecoder()
+    message = frame('{"a":1}') + frame('{"b":[1,2,3]}')
+
+    assert list(decoder.decode(message[:3])) == []
+    assert list(decoder.decode(message[3:16])) == [{"a": 1}]
+    assert decoder.pending > 0
+    assert list(decoder.decode(message[16:])) == [{"b": [1, 2, 3]}]
+    assert decoder.pending == 0
+
+
+def test_frame_decoder_resyncs_on_length_mismatch():
+    decoder = FrameDecoder()
+    message = '~m~3~m~{"a":1}~m~7~m~{"b":2}'
+
+    assert list(decoder.decode(message)) == [{"a": 1}, {"b": 2}]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+@pytest.mark.parametrize("unit", ["utf-8", "utf-16-le"])
+def test_frame_decoder_emits_a_last_frame_measured_in_other_units(binary, unit):
+    payload = '{"d":"rocket \U0001F680"}'
+    length = len(payload.encode(unit)) // (2 if unit == "utf-16-le" else 1)
+    message = f"~m~{length}~m~{payload}"
+    decoder = FrameDecoder(binary)
+
+    assert list(decoder.decode(message.encode() if binary else message)) == [{"d": "rocket \U0001F680"}]
+    assert decoder.pending == 0
+
+
+def test_frame_decoder_waits_for_a_split_non_ascii_frame():
+    payload = '{"d":"\u00e9\u00e9\u00e9\u00e9","x":1}'
+    message = frame(payload)
+    decoder = FrameDecoder()
+
+    assert list(decoder.decode(message[:-4])) == []
+    assert list(decoder.decode(message[-4:])) == [json.loads(payload)]
+
+
 def test_format_ws_packet():
     packet = {"a": 1, "b": None}
     expected = '~m~14~m~{"a":1,"b":""}'
@@ -38,3 +110,57 @@ def test_parse_compressed():
     ).decode()
 
     assert parse_compressed(compressed_data) == original_data
+
+
+def test_json_backend_encoding_is_equivalent(json_backend):
+    packet = {
+        "m": "quote_add_symbols",
+        "p": ["qs_abc", "NASDAQ:AAPL", {"flags": ["force_permission"]}, None],
+        "nested": {"nullable": None, "text": "null/value", "price": 1.25, "unicode": "caf\u00e9"},
+    }
+    expected = (
+        '{"m":"quote_add_symbols","p":["qs_abc","NASDAQ:AAPL",{"flags":["force_permission"]},""],'
+        '"nested":{"nullable":"","text":"null/value","price":1.25,"unicode":"caf\\u00e9"}}'
+    )
+
+    assert json_backend.dumps(packet, null_as_empty=True) == expected
+    assert format_ws_packet(packet) == f"~m~{len(expected)}~m~{expected}"
+
+
+def test_null_to_empty_copies_only_containers_holding_none():
+    flags = {"flags": ["force_permission"]}
+    packet = {"m": "quote_add_symbols", "p": ["qs_abc", "NASDAQ:AAPL", flags]}
+    assert _null_to_empty(packet) is packet
+
+    packet["p"].append(None)
+    converted = _null_to_empty(packet)
+    assert converted == {"m": "quote_add_symbols", "p": ["qs_abc", "NASDAQ:AAPL", flags, ""]}
+    assert converted["p"][2] is flags
+    assert packet["p"][3] is None
+
+
+def test_json_backend_decoding_is_equivalent(json_backend):
+    payload = '{"m":"qsd","p":["qs_abc",{"n":"FX:EURUSD","s":"ok","v":{"lp":1.0842,"ch":null}}]}'
+    message = f"~m~{len(payload)}~m~{payload}~m~5~m~~h~12"
+
+    assert list(FrameDecoder().decode(message)) == [json.loads(payload), 12]
+    assert parse_ws_packet(message) == [json.loads(payload), 12]
+
+
+def test_frame_decoder_binary_mode(json_backend):
+    decoder = FrameDecoder(binary=True)
+    payload = '{"m":"du","p":["cs_abc",{"s1":{"n":"caf\u00e9"}}]}'.encode()
+    message = b"~m~%d~m~" % len(payload) + payload + b"~m~4~m~~h~9"
+
+    payloads = list(decoder.feed(message[:10]))
+    payloads += list(decoder.feed(message[10:]))
+    assert all(isinstance(p, memoryview) for p in payloads)
+    assert protocol.peek_header(payloads[0]) == ("du", "cs_abc")
+    assert protocol.parse_heartbeat(payloads[1]) == 9
+
+    assert list(FrameDecoder(binary=True).decode(message)) == [json.loads(payload), 9]
+
+
+def test_unknown_json_backend_raises():
+    with pytest.raises(KeyError):
+        protocol.set_json_backend("does-not-exist")
@@ -53,3 +53,94 @@ def test_remove_symbol_unsubscribes(quote_session, client_bridge):
     client_bridge["send"].assert_any_call(
         "quote_remove_symbols", [quote_session.session_id, "CME_MINI:ES1!"]
     )
+
+
+def test_qsd_deltas_are_merged_into_snapshots(client_bridge):
+    quote_session = QuoteSession(client_bridge)
+    quote_session.set_up_quote({"customFields": ["lp", "bid", "ask"]})
+    quote_session.add_symbols(["FX:EURUSD", "FX:GBPUSD"])
+
+    def qsd(symbol, values):
+        quote_session.on_data_q({"type": "qsd", "data": [quote_session.session_id, {"n": symbol, "s": "ok", "v": values}]})
+
+    qsd("FX:EURUSD", {"lp": 1.1, "bid": 1.09, "ask": 1.11})
+    qsd("FX:EURUSD", {"lp": 1.12})
+    qsd("FX:GBPUSD", {"lp": 1.3})
+
+    assert quote_session.snapshot("FX:EURUSD") == {"lp": 1.12, "bid": 1.09, "ask": 1.11}
+    assert quote_session.snapshot_many(["FX:GBPUSD"]) == {"FX:GBPUSD": {"lp": 1.3}}
+    # Symbols added without callbacks stay subscribed.
+    assert not any(call.args[0] == "quote_remove_symbols" for call in client_bridge["send"].call_args_list)
+
+    quote_session.remove_symbol("FX:GBPUSD")
+    assert quote_session.snapshot("FX:GBPUSD") is None
+
+
+def test_symbol_left_without_callbacks_is_unsubscribed(quote_session, client_bridge):
+    callback = MagicMock()
+    quote_session.on_symbol("FX:EURUSD", callback)
+    quote_session.off_symbol("FX:EURUSD", callback)
+
+    quote_session.on_data_q({"type": "qsd", "data": [quote_session.session_id, {"n": "FX:EURUSD", "v": {"lp": 1.0}}]})
+
+    client_bridge["send"].assert_called_with("quote_remove_symbols", [quote_session.session_id, "FX:EURUSD"])
+    callback.assert_not_called()
+    assert quote_session.snapshot("FX:EURUSD") is None
+
+
+def test_added_symbol_outlives_its_last_callback(quote_session, client_bridge):
+    callback = MagicMock()
+    quote_session.add_symbols(["FX:EURUSD"])
+    quote_session.on_symbol("FX:EURUSD", callback)
+    quote_session.off_symbol("FX:EURUSD", callback)
+    client_bridge["send"].reset_mock()
+
+    quote_session.on_data_q({"type": "qsd", "data": [quote_session.session_id, {"n": "FX:EURUSD", "v": {"lp": 1.0}}]})
+
+    assert all(call.args[0] != "quote_remove_symbols" for call in client_bridge["send"].call_args_list)
+    assert quote_session.snapshot("FX:EURUSD")["lp"] == 1.0
+
+
+def test_add_symbols_packs_symbols_into_few_messages(client_bridge):
+    quote_session = QuoteSession(client_bridge, chunk_size=100)
+    quote_session.set_up_quote({"fields": "price"})
+    client_bridge["send"].reset_mock()
+
+    quote_session.add_symbols([f"EXCHANGE:S{index}" for index in range(250)])
+
+    names = [call.args[0] for call in client_bridge["send"].call_args_list]
+    assert names == ["quote_add_symbols"] * 3 + ["quote_fast_symbols"] * 3
+
+
+def test_set_symbols_forgets_removed_symbols(quote_session, client_bridge):
+    quote_session.set_symbols(["FX:EURUSD", "FX:GBPUSD"])
+    quote_session.on_data_q({"type": "qsd", "data": [quote_session.session_id, {"n": "FX:GBPUSD", "v": {"lp": 1.3}}]})
+    client_bridge["send"].reset_mock()
+
+    assert quote_session.set_symbols(["FX:EURUSD", "FX:USDJPY"]) == (["FX:USDJPY"], ["FX:GBPUSD"])
+    client_bridge["send"].assert_any_call("quote_remove_symbols", [quote_session.session_id, "FX:GBPUSD"])
+    assert quote_session.snapshot("FX:GBPUSD") is None
+
+
+def test_conflated_session_delivers_merged_packets(client_bridge):
+    quote_session = QuoteSession(client_bridge, conflate=60, conflate_max_batch=2)
+    quote_session.set_up_quote({"customFields": ["lp", "ch"]})
+    received = []
+    quote_session.on_symbol("FX:EURUSD", received.append)
+    quote_session.on_symbol("FX:GBPUSD", received.append)
+
+    def qsd(symbol, values):
+        return {"type": "qsd", "data": [quote_session.session_id, {"n": symbol, "v": values}]}
+
+    quote_session.on_data_q(qsd("FX:EURUSD", {"lp": 1.1}))
+    quote_session.on_data_q(qsd("FX:EURUSD", {"ch": 0.01}))
+    quote_session.on_data_q(qsd("FX:EURUSD", {"lp": 1.2}))
+
+    assert received == []
+    assert quote_session.snapshot("FX:EURUSD") == {"lp": 1.2, "ch": 0.01}
+
+    quote_session.on_data_q(qsd("FX:GBPUSD", {"lp": 1.3}))
+
+    assert received == [qsd("FX:EURUSD", {"lp": 1.2, "ch": 0.01}), qsd("FX:GBPUSD", {"lp": 1.3})]
+    assert quote_session.conflator.stats()["coalesced"] == 2
+    quote_session.delete()
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytradingview.quote import get_quote_fields
+from pytradingview.quote_pool import QuotePool
+
+
+@pytest.fixture
+def client_bridge():
+    return {"sessions": {}, "send": MagicMock(), "end": MagicMock()}
+
+
+def sent(client_bridge, name):
+    return [call.args[1] for call in client_bridge["send"].call_args_list if call.args[0] == name]
+
+
+def test_subscriptions_are_grouped_by_field_set(client_bridge):
+    pool = QuotePool(client_bridge)
+    pool.subscribe(["A", "B"], "all")
+    pool.subscribe(["C", "D", "E"], ["lp"])
+    pool.subscribe(["F"], "price")
+
+    assert len(pool) == 2
+    full, price = pool.sessions
+    assert full.subscriptions.symbols == ["A", "B"]
+    assert price.subscriptions.symbols == ["C", "D", "E", "F"]
+    assert sent(client_bridge, "quote_set_fields") == [
+        [full.session_id, get_quote_fields("all")],
+        [price.session_id, ["lp"]],
+    ]
+    # One chunked message per session and call, not one per symbol.
+    assert len(sent(client_bridge, "quote_add_symbols")) == 3
+
+
+def test_symbol_already_carried_by_a_covering_session_is_not_subscribed_again(client_bridge):
+    pool = QuotePool(client_bridge)
+    pool.subscribe("A", ["lp", "bid", "ask"])
+    pool.subscribe(["A", "B"], ["lp"])
+
+    wide, narrow = pool.sessions
+    assert pool.session_for("A", ["lp"]) is wide
+    assert pool.session_for("B", ["lp"]) is narrow
+    assert narrow.subscriptions.symbols == ["B"]
+
+
+def test_max_extra_fields_reuses_the_smallest_covering_session(client_bridge):
+    pool = QuotePool(client_bridge, max_extra_fields=2)
+    pool.subscribe("A", "all")
+    pool.subscribe("B", ["lp", "ch", "chp"])
+    pool.subscribe("C", ["lp"])
+
+    assert len(pool) == 2
+    assert pool.session_for("C", ["lp"]) is pool.session_for("B", ["lp", "ch", "chp"])
+
+
+def test_callbacks_snapshots_and_received_bytes(client_bridge):
+    pool = QuotePool(client_bridge)
+    updates = []
+    pool.subscribe("A", ["lp"], lambda packet: updates.append(packet["data"][1]["v"]))
+    session = pool.session_for("A", ["lp"])
+
+    client_bridge["sessions"][session.session_id]["received"]["bytes"] += 64
+    session.on_data_q({"type": "qsd", "data": [session.session_id, {"n": "A", "s": "ok", "v": {"lp": 1.5}}]})
+
+    assert updates == [{"lp": 1.5}]
+    assert pool.snapshot("A", ["lp"]) == {"lp": 1.5}
+    assert pool.stats() == [
+        {"session_id": session.session_id, "fields": 1, "symbols": 1, "bytes": 64, "packets": 0},
+    ]
+
+
+def test_unsubscribe_removes_symbols_and_deletes_empty_sessions(client_bridge):
+    pool = QuotePool(client_bridge)
+    pool.subscribe(["A", "B"], ["lp"])
+    pool.subscribe("A", ["lp", "bid"])
+    narrow = pool.session_for("A", ["lp"])
+
+    pool.unsubscribe("A", ["lp"])
+    assert narrow.subscriptions.symbols == ["B"]
+    assert pool.session_for("A", ["lp", "bid"]) is not None
+
+    pool.unsubscribe(["B"], ["lp"])
+    assert len(pool) == 1
+    assert narrow.session_id not in client_bridge["sessions"]
+    assert sent(client_bridge, "quote_delete_session") == [[narrow.session_id]]
+
+    pool.close()
+    assert client_bridge["sessions"] == {}
+
+
+def test_unsubscribing_a_callback_keeps_a_shared_symbol(client_bridge):
+    pool = QuotePool(client_bridge)
+    pool.subscribe(["FX:EURUSD"], "all")
+    callback = MagicMock()
+    pool.subscribe(["FX:EURUSD"], ["lp"], callback)
+    session = pool.session_for("FX:EURUSD", "all")
+    assert pool.session_for("FX:EURUSD", ["lp"]) is session
+
+    pool.unsubscribe(["FX:EURUSD"], ["lp"])
+    session.on_data_q({"type": "qsd", "data": [session.session_id, {"n": "FX:EURUSD", "v": {"lp": 1.1}}]})
+
+    assert sent(client_bridge, "quote_remove_symbols") == []
+    assert pool.snapshot("FX:EURUSD", "all")["lp"] == 1.1
+    assert pool.stats()[0]["symbols"] == 1
+    callback.assert_not_called()
+
+
+def test_empty_field_list_is_rejected(client_bridge):
+    with pytest.raises(ValueError):
+        QuotePool(client_bridge).subscribe("A", [])
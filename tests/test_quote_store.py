@@ -0,0 +1,80 @@
+import sys
+
+from pytradingview.quote_store import QuoteStore
+
+
+def test_merges_deltas_into_fixed_slots():
+    store = QuoteStore(["lp", "ch", "volume"])
+    store.update("FX:EURUSD", {"lp": 1.1, "ch": 0.01}, "ok")
+    store.update("FX:EURUSD", {"lp": 1.2})
+
+    assert store.snapshot("FX:EURUSD") == {"lp": 1.2, "ch": 0.01}
+    assert store.get("FX:EURUSD", "lp") == 1.2
+    assert store.get("FX:EURUSD", "volume", 0) == 0
+    assert store.status("FX:EURUSD") == "ok"
+    assert store.snapshot("FX:GBPUSD") is None
+
+
+def test_null_values_are_kept():
+    store = QuoteStore(["bid"])
+    store.update("FX:EURUSD", {"bid": None})
+    assert store.snapshot("FX:EURUSD") == {"bid": None}
+
+
+def test_unknown_fields_get_new_slots():
+    store = QuoteStore(["lp"])
+    store.update("A", {"lp": 1})
+    store.update("B", {"lp": 2, "bid": 1.5})
+    store.update("A", {"ask": 3})
+
+    assert store.fields == ["lp", "bid", "ask"]
+    assert store.snapshot("A") == {"lp": 1, "ask": 3}
+    assert store.snapshot("B") == {"lp": 2, "bid": 1.5}
+    assert store.get("A", "bid") is None
+
+
+def test_snapshot_many_and_removal():
+    store = QuoteStore(["lp"])
+    for index, symbol in enumerate(["A", "B", "C"]):
+        store.update(symbol, {"lp": index})
+
+    assert store.snapshot_many(["C", "A", "missing"]) == {"C": {"lp": 2}, "A": {"lp": 0}}
+    assert store.snapshot_many() == {"A": {"lp": 0}, "B": {"lp": 1}, "C": {"lp": 2}}
+
+    store.remove("B")
+    assert "B" not in store
+    assert len(store) == 2
+    store.clear()
+    assert store.symbols() == []
+    assert store.fields == ["lp"]
+
+
+def test_symbol_keys_are_interned():
+    store = QuoteStore(["lp"])
+    symbol = "".join(["EXCHANGE:", "SYMBOL"])
+    store.update(symbol, {"lp": 1})
+    assert store.symbols()[0] is sys.intern("EXCHANGE:SYMBOL")
+
+
+def test_status_tracks_errors():
+    store = QuoteStore(["lp"])
+    store.update("BAD:SYMBOL", {}, "error")
+    store.update("FX:EURUSD", {"lp": 1.0}, "ok")
+
+    assert store.status("BAD:SYMBOL") == "error"
+    assert store.status("FX:EURUSD") == "ok"
+    assert store.status("missing") is None
+    store.update("BAD:SYMBOL", {"lp": 2.0}, "ok")
+    assert store.status("BAD:SYMBOL") == "ok"
+
+
+def test_snapshot_is_a_read_only_copy():
+    store = QuoteStore(["lp", "bid"])
+    store.update("A", {"lp": 1.0})
+    snapshot = store.snapshot("A")
+    store.update("A", {"lp": 2.0, "ask": 3.0})
+
+    assert dict(snapshot) == {"lp": 1.0}
+    assert len(snapshot) == 1
+    assert "bid" not in snapshot and "ask" not in snapshot
+    assert store.snapshot("A")["ask"] == 3.0
@@ -0,0 +1,223 @@
+import datetime
+import sys
+import pytest
+from unittest.mock import MagicMock
+
+from pytradingview.candles import CandleBatch
+from pytradingview.chart import ChartSession
+from pytradingview.resample import Resampler, check_timeframes, parse_session, parse_timeframe
+
+# Monday 2024-01-08 00:00 UTC
+MONDAY = 1_704_672_000
+
+
+def minute_bars(start, count, step=60):
+    return CandleBatch.from_rows([
+        {"time": start + i * step, "open": float(i), "high": i + 0.5, "low": i - 0.5, "close": i + 0.25, "volume": 1.0}
+        for i in range(count)
+    ])
+
+
+def test_parse_timeframe():
+    assert parse_timeframe("5") == ("S", 300)
+    assert parse_timeframe("30S") == ("S", 30)
+    assert parse_timeframe("D") == ("D", 1)
+    assert parse_timeframe("1W") == ("W", 1)
+    assert parse_timeframe("3M") == ("M", 3)
+    with pytest.raises(ValueError):
+        parse_timeframe("2D")
+    with pytest.raises(ValueError):
+        parse_timeframe("abc")
+
+
+def test_parse_session():
+    assert parse_session(None) == (0, 1440, None)
+    assert parse_session("24x7") == (0, 1440, None)
+    assert parse_session("0930-1600") == (570, 960, None)
+    assert parse_session("1700-1600:23456") == (1020, 960, frozenset({2, 3, 4, 5, 6}))
+    assert parse_session("0400-0930,0930-1600") == (240, 960, None)
+    with pytest.raises(ValueError):
+        parse_session("nine-five")
+
+
+def test_check_timeframes():
+    check_timeframes("15", "5")
+    check_timeframes("60", "30S")
+    check_timeframes("D", "60")
+    check_timeframes("W", "D")
+    check_timeframes("3M", "M")
+    for timeframe, base in (("7", "5"), ("30S", "1"), ("60", "D"), ("M", "W"), ("W", "M"), ("2M", "3M")):
+        with pytest.raises(ValueError):
+            check_timeframes(timeframe, base)
+
+
+def test_named_zones_fail_early_without_zoneinfo(monkeypatch):
+    monkeypatch.setitem(sys.modules, "zoneinfo", None)
+    monkeypatch.setitem(sys.modules, "backports.zoneinfo", None)
+
+    with pytest.raises(ImportError):
+        Resampler("60", timezone="America/New_York")
+    Resampler("60", timezone=datetime.timezone.utc).load(minute_bars(MONDAY, 2))
+
+
+def test_load_aggregates_history():
+    resampler = Resampler("5")
+    loaded = MagicMock()
+    resampler.on_series_loaded(loaded)
+
+    resampler.load(minute_bars(MONDAY, 12))
+
+    rows = resampler.candles.rows()
+    assert [row["time"] for row in rows] == [MONDAY, MONDAY + 300, MONDAY + 600]
+    assert rows[0] == {"time": MONDAY, "open": 0.0, "high": 4.5, "low": -0.5, "close": 4.25, "volume": 5.0}
+    assert rows[2]["volume"] == 2.0
+    batch = loaded.call_args.args[0][0]
+    assert list(batch.view("time")) == [MONDAY, MONDAY + 300, MONDAY + 600]
+
+
+def test_live_updates_form_and_close_bars():
+    resampler = Resampler("5")
+    updates, closed = MagicMock(), MagicMock()
+    resampler.on_update(updates)
+    resampler.on_bar_closed(closed)
+
+    resampler.update(MONDAY, 1.0, 1.0, 1.0, 1.0, 1.0)
+    resampler.update(MONDAY, 1.0, 3.0, 1.0, 2.0, 2.0)       # forming base bar changes
+    resampler.update(MONDAY + 60, 2.0, 2.5, 0.5, 1.5, 4.0)  # next base bar, same bucket
+    assert resampler.get_periods == {
+        "time": MONDAY, "open": 1.0, "close": 1.5, "high": 3.0, "low": 0.5, "volume": 6.0,
+    }
+    closed.assert_not_called()
+
+    resampler.update(MONDAY + 300, 1.5, 1.6, 1.4, 1.6, 1.0)
+    assert closed.call_args.args[0][0] == {
+        "time": MONDAY, "open": 1.0, "close": 1.5, "high": 3.0, "low": 0.5, "volume": 6.0,
+    }
+    assert updates.call_count == 4
+    assert updates.call_args.args[0] == (["$prices"],)
+    assert len(resampler.candles) == 2
+
+    resampler.update(MONDAY - 60, 1.0, 1.0, 1.0, 1.0, 1.0)
+    assert resampler.late == 1
+
+
+def test_older_pages_merge_in_front():
+    resampler = Resampler("5")
+    resampler.load(minute_bars(MONDAY + 180, 4))   # 00:03 .. 00:06
+    resampler.load(minute_bars(MONDAY - 120, 5))   # 23:58 .. 00:02, older page
+
+    rows = resampler.candles.rows()
+    assert [row["time"] for row in rows] == [MONDAY - 300, MONDAY, MONDAY + 300]
+    first_bucket = rows[1]
+    assert first_bucket["open"] == 2.0      # 00:00 bar of the older page
+    assert first_bucket["close"] == 1.25    # 00:04 bar of the newer page
+    assert first_bucket["volume"] == 5.0
+
+    resampler.load(minute_bars(MONDAY - 600, 6))   # 23:50 .. 23:55, touches the stored 23:55 bucket
+    rows = resampler.candles.rows()
+    assert rows[0]["time"] == MONDAY - 600
+    assert rows[1]["volume"] == 3.0
+    assert rows[1]["open"] == 5.0
+
+
+def test_session_and_timezone_boundaries():
+    zoneinfo = pytest.importorskip("zoneinfo")
+    new_york = zoneinfo.ZoneInfo("America/New_York")
+    resampler = Resampler("60", timezone="America/New_York", session="0930-1600")
+    open_time = int(datetime.datetime(2024, 1, 8, 9, 30, tzinfo=new_york).timestamp())
+    resampler.load(minute_bars(open_time - 600, 6 * 60 + 50))  # 09:20 .. 16:09
+
+    times = [row["time"] for row in resampler.candles.rows()]
+    assert times[0] == open_time
+    assert times[1] == open_time + 3600
+    assert len(times) == 7
+    assert resampler.skipped == 20                       # before the open and after the close
+    assert resampler.candles[-1]["volume"] == 30.0       # 15:30 bar cut at the close
+
+
+def test_daily_bars_follow_overnight_session():
+    zoneinfo = pytest.importorskip("zoneinfo")
+    new_york = zoneinfo.ZoneInfo("America/New_York")
+    resampler = Resampler("D", timezone=new_york, session="1800-1700")
+    # The session of Monday 2024-03-11 opens on Sunday at 18:00.
+    sunday_open = int(datetime.datetime(2024, 3, 10, 18, 0, tzinfo=new_york).timestamp())
+    minutes = 23 * 60
+    resampler.load(minute_bars(sunday_open, minutes + 61))   # through Monday 18:00
+
+    rows = resampler.candles.rows()
+    assert [row["time"] for row in rows] == [sunday_open, sunday_open + 24 * 3600]
+    assert rows[0]["volume"] == minutes
+    assert resampler.skipped == 60
+
+
+def test_daily_bars_across_dst_change():
+    zoneinfo = pytest.importorskip("zoneinfo")
+    new_york = zoneinfo.ZoneInfo("America/New_York")
+    resampler = Resampler("D", timezone="America/New_York")
+    saturday = int(datetime.datetime(2024, 3, 9, tzinfo=new_york).timestamp())
+    resampler.load(minute_bars(saturday, (3 * 24 - 1) * 60))
+
+    rows = resampler.candles.rows()
+    assert [datetime.datetime.fromtimestamp(row["time"], new_york).hour for row in rows] == [0, 0, 0]
+    assert rows[1]["volume"] == 23 * 60   # Sunday 2024-03-10 has 23 hours
+    assert rows[2]["time"] - rows[1]["time"] == 23 * 3600
+
+
+def test_weekly_and_monthly_buckets():
+    weekly = Resampler("W")
+    weekly.load(minute_bars(MONDAY - 86400, 3, step=86400))   # Sunday, Monday, Tuesday
+    assert [row["time"] for row in weekly.candles.rows()] == [MONDAY - 7 * 86400, MONDAY]
+
+    quarterly = Resampler("3M")
+    january = int(datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc).timestamp())
+    april = int(datetime.datetime(2024, 4, 1, tzinfo=datetime.timezone.utc).timestamp())
+    quarterly.load(minute_bars(january, 5, step=30 * 86400))
+    assert [row["time"] for row in quarterly.candles.rows()] == [january, april]
+
+
+@pytest.fixture
+def chart():
+    bridge = {"sessions": {}, "send": MagicMock(), "end": MagicMock()}
+    chart = ChartSession(bridge)
+    chart.set_up_chart()
+    return chart
+
+
+def test_follows_chart_session(chart):
+    session_id = chart.chart_session["sessionID"]
+    chart.on_data_c({"type": "symbol_resolved", "data": [session_id, "ser_1", {"timezone": "Etc/UTC", "session": "24x7"}]})
+    resampler = chart.resample("5")
+    closed = MagicMock()
+    resampler.on_bar_closed(closed)
+
+    chart.on_data_c({"type": "timescale_update", "data": [session_id, {"$prices": {"s": [
+        {"i": i, "v": [MONDAY + i * 60, 1.0, 2.0, 0.5, 1.5, 10.0]} for i in range(7)
+    ]}}]})
+    assert [row["time"] for row in resampler.candles.rows()] == [MONDAY, MONDAY + 300]
+
+    # A packet finishing the forming base bar and opening the next one.
+    chart.on_data_c({"type": "du", "data": [session_id, {"$prices": {"s": [
+        {"i": 6, "v": [MONDAY + 360, 1.0, 3.0, 0.5, 2.5, 20.0]},
+        {"i": 7, "v": [MONDAY + 420, 2.5, 2.5, 2.5, 2.5, 1.0]},
+    ]}}]})
+    assert resampler.get_periods == {"time": MONDAY + 300, "open": 1.0, "close": 2.5, "high": 3.0, "low": 0.5, "volume": 31.0}
+    closed.assert_not_called()
+
+    chart.on_data_c({"type": "du", "data": [session_id, {"$prices": {"s": [
+        {"i": 10, "v": [MONDAY + 600, 2.0, 2.0, 2.0, 2.0, 1.0]},
+    ]}}]})
+    assert closed.call_args.args[0][0]["volume"] == 31.0
+
+    chart.on_data_c({"type": "symbol_resolved", "data": [session_id, "ser_2", {}]})
+    assert len(resampler.candles) == 0
+    resampler.detach()
+    assert not chart.events.has_listeners("update")
+
+
+def test_timeframe_must_be_a_multiple_of_the_chart(chart):
+    chart.set_market("FX:EURUSD", {"timeframe": "5"})
+
+    with pytest.raises(ValueError):
+        chart.resample("7")
+    assert not chart.events.has_listeners("update")
+    assert chart.resample("15").timeframe == "15"
@@ -0,0 +1,210 @@
+import threading
+
+import pytest
+
+from pytradingview.sender import (
+    CONTROL,
+    DATA,
+    HEARTBEAT,
+    SendQueue,
+    SendQueueFull,
+    TokenBucket,
+    packet_priority,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_send_queue_is_fifo():
+    queue = SendQueue()
+    for packet in ("a", "b", "c"):
+        queue.put(packet)
+
+    assert queue.depth == 3
+    assert [queue.get(block=False) for _ in range(3)] == ["a", "b", "c"]
+    assert queue.get(block=False) is None
+
+
+def test_send_queue_drop_oldest():
+    queue = SendQueue(maxsize=2, policy="drop_oldest")
+    for packet in ("a", "b", "c"):
+        queue.put(packet)
+
+    assert queue.snapshot() == ["b", "c"]
+    stats = queue.stats()
+    assert (stats["depth"], stats["sent"], stats["dropped"]) == (2, 0, 1)
+
+
+def test_send_queue_raise():
+    queue = SendQueue(maxsize=1, policy="raise")
+    queue.put("a")
+
+    with pytest.raises(SendQueueFull):
+        queue.put("b")
+
+
+def test_send_queue_block_waits_for_room():
+    queue = SendQueue(maxsize=1, policy="block", put_timeout=2)
+    queue.put("a")
+
+    writer = threading.Thread(target=lambda: queue.put("b"))
+    writer.start()
+    assert queue.get() == "a"
+    writer.join(timeout=2)
+
+    assert queue.snapshot() == ["b"]
+
+
+def test_send_queue_block_times_out():
+    queue = SendQueue(maxsize=1, policy="block", put_timeout=0.01)
+    queue.put("a")
+
+    with pytest.raises(SendQueueFull):
+        queue.put("b")
+
+
+def test_send_queue_close_wakes_getter():
+    queue = SendQueue()
+    result = []
+    getter = threading.Thread(target=lambda: result.append(queue.get()))
+    getter.start()
+
+    queue.close()
+    getter.join(timeout=2)
+
+    assert result == [None]
+
+
+def test_send_queue_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        SendQueue(policy="ignore")
+
+
+def test_packet_priority():
+    assert packet_priority("~h~12") == HEARTBEAT
+    assert packet_priority("set_auth_token") == CONTROL
+    assert packet_priority("quote_create_session") == CONTROL
+    assert packet_priority("quote_add_symbols") == DATA
+    assert packet_priority({"m": "request_more_data", "p": []}) == DATA
+
+
+def test_send_queue_serves_higher_priority_first():
+    queue = SendQueue()
+    queue.put("add-1", DATA)
+    queue.put("add-2", DATA)
+    queue.put("create", CONTROL)
+    queue.put("ping", HEARTBEAT)
+
+    assert [queue.get(block=False) for _ in range(4)] == ["ping", "create", "add-1", "add-2"]
+
+    classes = queue.stats()["classes"]
+    assert classes["heartbeat"]["sent"] == 1
+    assert classes["data"]["sent"] == 2
+    assert classes["data"]["wait_max"] >= classes["data"]["wait_avg"] >= 0
+
+
+def test_send_queue_drop_oldest_spares_heartbeats_and_control():
+    dropped = []
+    queue = SendQueue(maxsize=1, policy="drop_oldest", on_drop=dropped.append)
+    queue.put("add-1", DATA)
+    queue.put("delete", CONTROL, session="qs_1")
+    queue.put("ping", HEARTBEAT)
+    queue.put("add-2", DATA)
+
+    assert queue.snapshot() == ["ping", "delete", "add-2"]
+    assert dropped == ["add-1"]
+    assert queue.stats()["dropped"] == 1
+
+
+@pytest.mark.parametrize("policy", ["raise", "block", "drop_oldest"])
+def test_full_send_queue_still_takes_heartbeats_and_control(policy):
+    queue = SendQueue(maxsize=1, policy=policy, put_timeout=0.01)
+    queue.put("add-1", DATA)
+
+    queue.put("~h~1", HEARTBEAT)
+    queue.put("set_auth_token", CONTROL, front=True)
+
+    assert queue.snapshot() == ["~h~1", "set_auth_token", "add-1"]
+
+
+def test_send_queue_block_fails_fast_when_it_cannot_wait():
+    queue = SendQueue(maxsize=1, policy="block")
+    queue.put("add-1", DATA)
+
+    with pytest.raises(SendQueueFull):
+        queue.put("add-2", DATA, block=False)
+    assert queue.snapshot() == ["add-1"]
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+
+    assert bucket.consume() and bucket.consume()
+    assert not bucket.consume()
+    assert bucket.delay() == pytest.approx(0.5)
+
+    clock.now = 0.5
+    assert bucket.consume()
+
+
+def test_rate_limit_does_not_hold_back_heartbeats():
+    clock = FakeClock()
+    queue = SendQueue(rate_limits={DATA: TokenBucket(rate=1, burst=1, clock=clock)})
+    queue.put("add-1", DATA)
+    queue.put("add-2", DATA)
+
+    assert queue.get(block=False) == "add-1"
+    assert queue.get(block=False) is None
+
+    queue.put("ping", HEARTBEAT)
+    assert queue.get(block=False) == "ping"
+
+    clock.now = 1.0
+    assert queue.get(block=False) == "add-2"
+
+
+def test_session_order_is_kept_under_throttling():
+    clock = FakeClock()
+    queue = SendQueue(rate_limits={DATA: TokenBucket(rate=1, burst=1, clock=clock)})
+    queue.put("other-add", DATA, "qs_other")
+    queue.put("create", CONTROL, "qs_1")
+    queue.put("set-fields", CONTROL, "qs_1")
+    queue.put("add", DATA, "qs_1")
+    queue.put("fast", DATA, "qs_1")
+    queue.put("delete", CONTROL, "qs_1")
+    queue.put("other-delete", CONTROL, "qs_other")
+    queue.put("auth", CONTROL)
+
+    sent = []
+    for _ in range(20):
+        item = queue.get_item(block=False)
+        if item is None:
+            clock.now += 1.0
+            continue
+        sent.append(item[0])
+
+    assert sent == ["create", "set-fields", "auth", "other-add", "add", "fast", "delete", "other-delete"]
+    assert queue.depth == 0 and queue._sessions == {}
+
+
+
+def test_discard_sessions_keeps_unbound_packets():
+    queue = SendQueue()
+    queue.put("create-1", CONTROL, "qs_1")
+    queue.put("add-1", DATA, "qs_1")
+    queue.put("add-2", DATA, "qs_2")
+    queue.put("locale", CONTROL)
+    queue.put("auth", CONTROL, front=True)
+
+    assert queue.discard_sessions({"qs_1"}) == 2
+    assert queue.snapshot() == ["auth", "locale", "add-2"]
+    assert queue.discard_sessions() == 1
+    assert queue.snapshot() == ["auth", "locale"]
+    assert queue.stats()["dropped"] == 3
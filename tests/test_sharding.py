@@ -0,0 +1,118 @@
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pytradingview.sharding import HashRing, ShardedClient
+
+
+SYMBOLS = [f"NASDAQ:SYM{i}" for i in range(60)]
+
+
+@pytest.fixture
+def sharded():
+    client = ShardedClient(shards=3, quote_options={"fields": "price"})
+    for shard in client.shards:
+        shard.client.wsapp = MagicMock()
+    return client
+
+
+def queued(shard, message_type):
+    return [packet for packet in shard.client.outbox.snapshot() if f'"m":"{message_type}"' in packet]
+
+
+def test_hash_ring_is_stable_and_minimal():
+    ring = HashRing(range(4))
+    before = {key: ring.get(key) for key in SYMBOLS}
+
+    ring.remove(2)
+    after = {key: ring.get(key) for key in SYMBOLS}
+
+    assert all(after[key] == before[key] for key in SYMBOLS if before[key] != 2)
+    assert 2 not in after.values()
+    assert HashRing().get("anything") is None
+
+
+def test_add_symbols_spreads_across_shards(sharded):
+    sharded.add_symbols(SYMBOLS)
+
+    counts = Counter(sharded.owner_of(symbol) for symbol in SYMBOLS)
+    assert set(counts) == {0, 1, 2}
+    for shard in sharded.shards:
+        assert len(queued(shard, "quote_add_symbols")) == len(shard.symbols)
+
+
+def test_merged_quote_callbacks(sharded):
+    received = []
+    sharded.on_quote(lambda symbol, packet: received.append(symbol))
+    sharded.add_symbols(SYMBOLS[:5])
+
+    symbol = SYMBOLS[3]
+    shard = sharded.shards[sharded.owner_of(symbol)]
+    shard.quote.on_data_q({
+        "type": "qsd",
+        "data": [shard.quote.session_id, {"n": symbol, "v": {"lp": 1.0}}],
+    })
+
+    assert received == [symbol]
+    assert sharded.stats()[shard.index]["updates"] == 1
+
+
+def test_disconnect_moves_symbols_and_charts(sharded):
+    sharded.add_symbols(SYMBOLS)
+    key = sharded.add_chart(SYMBOLS[0], {"timeframe": "1"})
+    lost = sharded.owner_of(SYMBOLS[0])
+    shard = sharded.shards[lost]
+    moved = set(shard.symbols)
+
+    shard.client.on_close(shard.client.wsapp, 1006, "gone")
+
+    assert not shard.symbols and not shard.charts
+    assert all(sharded.owner_of(symbol) not in (None, lost) for symbol in moved)
+    assert sharded.chart(key) is not None
+    assert sharded.stats()[lost]["symbols"] == 0
+
+
+def test_reconnect_moves_symbols_home(sharded):
+    sharded.add_symbols(SYMBOLS)
+    home = {symbol: sharded.owner_of(symbol) for symbol in SYMBOLS}
+    shard = sharded.shards[1]
+    shard.client.on_close(shard.client.wsapp, 1006, "gone")
+
+    with patch.object(shard.client, "create_connection") as connect:
+        sharded.reconnect(1)
+        shard.thread.join(1)
+    connect.assert_called_once()
+    shard.client.on_open(shard.client.wsapp)
+
+    assert {symbol: sharded.owner_of(symbol) for symbol in SYMBOLS} == home
+
+
+def test_reconnect_sends_auth_first_and_drops_the_old_sessions(sharded):
+    sharded.add_symbols(SYMBOLS)
+    key = sharded.add_chart(SYMBOLS[0], {"timeframe": "1"})
+    shard = sharded.shards[sharded.owner_of(SYMBOLS[0])]
+    client = shard.client
+    client.on_open(client.wsapp)
+    old_quote = shard.quote
+    old_chart = sharded.chart(key)
+    old_sessions = set(client.sessions)
+    # Packets still queued when the connection drops belong to the dead sessions.
+    assert queued(shard, "quote_add_symbols")
+
+    client.on_close(client.wsapp, 1006, "gone")
+    assert set(client.sessions) == {old_quote.session_id}
+    with patch.object(client, "create_connection"):
+        sharded.reconnect(shard.index)
+        shard.thread.join(1)
+    client.on_open(client.wsapp)
+
+    assert shard.quote is not old_quote
+    assert not old_sessions & set(client.sessions)
+    packets = client.outbox.snapshot()
+    assert '"m":"set_auth_token"' in packets[0]
+    assert not [packet for packet in packets if any(session in packet for session in old_sessions)]
+    creates = [packet for packet in packets if '"m":"quote_create_session"' in packet]
+    assert len(creates) == 1 and shard.quote.session_id in creates[0]
+    assert sharded.chart(key) is not old_chart
+    assert len(queued(shard, "chart_create_session")) == 1
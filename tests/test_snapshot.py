@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytradingview.quote import QuoteSession
+from pytradingview.snapshot import COMPLETE, ERROR, PARTIAL, SnapshotRow
+
+
+class FakeServer:
+    """Answers quote subscriptions synchronously from a script of quotes per symbol."""
+
+    def __init__(self, quotes, slow=(), rejected=()):
+        self.quotes = quotes
+        self.slow = set(slow)
+        self.rejected = set(rejected)
+        self.sent = []
+        self.subscribed = set()
+        self.max_subscribed = 0
+        self.bridge = {"sessions": {}, "send": self.send, "end": MagicMock()}
+
+    def send(self, name, payload):
+        self.sent.append((name, payload))
+        symbols = [item for item in payload[1:] if isinstance(item, str)]
+        if name == "quote_remove_symbols":
+            self.subscribed.difference_update(symbols)
+        if name != "quote_add_symbols":
+            return
+        self.subscribed.update(symbols)
+        self.max_subscribed = max(self.max_subscribed, len(self.subscribed))
+        on_data = self.bridge["sessions"][payload[0]]["onData"]
+        for symbol in symbols:
+            if symbol in self.rejected:
+                on_data({"type": "qsd", "data": [payload[0], {"n": symbol, "s": "error", "v": {}}]})
+                continue
+            on_data({"type": "qsd", "data": [payload[0], {"n": symbol, "s": "ok", "v": self.quotes.get(symbol, {})}]})
+            if symbol not in self.slow:
+                on_data({"type": "quote_completed", "data": [payload[0], symbol]})
+
+
+def test_fetch_snapshot_returns_a_row_per_symbol():
+    server = FakeServer(
+        {"A": {"lp": 1.0, "ch": 0.1}, "B": {"lp": 2.0}, "SLOW": {"lp": 3.0}},
+        slow=["SLOW"], rejected=["BAD"],
+    )
+    quote = QuoteSession(server.bridge)
+    quote.set_up_quote({"fields": "price"})
+    quote.add_symbols(["A"])
+
+    rows = quote.fetch_snapshot(["A", "SLOW", "B", "BAD", "A"], fields=["lp", "ch"], timeout=0.05)
+
+    assert rows == [
+        SnapshotRow("A", COMPLETE, {"lp": 1.0, "ch": 0.1}),
+        SnapshotRow("SLOW", PARTIAL, {"lp": 3.0}),
+        SnapshotRow("B", COMPLETE, {"lp": 2.0}),
+        SnapshotRow("BAD", ERROR, {}),
+    ]
+    # The temporary session is gone; the streaming one keeps its symbol.
+    assert list(server.bridge["sessions"]) == [quote.session_id]
+    assert quote.subscriptions.symbols == ["A"]
+    sessions = {payload[0] for name, payload in server.sent if name == "quote_set_fields"}
+    assert len(sessions) == 2
+
+
+def test_fetch_snapshot_bounds_symbols_in_flight():
+    symbols = [f"S{index}" for index in range(25)]
+    server = FakeServer({symbol: {"lp": float(index)} for index, symbol in enumerate(symbols)})
+    quote = QuoteSession(server.bridge, chunk_size=5)
+    quote.set_up_quote({"fields": "price"})
+
+    rows = quote.fetch_snapshot(symbols, timeout=1.0, max_in_flight=10)
+
+    assert [row.fields["lp"] for row in rows] == [float(index) for index in range(25)]
+    assert all(row.state == COMPLETE for row in rows)
+    assert server.max_subscribed <= 10
+    adds = [payload for name, payload in server.sent if name == "quote_add_symbols"]
+    assert all(len(payload) - 2 <= 5 for payload in adds)
+
+
+def test_fetch_snapshot_rejects_empty_window():
+    server = FakeServer({})
+    quote = QuoteSession(server.bridge)
+    quote.set_up_quote({"fields": "price"})
+    with pytest.raises(ValueError):
+        quote.fetch_snapshot(["A"], max_in_flight=0)
+    assert list(server.bridge["sessions"]) == [quote.session_id]
@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytradingview.subscriptions import FORCE_PERMISSION, SubscriptionManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def messages(send):
+    return [(call.args[0], call.args[1]) for call in send.call_args_list]
+
+
+def test_symbols_are_packed_into_chunks():
+    send = MagicMock()
+    manager = SubscriptionManager(send, "qs_1", chunk_size=2)
+
+    assert manager.add(["A", "B", "C"]) == ["A", "B", "C"]
+
+    assert messages(send) == [
+        ("quote_add_symbols", ["qs_1", "A", "B", FORCE_PERMISSION]),
+        ("quote_add_symbols", ["qs_1", "C", FORCE_PERMISSION]),
+        ("quote_fast_symbols", ["qs_1", "A", "B"]),
+        ("quote_fast_symbols", ["qs_1", "C"]),
+    ]
+    assert manager.symbols == ["A", "B", "C"]
+
+
+def test_set_symbols_sends_only_the_delta():
+    send = MagicMock()
+    manager = SubscriptionManager(send, "qs_1", chunk_size=10)
+    manager.set_symbols(["A", "B", "C"], fast=False)
+    send.reset_mock()
+
+    added, removed = manager.set_symbols(["B", "C", "D", "E"], fast=False)
+
+    assert (added, removed) == (["D", "E"], ["A"])
+    assert messages(send) == [
+        ("quote_remove_symbols", ["qs_1", "A"]),
+        ("quote_add_symbols", ["qs_1", "D", "E", FORCE_PERMISSION]),
+    ]
+    send.reset_mock()
+    assert manager.set_symbols(["B", "C", "D", "E"]) == ([], [])
+    send.assert_not_called()
+
+
+def test_chunks_are_rate_limited_and_coalesced(fake_timer):
+    send = MagicMock()
+    clock = FakeClock()
+    manager = SubscriptionManager(send, "qs_1", chunk_size=2, rate=1, burst=1, clock=clock, timer=fake_timer)
+
+    manager.add(["A", "B", "C", "D"], fast=False)
+    assert messages(send) == [("quote_add_symbols", ["qs_1", "A", "B", FORCE_PERMISSION])]
+    assert manager.pending() == {"add": 2, "fast": 0, "remove": 0}
+    assert len(fake_timer.created) == 1 and fake_timer.created[0].delay == pytest.approx(1.0)
+
+    # Added then removed before its chunk went out: no message at all.
+    manager.remove(["D"])
+    # Removed then added back before the removal went out: stays subscribed.
+    manager.remove(["A"])
+    manager.add(["A"], fast=False)
+    assert manager.pending() == {"add": 1, "fast": 0, "remove": 0}
+
+    clock.now = 1.0
+    fake_timer.created[0].function()
+    assert messages(send)[-1] == ("quote_add_symbols", ["qs_1", "C", FORCE_PERMISSION])
+    assert manager.symbols == ["B", "C", "A"]
+    assert manager.messages == 2
+
+
+def test_remove_unknown_symbol_still_unsubscribes():
+    send = MagicMock()
+    manager = SubscriptionManager(send, "qs_1")
+    assert manager.remove(["X"]) == []
+    send.assert_called_once_with("quote_remove_symbols", ["qs_1", "X"])
+
+
+def test_cancel_drops_pending_changes(fake_timer):
+    send = MagicMock()
+    manager = SubscriptionManager(send, "qs_1", rate=1, burst=1, clock=FakeClock(), timer=fake_timer)
+    manager.add(["A", "B"])
+    manager.cancel()
+    assert manager.pending() == {"add": 0, "fast": 0, "remove": 0}
+    assert fake_timer.created[0].cancelled
+
+    manager.bucket = None
+    assert manager.flush() == 0
+    assert manager.symbols == ["A", "B"]
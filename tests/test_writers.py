@@ -0,0 +1,98 @@
+import math
+
+import pytest
+
+from pytradingview import writers
+from pytradingview.candles import CandleBatch
+from pytradingview.writers import (
+    ArrowCandleWriter, ChunkedCandleWriter, CsvCandleWriter, NpzCandleWriter, ParquetCandleWriter,
+    default_extension, format_for, open_writer, register_writer,
+)
+
+
+def page(times):
+    return CandleBatch.from_periods([{"v": [t, 1.0, 2.0, 0.5, float(t), 10.0]} for t in times])
+
+
+def write_pages(writer):
+    writer.write(page([120, 180, 240]), 0, 3)
+    writer.write(CandleBatch.from_periods([{"v": [0, 1.0, 2.0, 0.5, 0.0]}, {"v": [60, 1.0, 2.0, 0.5, 60.0, 5.0]}]), 0, 2)
+    writer.close()
+
+
+def test_format_selection():
+    assert format_for("out.parquet") == "parquet"
+    assert format_for("out.FEATHER") == "arrow"
+    assert format_for("out.npz") == "npz"
+    assert format_for("out.txt") == "csv"
+    assert format_for("out.csv", "parquet") == "parquet"
+    assert default_extension("arrow") == "arrow"
+    with pytest.raises(ValueError):
+        format_for("out.csv", "xlsx")
+    assert isinstance(open_writer("out.csv"), CsvCandleWriter)
+
+
+def test_register_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(writers, "WRITERS", dict(writers.WRITERS))
+    monkeypatch.setattr(writers, "EXTENSIONS", dict(writers.EXTENSIONS))
+    register_writer("custom", CsvCandleWriter, extensions=(".custom",))
+
+    assert isinstance(open_writer(str(tmp_path / "out.custom")), CsvCandleWriter)
+
+
+def test_chunked_writer_requires_write_chunk(tmp_path):
+    with pytest.raises(TypeError):
+        ChunkedCandleWriter(str(tmp_path / "out.bin"))
+
+
+def test_csv_rejects_compression():
+    with pytest.raises(ValueError):
+        CsvCandleWriter("out.csv", compression="gzip")
+
+
+@pytest.mark.parametrize("compression", [None, "zstd"])
+def test_parquet_writer(tmp_path, compression):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    filename = str(tmp_path / "out.parquet")
+
+    write_pages(ParquetCandleWriter(filename, compression=compression, chunk_size=2))
+
+    table = parquet.read_table(filename)
+    assert table.column_names == ["time", "open", "high", "low", "close", "volume"]
+    assert table.column("time").to_pylist() == [240, 180, 120, 60, 0]
+    assert math.isnan(table.column("volume").to_pylist()[-1])
+    assert parquet.ParquetFile(filename).num_row_groups == 2
+
+
+def test_arrow_writer(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    filename = str(tmp_path / "out.arrow")
+
+    write_pages(ArrowCandleWriter(filename, compression="lz4"))
+
+    with pyarrow.ipc.open_file(filename) as reader:
+        table = reader.read_all()
+    assert table.column("close").to_pylist() == [240.0, 180.0, 120.0, 60.0, 0.0]
+
+
+@pytest.mark.parametrize("compression", [None, "deflate"])
+def test_npz_writer(tmp_path, compression):
+    numpy = pytest.importorskip("numpy")
+    filename = str(tmp_path / "out.npz")
+
+    write_pages(NpzCandleWriter(filename, compression=compression, chunk_size=2))
+
+    with numpy.load(filename) as data:
+        assert data["time"].tolist() == [240, 180, 120, 60, 0]
+        assert data["time"].dtype == numpy.int64
+        assert data["volume"].tolist()[:4] == [10.0, 10.0, 10.0, 5.0]
+
+
+def test_empty_binary_file(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    filename = str(tmp_path / "empty.parquet")
+
+    ParquetCandleWriter(filename).close()
+
+    assert parquet.read_table(filename).num_rows == 0